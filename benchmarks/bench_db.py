@@ -0,0 +1,134 @@
+"""Benchmarks de la couche base de données (NoteManager) sur des bases synthétiques.
+
+Usage, depuis la racine du dépôt :
+    python -m benchmarks.bench_db --sizes 1k,100k,1m --output db.json
+    python -m benchmarks.bench_db --sizes 100k --compare db.json
+
+Les bases sont générées une fois puis gardées dans benchmarks/.cache ; celle d'un million
+de notes prend une vingtaine de minutes et quelques Go. Chaque mesure travaille sur une copie.
+"""
+import argparse
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from benchmarks.common import summarize, measure, write_results, print_table, compare
+from benchmarks.synthetic import cached_database, note_content
+from database import NoteManager
+from note_format import is_compact, dump_compact, parse_compact
+
+SIZES = {"1k": 1_000, "10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+SEARCH_TERMS = ["projet", "réunion budget", "fact", "relire dossier client", "inexistant"]
+
+def _parse_sizes(text):
+    sizes = []
+    for name in text.split(","):
+        name = name.strip().lower()
+        sizes.append((name, SIZES[name] if name in SIZES else int(name)))
+    return sizes
+
+def _edited(content, rng):
+    """Version modifiée d'une note : un paragraphe ajouté, comme une frappe dans l'éditeur."""
+    if is_compact(content):
+        blocks = parse_compact(content)
+        blocks.append([0, ["Ajout " + str(rng.random())]])
+        return dump_compact(blocks)
+    return content.replace("</body>", f"<p>Ajout {rng.random()}</p></body>")
+
+def bench_size(label, count, body, seed, samples, log):
+    """Mesure chaque opération sur une copie de la base synthétique de `count` notes."""
+    started = time.perf_counter()
+    source = cached_database(count, seed, body,
+                             progress=lambda n: log(f"\r  génération {label} : {n}/{count}", end=""))
+    log(f"\r  base {label} prête en {time.perf_counter() - started:.1f}s" + " " * 20)
+
+    workdir = tempfile.mkdtemp(prefix="noteblock-bench-")
+    try:
+        path = os.path.join(workdir, "notes.db")
+        shutil.copyfile(source, path)
+        db = NoteManager(path)
+        rng = random.Random(seed + 1)
+        results = {}
+
+        def record(name, durations):
+            results[f"{label}/{name}"] = summarize(durations)
+
+        ids = [row[0] for row in db._connect().execute("SELECT id FROM notes")]
+        reads = [(rng.choice(ids),) for _ in range(samples * 4)]
+        record("get_note_content", measure(db.get_note_content, reads))
+
+        record("get_notes_page", measure(db.get_notes_page, [()] * samples))
+        cursor_rows = db.get_notes_page(limit=min(count, 5000))
+        deep = cursor_rows[-1]
+        record("get_notes_page_deep", measure(db.get_notes_page, [((deep[4], deep[0]),)] * samples))
+
+        # Le parcours complet (export) coûte d'autant plus cher que la base est grande :
+        # moins de répétitions
+        def scan_notes():
+            for _ in db.iter_notes():
+                pass
+        repeats = max(3, min(samples, 20_000 // count))
+        record("iter_notes", measure(scan_notes, [()] * repeats))
+
+        record("search", measure(db.search, [(SEARCH_TERMS[i % len(SEARCH_TERMS)],) for i in range(samples)]))
+
+        new_notes = [(f"Bench {i}", note_content(rng, body), "En cours") for i in range(samples)]
+        record("add_note", measure(db.add_note, new_notes))
+
+        targets = rng.sample(ids, min(samples, len(ids)))
+        updates = []
+        for note_id in targets:
+            title, content, status = db.get_note_content(note_id)
+            updates.append((note_id, title, _edited(content, rng), status))
+        record("update_note", measure(db.update_note, updates))
+
+        updated = set(targets)
+        victims = rng.sample([note_id for note_id in ids if note_id not in updated],
+                             min(samples, len(ids) - len(targets)))
+        record("delete_note", measure(db.delete_note, [(note_id,) for note_id in victims]))
+
+        db.close()
+        meta = {"notes": count, "body": body, "db_bytes": os.path.getsize(source)}
+        return results, meta
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de NoteManager sur des bases synthétiques.")
+    parser.add_argument("--sizes", default="1k,100k,1m",
+                        help="tailles de base séparées par des virgules (1k, 10k, 100k, 1m ou un nombre)")
+    parser.add_argument("--body", choices=["compact", "html"], default="compact",
+                        help="format des corps de note : compact (actuel) ou html (toHtml(), ancien)")
+    parser.add_argument("--samples", type=int, default=300, help="mesures par opération")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--output", help="fichier JSON des résultats (sortie standard par défaut)")
+    parser.add_argument("--compare", metavar="BASELINE", help="résultats JSON d'un commit de référence")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="ratio de p50 au-delà duquel une opération est en régression")
+    args = parser.parse_args(argv)
+
+    def log(message, end="\n"):
+        print(message, end=end, file=sys.stderr, flush=True)
+
+    results = {}
+    meta = {"samples": args.samples, "seed": args.seed, "sizes": {}}
+    for label, count in _parse_sizes(args.sizes):
+        log(f"[{label}] {count} notes")
+        size_results, size_meta = bench_size(label, count, args.body, args.seed, args.samples, log)
+        results.update(size_results)
+        meta["sizes"][label] = size_meta
+
+    print_table(results)
+    write_results("database", results, args.output, meta)
+    if args.compare:
+        regressions = compare(args.compare, results, threshold=args.threshold)
+        if regressions:
+            log(f"{len(regressions)} opération(s) en régression : {', '.join(regressions)}")
+            return 1
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,240 @@
+"""Benchmarks de l'interface sous la plateforme Qt offscreen (aucun affichage requis).
+
+Usage, depuis la racine du dépôt :
+    python -m benchmarks.bench_gui --output gui.json
+    python -m benchmarks.bench_gui --notes 100000 --budget-scale 2
+    python -m benchmarks.bench_gui --threaded-background
+
+Chaque opération a un budget (en ms, sur un percentile) : le script se termine en
+erreur si l'un d'eux est dépassé. --budget-scale les assouplit sur une machine lente.
+"""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import argparse
+import random
+import shutil
+import sys
+import tempfile
+import time
+
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtCore import Qt, QSettings, QCoreApplication, QEvent
+from PyQt6.QtGui import QTextCursor
+from PyQt6.QtTest import QTest
+
+from benchmarks.common import ROOT, summarize, histogram, write_results, print_table, compare, over_budget
+from benchmarks.synthetic import cached_database, note_blocks, blocks_to_qt_html
+from database import NoteManager
+from note_format import dump_compact
+import tracing
+
+# Budgets par opération : (statistique, limite en ms). Ils suivent les mesures actuelles
+# avec une marge d'environ 50 % et sont à resserrer à chaque optimisation.
+BUDGETS = {
+    "background_frame": ("p90_ms", 3.0),
+    "apply_theme": ("p90_ms", 27.0),
+    "refresh_notes_list": ("p90_ms", 6.0),
+    "open_note_compact": ("p90_ms", 65.0),
+    "open_note_compact_complete": ("p90_ms", 190.0),
+    "open_note_slice": ("p99_ms", 20.0),
+    "reopen_note": ("p90_ms", 55.0),
+    "open_note_html": ("p90_ms", 150.0),
+    "keystroke": ("p99_ms", 12.0),
+    "cursor_move": ("p99_ms", 3.0),
+}
+# Opérations dont on garde l'histogramme des durées (images, tranches et frappes)
+FRAME_OPERATIONS = {"background_frame", "open_note_slice", "keystroke", "cursor_move"}
+BIG_NOTE_BLOCKS = 2000
+
+def _timed(clock, action, repeats):
+    durations = []
+    for _ in range(repeats):
+        start = clock()
+        action()
+        durations.append(clock() - start)
+    return durations
+
+def _settle(app, seconds=0.5):
+    """Laisse la boucle Qt finir le travail différé (mise en page d'un document remis
+    dans l'éditeur, par étapes sur minuterie) avant de mesurer l'opération suivante."""
+    deadline = time.perf_counter() + seconds
+    while time.perf_counter() < deadline:
+        app.processEvents()
+
+def _prepare_database(workdir, notes, seed):
+    """Copie une base synthétique et y ajoute deux longues notes (compacte et HTML)."""
+    path = os.path.join(workdir, "notes.db")
+    shutil.copyfile(cached_database(notes, seed), path)
+    rng = random.Random(seed + 2)
+    blocks = note_blocks(rng, BIG_NOTE_BLOCKS)
+    db = NoteManager(path)
+    html_id = db.add_note("Longue note (HTML)", blocks_to_qt_html(blocks))
+    compact_id = db.add_note("Longue note (compacte)", dump_compact(blocks))
+    db.close()
+    return path, compact_id, html_id
+
+def run(args, log):
+    workdir = tempfile.mkdtemp(prefix="noteblock-gui-bench-")
+    # Réglages isolés : le benchmark ne touche pas aux préférences de l'utilisateur
+    QSettings.setPath(QSettings.Format.NativeFormat, QSettings.Scope.UserScope, workdir)
+    os.chdir(ROOT)
+    app = QApplication.instance() or QApplication(sys.argv)
+
+    from ui.mainwindow import MainWindow
+
+    window = None
+    try:
+        log(f"préparation d'une base de {args.notes} notes")
+        path, compact_id, html_id = _prepare_database(workdir, args.notes, args.seed)
+        window = MainWindow(path)
+        window.background.set_threaded(args.threaded_background)
+        window.resize(1600, 900)
+        window.show()
+        app.processEvents()
+        # Les migrations de démarrage tournent dans le thread d'écriture
+        while not window.db_ready:
+            app.processEvents()
+
+        clock = time.perf_counter_ns
+        raw = {}
+
+        # Image du fond animé, comme la produit le planificateur : simulation puis peinture
+        # synchrone des zones modifiées (et des widgets qui les recouvrent) ; en mode
+        # threadé, simulation et envoi de l'état au thread de rendu
+        background = window.background
+        background.scheduler.pause("benchmark")
+        background.resize(window.central_widget.size())
+        raw["background_frame"] = _timed(clock, background.update_animation, args.frames)
+
+        def switch_theme():
+            window.is_dark_theme = not window.is_dark_theme
+            window.apply_theme()
+            app.processEvents()
+        raw["apply_theme"] = _timed(clock, switch_theme, 20)
+
+        window.show_notes_list()
+        app.processEvents()
+
+        def refresh():
+            window.refresh_notes_list()
+            app.processEvents()
+        raw["refresh_notes_list"] = _timed(clock, refresh, 30)
+
+        # L'ouverture est asynchrone : open_note_* mesure l'attente jusqu'au début de la
+        # note affiché, *_complete jusqu'à la note entière, open_note_slice les tranches
+        # de construction qui occupent la boucle Qt entre-temps
+        opened_at = []
+        window.note_loader.opened.connect(lambda *_: opened_at.append(clock()))
+        slices = tracing.attach(tracing.RecentTracer(size=100_000))
+
+        def opener(note_id):
+            def open_note():
+                window.show_page("list")
+                for row in range(window.notes_model.rowCount()):
+                    if window.notes_model.note_id(row) == note_id:
+                        window.notes_table.selectRow(row)
+                        break
+                opened_at.clear()
+                start = clock()
+                window.open_selected_note()
+                while window.note_loader.is_loading():
+                    app.processEvents()
+                app.processEvents()
+                complete = clock() - start
+                # Hors de app.exec(), les deleteLater() ne sont traités que sur demande
+                QCoreApplication.sendPostedEvents(None, QEvent.Type.DeferredDelete)
+                return opened_at[0] - start, complete
+            return open_note
+        open_compact = opener(compact_id)
+        open_html = opener(html_id)
+        # Première ouverture : cache des documents désactivé
+        cache = window.note_loader.cache
+        cache.max_bytes, max_bytes = 0, cache.max_bytes
+        raw["open_note_html"] = [open_html()[1] for _ in range(5)]
+        raw["open_note_compact"], raw["open_note_compact_complete"] = zip(*[open_compact() for _ in range(10)])
+        tracing.detach(slices)
+        raw["open_note_slice"] = [duration for _, duration in slices.recent("NoteLoader.slice")]
+        # Aller-retour entre les deux notes : le document revient du cache
+        cache.max_bytes = max_bytes
+        open_html()
+        open_compact()
+        raw["reopen_note"] = [(open_html if i % 2 else open_compact)()[1] for i in range(10)]
+
+        # Frappes au milieu de la longue note ouverte : mise en page et peinture comprises
+        editor = window.text_edit
+        editor.setFocus()
+        cursor = editor.textCursor()
+        cursor.setPosition(editor.document().characterCount() // 2)
+        cursor.movePosition(QTextCursor.MoveOperation.EndOfBlock)
+        editor.setTextCursor(cursor)
+        # Sinon les étapes de mise en page de la note rouverte tombent dans les
+        # premières frappes (jusqu'à 30 ms chacune)
+        _settle(app)
+        keys = [Qt.Key.Key_Return if i % 40 == 39 else Qt.Key.Key_A for i in range(args.keystrokes)]
+        keys = iter(keys)
+
+        def keystroke():
+            QTest.keyClick(editor, next(keys))
+            app.processEvents()
+        raw["keystroke"] = _timed(clock, keystroke, args.keystrokes)
+
+        # Navigation aux flèches : la barre d'outils suit le format sous le curseur
+        arrows = iter([Qt.Key.Key_Up if i % 2 else Qt.Key.Key_Down for i in range(args.keystrokes)])
+
+        def cursor_move():
+            QTest.keyClick(editor, next(arrows))
+            app.processEvents()
+        raw["cursor_move"] = _timed(clock, cursor_move, args.keystrokes)
+
+        results = {}
+        for name, durations in raw.items():
+            stats = summarize(durations)
+            if name in FRAME_OPERATIONS:
+                stats["histogram_ms"] = histogram(durations)
+            metric, limit = BUDGETS[name]
+            stats["budget"] = {"metric": metric, "limit_ms": round(limit * args.budget_scale, 3)}
+            results[name] = stats
+        return results
+    finally:
+        if window is not None:
+            window.close()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmarks de l'interface (plateforme offscreen).")
+    parser.add_argument("--notes", type=int, default=10_000, help="taille de la base synthétique")
+    parser.add_argument("--frames", type=int, default=600, help="images du fond animé à mesurer")
+    parser.add_argument("--keystrokes", type=int, default=400, help="frappes à mesurer")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--threaded-background", action="store_true",
+                        help="compose le fond animé dans un thread dédié")
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiplie tous les budgets (machines lentes, CI)")
+    parser.add_argument("--output", help="fichier JSON des résultats (sortie standard par défaut)")
+    parser.add_argument("--compare", metavar="BASELINE", help="résultats JSON d'un commit de référence")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="ratio de p50 au-delà duquel une opération est en régression")
+    args = parser.parse_args(argv)
+
+    def log(message, end="\n"):
+        print(message, end=end, file=sys.stderr, flush=True)
+
+    results = run(args, log)
+    print_table(results)
+    meta = {"notes": args.notes, "frames": args.frames, "keystrokes": args.keystrokes,
+            "platform": QApplication.platformName(), "budget_scale": args.budget_scale,
+            "threaded_background": args.threaded_background}
+    write_results("gui", results, args.output, meta)
+
+    failed = over_budget(results)
+    for name in failed:
+        budget = results[name]["budget"]
+        log(f"budget dépassé : {name} {budget['metric']} = {results[name][budget['metric']]:.2f} ms "
+            f"(limite {budget['limit_ms']} ms)")
+    if args.compare:
+        failed += compare(args.compare, results, threshold=args.threshold)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,140 @@
+"""Démarrage à froid de l'application, mesuré dans des processus neufs (plateforme offscreen).
+
+Usage, depuis la racine du dépôt :
+    python -m benchmarks.bench_startup --output startup.json
+    python -m benchmarks.bench_startup --runs 20 --notes 100000
+
+Chaque lancement est un nouvel interpréteur qui ouvre la fenêtre principale sur une
+copie de la base synthétique. Les phases sont comptées depuis le lancement du processus :
+- imports : Qt et les modules de l'application chargés ;
+- window : fenêtre principale construite ;
+- first_paint : première image de la fenêtre peinte, ce que l'utilisateur attend ;
+- ready : travail différé terminé (schéma vérifié, liste préchargée).
+"""
+import argparse
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+from benchmarks.common import ROOT, summarize, write_results, print_table, compare, over_budget
+from benchmarks.synthetic import cached_database
+
+PHASES = ["imports", "window", "first_paint", "ready"]
+# Budgets par phase : (statistique, limite en ms), avec une marge d'environ 50 %
+BUDGETS = {
+    "first_paint": ("p90_ms", 450.0),
+    "ready": ("p90_ms", 600.0),
+}
+# Au-delà, le processus de mesure est considéré comme bloqué
+CHILD_TIMEOUT = 60
+
+def child(db_path, settings_dir):
+    """Processus mesuré : démarre l'application comme main.py et affiche les instants (JSON)."""
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    stamps = {}
+    from PyQt6.QtWidgets import QApplication
+    from PyQt6.QtCore import QSettings, QTimer, QObject, QEvent
+    from ui.mainwindow import MainWindow
+    stamps["imports"] = time.time()
+
+    QSettings.setPath(QSettings.Format.NativeFormat, QSettings.Scope.UserScope, settings_dir)
+    app = QApplication(sys.argv[:1])
+    window = MainWindow(db_path)
+    stamps["window"] = time.time()
+
+    class FirstPaint(QObject):
+        """Note la fin de l'itération de la boucle qui a peint la fenêtre pour la première fois."""
+
+        def eventFilter(self, obj, event):
+            if event.type() == QEvent.Type.Paint and "first_paint" not in stamps:
+                stamps["first_paint"] = None
+                QTimer.singleShot(0, lambda: stamps.update(first_paint=time.time()))
+            return False
+
+    first_paint = FirstPaint()
+    app.installEventFilter(first_paint)
+
+    def poll():
+        model = getattr(window, "notes_model", None)
+        if stamps.get("first_paint") and model is not None and model.loaded:
+            stamps["ready"] = time.time()
+            app.quit()
+
+    poller = QTimer()
+    poller.timeout.connect(poll)
+    poller.start(1)
+    window.show()
+    app.exec()
+    window.close()
+    print(json.dumps(stamps))
+
+def run(args, log):
+    source = cached_database(args.notes, args.seed)
+    raw = {phase: [] for phase in PHASES}
+    for number in range(args.runs):
+        workdir = tempfile.mkdtemp(prefix="noteblock-startup-bench-")
+        try:
+            path = os.path.join(workdir, "notes.db")
+            shutil.copyfile(source, path)
+            env = dict(os.environ, QT_QPA_PLATFORM="offscreen")
+            started = time.time()
+            output = subprocess.run([sys.executable, "-m", "benchmarks.bench_startup", "--child", path, workdir],
+                                    cwd=ROOT, env=env, capture_output=True, text=True,
+                                    timeout=CHILD_TIMEOUT, check=True).stdout
+            stamps = json.loads(output.strip().splitlines()[-1])
+        finally:
+            shutil.rmtree(workdir, ignore_errors=True)
+        for phase in PHASES:
+            raw[phase].append(int((stamps[phase] - started) * 1e9))
+        log(f"\r  lancement {number + 1}/{args.runs}", end="")
+    log("")
+
+    results = {}
+    for phase, durations in raw.items():
+        stats = summarize(durations)
+        if phase in BUDGETS:
+            metric, limit = BUDGETS[phase]
+            stats["budget"] = {"metric": metric, "limit_ms": round(limit * args.budget_scale, 3)}
+        results[phase] = stats
+    return results
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Démarrage à froid de l'application (plateforme offscreen).")
+    parser.add_argument("--runs", type=int, default=10, help="nombre de lancements")
+    parser.add_argument("--notes", type=int, default=10_000, help="taille de la base synthétique")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--budget-scale", type=float, default=1.0,
+                        help="multiplie tous les budgets (machines lentes, CI)")
+    parser.add_argument("--output", help="fichier JSON des résultats (sortie standard par défaut)")
+    parser.add_argument("--compare", metavar="BASELINE", help="résultats JSON d'un commit de référence")
+    parser.add_argument("--threshold", type=float, default=1.25,
+                        help="ratio de p50 au-delà duquel une phase est en régression")
+    parser.add_argument("--child", nargs=2, metavar=("DB", "SETTINGS_DIR"), help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+    if args.child:
+        child(*args.child)
+        return 0
+
+    def log(message, end="\n"):
+        print(message, end=end, file=sys.stderr, flush=True)
+
+    results = run(args, log)
+    print_table(results)
+    meta = {"runs": args.runs, "notes": args.notes, "budget_scale": args.budget_scale}
+    write_results("startup", results, args.output, meta)
+
+    failed = over_budget(results)
+    for name in failed:
+        budget = results[name]["budget"]
+        log(f"budget dépassé : {name} {budget['metric']} = {results[name][budget['metric']]:.2f} ms "
+            f"(limite {budget['limit_ms']} ms)")
+    if args.compare:
+        failed += compare(args.compare, results, threshold=args.threshold)
+    return 1 if failed else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,121 @@
+import json
+import os
+import platform
+import sqlite3
+import subprocess
+import sys
+import time
+
+# Outils partagés par les benchmarks : mesure, percentiles et résultats JSON
+# comparables d'un commit à l'autre.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def percentile(sorted_values, fraction):
+    """Percentile par interpolation linéaire d'une liste déjà triée."""
+    if not sorted_values:
+        return 0.0
+    position = (len(sorted_values) - 1) * fraction
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (position - lower)
+
+def summarize(durations_ns):
+    """Latences (ms) et débit d'une série de mesures en nanosecondes."""
+    values = sorted(d / 1e6 for d in durations_ns)
+    total = sum(values)
+    return {
+        "count": len(values),
+        "total_ms": round(total, 3),
+        "ops_per_s": round(len(values) / (total / 1000), 1) if total else None,
+        "mean_ms": round(total / len(values), 4) if values else 0.0,
+        "p50_ms": round(percentile(values, 0.50), 4),
+        "p90_ms": round(percentile(values, 0.90), 4),
+        "p99_ms": round(percentile(values, 0.99), 4),
+        "max_ms": round(values[-1], 4) if values else 0.0,
+    }
+
+# Bornes (ms) des histogrammes de temps de trame : 60 et 30 images/s au milieu
+FRAME_EDGES_MS = [1, 2, 4, 8, 16.7, 33.3, 50, 100]
+
+def histogram(durations_ns, edges_ms=FRAME_EDGES_MS):
+    """Répartition des durées par tranche : {"<1": n, ..., ">=100": n}."""
+    counts = {f"<{edge:g}": 0 for edge in edges_ms}
+    counts[f">={edges_ms[-1]:g}"] = 0
+    for duration in durations_ns:
+        ms = duration / 1e6
+        for edge in edges_ms:
+            if ms < edge:
+                counts[f"<{edge:g}"] += 1
+                break
+        else:
+            counts[f">={edges_ms[-1]:g}"] += 1
+    return counts
+
+def measure(function, arguments):
+    """Appelle `function(*args)` pour chaque tuple d'arguments et retourne les durées (ns)."""
+    durations = []
+    clock = time.perf_counter_ns
+    for args in arguments:
+        start = clock()
+        function(*args)
+        durations.append(clock() - start)
+    return durations
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def environment():
+    return {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "sqlite": sqlite3.sqlite_version,
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "time": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+def write_results(suite, results, path=None, meta=None):
+    """Écrit les résultats en JSON (sur la sortie standard si `path` est vide)."""
+    document = {"suite": suite, "environment": environment(), "meta": meta or {}, "results": results}
+    text = json.dumps(document, indent=2, ensure_ascii=False)
+    if path:
+        with open(path, "w", encoding="utf-8") as out:
+            out.write(text + "\n")
+    else:
+        print(text)
+    return document
+
+def print_table(results, stream=sys.stderr):
+    """Résumé lisible des résultats (sur la sortie d'erreur, le JSON restant exploitable)."""
+    print(f"{'opération':<34}{'n':>8}{'ops/s':>12}{'p50 ms':>10}{'p90 ms':>10}{'p99 ms':>10}{'max ms':>10}",
+          file=stream)
+    for name, stats in results.items():
+        ops = stats["ops_per_s"] if stats["ops_per_s"] is not None else float("nan")
+        print(f"{name:<34}{stats['count']:>8}{ops:>12.1f}{stats['p50_ms']:>10.3f}"
+              f"{stats['p90_ms']:>10.3f}{stats['p99_ms']:>10.3f}{stats['max_ms']:>10.3f}", file=stream)
+
+def compare(baseline_path, results, metric="p50_ms", threshold=1.25, stream=sys.stderr):
+    """Compare aux résultats d'un commit précédent ; retourne les opérations régressées."""
+    with open(baseline_path, encoding="utf-8") as source:
+        baseline = json.load(source)["results"]
+    regressions = []
+    for name, stats in results.items():
+        old = baseline.get(name)
+        if not old or not old.get(metric):
+            continue
+        ratio = stats[metric] / old[metric]
+        flag = "  <-- régression" if ratio > threshold else ""
+        print(f"{name:<34}{old[metric]:>10.3f} -> {stats[metric]:>10.3f}  x{ratio:.2f}{flag}", file=stream)
+        if ratio > threshold:
+            regressions.append(name)
+    return regressions
+
+def over_budget(results):
+    """Noms des opérations dont la statistique dépasse le budget."""
+    return [name for name, stats in results.items()
+            if "budget" in stats and stats[stats["budget"]["metric"]] > stats["budget"]["limit_ms"]]
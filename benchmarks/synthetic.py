@@ -0,0 +1,158 @@
+import html
+import os
+import random
+import sqlite3
+
+from benchmarks.common import ROOT
+from note_format import dump_compact, FLAG_BOLD, FLAG_ITALIC, FLAG_UNDERLINE
+
+# Génération de bases de notes synthétiques, reproductibles (graine fixe).
+# Les corps imitent ce que produit RichTextEdit : paragraphes, listes imbriquées,
+# gras / italique / souligné, couleurs et surlignage, tailles très variables
+# (la plupart des notes font quelques paragraphes, quelques-unes sont très longues).
+
+CACHE_DIR = os.path.join(ROOT, "benchmarks", ".cache")
+
+WORDS = ("note idée projet réunion liste tâche client rapport semaine budget lecture "
+         "courses rappel objectif planning brouillon version équipe appel relire envoyer "
+         "terminer préparer vérifier dossier question réponse important demain lundi "
+         "mardi résumé chapitre recette voyage billet facture contrat design test").split()
+COLORS = ["#e74c3c", "#2980b9", "#27ae60", "#8e44ad", "#d35400"]
+HIGHLIGHTS = ["#fff59d", "#c8e6c9", "#bbdefb"]
+LIST_STYLES = ["disc", "circle", "decimal", "lower-alpha", "upper-roman"]
+STATUSES = ["En cours", "Terminé"]
+
+def _sentence(rng, count):
+    return " ".join(rng.choices(WORDS, k=count)).capitalize() + rng.choice([".", ".", ".", " !", " ?"])
+
+def _runs(rng):
+    runs = []
+    for _ in range(rng.choice([1, 1, 1, 2, 3, 5])):
+        text = _sentence(rng, rng.randint(4, 18)) + " "
+        roll = rng.random()
+        if roll < 0.7:
+            runs.append([text])
+        elif roll < 0.85:
+            runs.append([text, rng.choice([FLAG_BOLD, FLAG_ITALIC, FLAG_UNDERLINE, FLAG_BOLD | FLAG_ITALIC])])
+        elif roll < 0.95:
+            runs.append([text, 0, rng.choice(COLORS)])
+        else:
+            runs.append([text, 0, None, rng.choice(HIGHLIGHTS)])
+    runs[-1][0] = runs[-1][0].rstrip()
+    return runs
+
+def note_blocks(rng, size=None):
+    """Blocs (format compact) d'une note de `size` blocs, ou de taille aléatoire."""
+    if size is None:
+        # Distribution à longue traîne : médiane ~8 blocs, quelques notes de plusieurs centaines
+        size = min(2000, max(1, int(rng.lognormvariate(2.1, 1.0))))
+    blocks = []
+    list_number = 0
+    while len(blocks) < size:
+        if rng.random() < 0.2:
+            style = rng.choice(LIST_STYLES)
+            for _ in range(rng.randint(2, 8)):
+                indent = rng.choice([1, 1, 1, 2])
+                blocks.append([[style, indent, list_number], *_runs(rng)])
+            list_number += 1
+        elif rng.random() < 0.1:
+            blocks.append([0])
+        else:
+            blocks.append([0, *_runs(rng)])
+    return blocks
+
+# En-tête et styles émis par QTextEdit.toHtml(), pour les bases au format historique
+_QT_HEADER = ('<!DOCTYPE HTML PUBLIC "-//W3C//DTD HTML 4.0//EN" "http://www.w3.org/TR/REC-html40/strict.dtd">\n'
+              '<html><head><meta name="qrichtext" content="1" /><meta charset="utf-8" />'
+              '<style type="text/css">\np, li { white-space: pre-wrap; }\nhr { height: 1px; border-width: 0; }\n'
+              '</style></head><body style=" font-family:\'Segoe UI\'; font-size:11pt; font-weight:400; '
+              'font-style:normal;">\n')
+_QT_PARAGRAPH = ('<p style=" margin-top:0px; margin-bottom:0px; margin-left:0px; margin-right:0px; '
+                 '-qt-block-indent:0; text-indent:0px;">')
+_QT_EMPTY = ('<p style="-qt-paragraph-type:empty; margin-top:0px; margin-bottom:0px; margin-left:0px; '
+             'margin-right:0px; -qt-block-indent:0; text-indent:0px;"><br /></p>')
+
+def _qt_run(run):
+    text = html.escape(run[0], quote=False)
+    flags = run[1] if len(run) > 1 else 0
+    styles = []
+    if flags & FLAG_BOLD:
+        styles.append("font-weight:700;")
+    if flags & FLAG_ITALIC:
+        styles.append("font-style:italic;")
+    if flags & FLAG_UNDERLINE:
+        styles.append("text-decoration: underline;")
+    if len(run) > 2 and run[2]:
+        styles.append(f"color:{run[2]};")
+    if len(run) > 3 and run[3]:
+        styles.append(f"background-color:{run[3]};")
+    if not styles:
+        return text
+    return f'<span style=" {" ".join(styles)}">{text}</span>'
+
+def blocks_to_qt_html(blocks):
+    """HTML dans le style de toHtml() (ancien format de stockage)."""
+    out = [_QT_HEADER]
+    open_list = None
+    for block in blocks:
+        list_info = block[0]
+        if open_list is not None and (not list_info or list_info[2] != open_list):
+            out.append("</ul>")
+            open_list = None
+        body = "".join(_qt_run(run) for run in block[1:])
+        if list_info:
+            if open_list is None:
+                out.append(f'<ul style="margin-top: 0px; margin-bottom: 0px; margin-left: 0px; '
+                           f'margin-right: 0px; -qt-list-indent: {list_info[1]};">')
+                open_list = list_info[2]
+            out.append(f'<li style=" margin-top:0px; margin-bottom:0px; margin-left:0px; '
+                       f'margin-right:0px; -qt-block-indent:0; text-indent:0px;">{body}</li>')
+        elif body:
+            out.append(_QT_PARAGRAPH + body + "</p>")
+        else:
+            out.append(_QT_EMPTY)
+    if open_list is not None:
+        out.append("</ul>")
+    out.append("</body></html>")
+    return "\n".join(out)
+
+def note_content(rng, body="compact"):
+    blocks = note_blocks(rng)
+    if body == "html":
+        return blocks_to_qt_html(blocks)
+    return dump_compact(blocks)
+
+def iter_records(count, seed=0, body="compact", start_ms=1_600_000_000_000):
+    """Notes synthétiques (title, content, status, created_ms, updated_ms) pour add_notes_bulk."""
+    rng = random.Random(seed)
+    created = start_ms
+    for _ in range(count):
+        created += rng.randint(1_000, 3_600_000)
+        updated = created + rng.choice([0, 0, rng.randint(1_000, 86_400_000)])
+        title = _sentence(rng, rng.randint(1, 6)).rstrip(".!? ")
+        yield title, note_content(rng, body), rng.choice(STATUSES), created, updated
+
+def build_database(path, count, seed=0, body="compact", progress=None):
+    """Crée une base de `count` notes synthétiques à `path`."""
+    from database import NoteManager
+    for suffix in ("", "-wal", "-shm"):
+        if os.path.exists(path + suffix):
+            os.remove(path + suffix)
+    db = NoteManager(path)
+    db.add_notes_bulk(iter_records(count, seed, body), batch=5000, progress=progress)
+    db.close()
+    # Base autonome (sans WAL) pour pouvoir être copiée telle quelle
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA wal_checkpoint(TRUNCATE)")
+    conn.execute("PRAGMA journal_mode=DELETE")
+    conn.close()
+
+def cached_database(count, seed=0, body="compact", progress=None):
+    """Chemin d'une base synthétique mise en cache (générée au premier appel)."""
+    from database import SCHEMA_VERSION
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    path = os.path.join(CACHE_DIR, f"notes-{count}-{body}-s{seed}-v{SCHEMA_VERSION}.db")
+    if not os.path.exists(path):
+        build_database(path + ".tmp", count, seed, body, progress)
+        os.replace(path + ".tmp", path)
+    return path
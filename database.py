@@ -1,17 +1,158 @@
 import sqlite3
 import datetime
+import itertools
+import json
 import os
+import re
+import threading
+import tracing
+from note_format import (plain_text, pack_content, unpack_content, encode_json,
+                         make_delta, apply_delta)
 
-class NoteManager:
-    def __init__(self, db_name="notes.db"):
-        self.db_name = db_name
-        self.init_db()
+# Requêtes partagées : sqlite3 met en cache les instructions préparées par texte SQL,
+# garder les mêmes chaînes permet de réutiliser les plans déjà compilés.
+SQL_INSERT_NOTE = '''
+    INSERT INTO notes (title, content, created_at, updated_at, status, created_ms, updated_ms)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_UPDATE_NOTE = '''
+    UPDATE notes
+    SET title = ?, content = ?, updated_at = ?, status = ?, updated_ms = ?
+    WHERE id = ?
+'''
+SQL_DELETE_NOTE = 'DELETE FROM notes WHERE id = ?'
+# Pagination par clé (updated_ms, id) sur l'index couvrant idx_notes_updated :
+# coût constant quelle que soit la profondeur
+SQL_FIRST_PAGE = '''
+    SELECT id, title, created_at, status, updated_ms FROM notes
+    ORDER BY updated_ms DESC, id DESC
+    LIMIT ?
+'''
+SQL_NEXT_PAGE = '''
+    SELECT id, title, created_at, status, updated_ms FROM notes
+    WHERE (updated_ms, id) < (?, ?)
+    ORDER BY updated_ms DESC, id DESC
+    LIMIT ?
+'''
+SQL_FIRST_PAGE_STATUS = '''
+    SELECT id, title, created_at, status, updated_ms FROM notes
+    WHERE status = ?
+    ORDER BY updated_ms DESC, id DESC
+    LIMIT ?
+'''
+SQL_NEXT_PAGE_STATUS = '''
+    SELECT id, title, created_at, status, updated_ms FROM notes
+    WHERE status = ? AND (updated_ms, id) < (?, ?)
+    ORDER BY updated_ms DESC, id DESC
+    LIMIT ?
+'''
+SQL_COUNT_NOTES = 'SELECT count(*) FROM notes'
+SQL_ITER_NOTES = '''
+    SELECT id, title, content, status, created_ms, updated_ms FROM notes
+    WHERE id > ?
+    ORDER BY id
+    LIMIT ?
+'''
+SQL_NOTE_ROW = 'SELECT id, title, created_at, status, updated_ms FROM notes WHERE id = ?'
+SQL_NOTE_CONTENT = 'SELECT title, content, status FROM notes WHERE id = ?'
+SQL_NOTE_FOR_EDIT = 'SELECT title, content, status, updated_ms FROM notes WHERE id = ?'
+SQL_NOTE_STAMP = 'SELECT updated_ms FROM notes WHERE id = ?'
+SQL_LEGACY_CONTENT = '''
+    SELECT id, content FROM notes
+    WHERE id > ? AND typeof(content) = 'text'
+    ORDER BY id
+    LIMIT ?
+'''
+SQL_SET_CONTENT = 'UPDATE notes SET content = ? WHERE id = ?'
+SQL_NOTE_FOR_UPDATE = 'SELECT title, content, status, updated_ms FROM notes WHERE id = ?'
+SQL_LAST_REVISION = 'SELECT id, depth FROM note_revisions WHERE note_id = ? ORDER BY id DESC LIMIT 1'
+SQL_INSERT_REVISION = '''
+    INSERT INTO note_revisions (note_id, created_ms, title, status, kind, depth, data)
+    VALUES (?, ?, ?, ?, ?, ?, ?)
+'''
+SQL_LIST_REVISIONS = '''
+    SELECT id, created_ms, title, status, kind FROM note_revisions
+    WHERE note_id = ?
+    ORDER BY id DESC
+    LIMIT ?
+'''
+# Chaîne de reconstruction : le dernier instantané complet puis les deltas jusqu'à la révision
+SQL_REVISION_CHAIN = '''
+    SELECT id, title, status, kind, data FROM note_revisions
+    WHERE note_id = ? AND id <= ? AND id >= (
+        SELECT max(id) FROM note_revisions WHERE note_id = ? AND id <= ? AND kind = 'full'
+    )
+    ORDER BY id
+'''
+SQL_REVISION_TIMES = 'SELECT id, created_ms FROM note_revisions WHERE note_id = ? ORDER BY id'
+# Révisions à partir du dernier instantané complet qui précède `id` (inclus)
+SQL_REVISIONS_FROM_SNAPSHOT = '''
+    SELECT id, kind, depth, data FROM note_revisions
+    WHERE note_id = ? AND id >= (
+        SELECT max(id) FROM note_revisions WHERE note_id = ? AND id <= ? AND kind = 'full'
+    )
+    ORDER BY id
+'''
+SQL_OLDEST_KEPT_REVISION = '''
+    SELECT id FROM note_revisions WHERE note_id = ?
+    ORDER BY id DESC LIMIT 1 OFFSET ?
+'''
+# Classement d'abord (rowid et score seulement), extrait ensuite : snippet() n'est
+# calculé que pour les lignes retenues, pas pour toutes les correspondances
+SQL_SEARCH = '''
+    WITH hits AS (
+        SELECT rowid, bm25(notes_fts, 5.0, 1.0) AS score FROM notes_fts
+        WHERE notes_fts MATCH ?1
+        ORDER BY score
+        LIMIT ?2
+    )
+    SELECT n.id, n.title, n.created_at, n.status,
+           snippet(notes_fts, 1, '«', '»', '…', 12)
+    FROM hits
+    JOIN notes_fts ON notes_fts.rowid = hits.rowid
+    JOIN notes n ON n.id = hits.rowid
+    WHERE notes_fts MATCH ?1
+    ORDER BY hits.score
+'''
 
-    def init_db(self):
-        """Crée la table si elle n'existe pas."""
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute('''
+# Index plein texte : titre + texte brut extrait du contenu (pas le HTML),
+# maintenu par des triggers via la fonction note_text() enregistrée sur chaque connexion.
+# Une mise à jour qui ne change que l'encodage du contenu (compression) ne réindexe pas :
+# note_raw() ne fait que décompresser, bien moins cher que l'extraction du texte.
+SQL_CREATE_FTS = '''
+    CREATE VIRTUAL TABLE notes_fts USING fts5(
+        title, body,
+        tokenize = 'unicode61 remove_diacritics 2',
+        prefix = '2 3'
+    )
+'''
+SQL_FTS_TRIGGERS = '''
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ai AFTER INSERT ON notes BEGIN
+        INSERT INTO notes_fts(rowid, title, body) VALUES (new.id, new.title, note_text(new.content));
+    END;
+    CREATE TRIGGER IF NOT EXISTS notes_fts_ad AFTER DELETE ON notes BEGIN
+        DELETE FROM notes_fts WHERE rowid = old.id;
+    END;
+    CREATE TRIGGER IF NOT EXISTS notes_fts_au AFTER UPDATE OF title, content ON notes
+    WHEN old.title IS NOT new.title OR note_raw(old.content) IS NOT note_raw(new.content) BEGIN
+        UPDATE notes_fts SET title = new.title, body = note_text(new.content) WHERE rowid = new.id;
+    END;
+'''
+
+# --- Migrations ---
+# Chaque migration fait passer le schéma de la version i à i + 1 (PRAGMA user_version).
+# Elles doivent rester rejouables : une migration interrompue est relancée au démarrage suivant.
+# Ce sont des générateurs : les reprises de données se font par lots, une transaction
+# par lot, et chaque lot produit le nombre de lignes traitées (progression, interruption).
+
+BACKFILL_BATCH = 2000
+# L'indexation analyse le contenu de chaque note (HTML compris) : lots plus petits
+FTS_BACKFILL_BATCH = 200
+
+def _migration_1(conn):
+    """Table des notes et index plein texte."""
+    with conn:
+        conn.execute('''
             CREATE TABLE IF NOT EXISTS notes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 title TEXT NOT NULL,
@@ -21,51 +162,545 @@ class NoteManager:
                 status TEXT DEFAULT 'En cours'
             )
         ''')
-        conn.commit()
-        conn.close()
+        has_fts = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'notes_fts'").fetchone()
+        if not has_fts:
+            conn.execute(SQL_CREATE_FTS)
+
+    # Reprise après interruption : les notes déjà indexées (ids croissants) sont sautées
+    after_id = conn.execute("SELECT coalesce(max(rowid), 0) FROM notes_fts").fetchone()[0]
+    while True:
+        ids = [row[0] for row in conn.execute(
+            "SELECT id FROM notes WHERE id > ? ORDER BY id LIMIT ?", (after_id, FTS_BACKFILL_BATCH))]
+        if not ids:
+            break
+        with conn:
+            conn.execute('''
+                INSERT INTO notes_fts(rowid, title, body)
+                SELECT id, title, note_text(content) FROM notes WHERE id > ? AND id <= ?
+            ''', (after_id, ids[-1]))
+        after_id = ids[-1]
+        yield len(ids)
+    conn.executescript(SQL_FTS_TRIGGERS)
+
+def _migration_2(conn):
+    """Horodatages entiers en millisecondes et index couvrants de la liste."""
+    columns = {row[1] for row in conn.execute("PRAGMA table_info(notes)")}
+    with conn:
+        if "created_ms" not in columns:
+            conn.execute("ALTER TABLE notes ADD COLUMN created_ms INTEGER")
+        if "updated_ms" not in columns:
+            conn.execute("ALTER TABLE notes ADD COLUMN updated_ms INTEGER")
+
+    # Reprise des anciennes lignes par lots, une transaction par lot pour ne pas
+    # bloquer la base : les dates texte étaient en heure locale, à la minute.
+    while True:
+        with conn:
+            cursor = conn.execute('''
+                UPDATE notes SET
+                    created_ms = COALESCE(CAST(strftime('%s', created_at, 'utc') AS INTEGER) * 1000, 0),
+                    updated_ms = COALESCE(CAST(strftime('%s', updated_at, 'utc') AS INTEGER) * 1000, 0)
+                WHERE id IN (SELECT id FROM notes WHERE updated_ms IS NULL LIMIT ?)
+            ''', (BACKFILL_BATCH,))
+        if cursor.rowcount > 0:
+            yield cursor.rowcount
+        if cursor.rowcount < BACKFILL_BATCH:
+            break
+
+    with conn:
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notes_updated
+            ON notes(updated_ms DESC, id DESC, title, created_at, status)
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_notes_status
+            ON notes(status, updated_ms DESC, id DESC, title, created_at)
+        ''')
+
+def _migration_3(conn):
+    """Historique des révisions (instantanés complets et deltas)."""
+    with conn:
+        conn.execute('''
+            CREATE TABLE IF NOT EXISTS note_revisions (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                note_id INTEGER NOT NULL,
+                created_ms INTEGER NOT NULL,
+                title TEXT,
+                status TEXT,
+                kind TEXT NOT NULL,
+                depth INTEGER NOT NULL DEFAULT 0,
+                data BLOB
+            )
+        ''')
+        conn.execute('''
+            CREATE INDEX IF NOT EXISTS idx_revisions_note ON note_revisions(note_id, id)
+        ''')
+        conn.execute('''
+            CREATE TRIGGER IF NOT EXISTS notes_revisions_ad AFTER DELETE ON notes BEGIN
+                DELETE FROM note_revisions WHERE note_id = old.id;
+            END
+        ''')
+    # Aucune donnée à reprendre
+    yield from ()
+
+def _migration_4(conn):
+    """Trigger de l'index plein texte : pas de réindexation si le contenu décodé est le même."""
+    with conn:
+        conn.execute("DROP TRIGGER IF EXISTS notes_fts_au")
+    conn.executescript(SQL_FTS_TRIGGERS)
+    # Aucune donnée à reprendre
+    yield from ()
+
+MIGRATIONS = [_migration_1, _migration_2, _migration_3, _migration_4]
+SCHEMA_VERSION = len(MIGRATIONS)
+
+# Historique : un instantané complet toutes les SNAPSHOT_EVERY révisions borne le nombre
+# de deltas à rejouer. L'auto-save crée une révision à chaque pause dans la frappe : plutôt
+# que de supprimer les plus anciennes (une longue séance effacerait la version d'avant une
+# erreur), l'historique est aminci avec l'âge. Tout est gardé pendant la première heure,
+# puis une seule révision par intervalle : (âge à partir duquel la règle s'applique, intervalle).
+SNAPSHOT_EVERY = 20
+MINUTE_MS = 60 * 1000
+HOUR_MS = 60 * MINUTE_MS
+DAY_MS = 24 * HOUR_MS
+REVISION_THINNING = [
+    (HOUR_MS, 10 * MINUTE_MS),
+    (DAY_MS, HOUR_MS),
+    (7 * DAY_MS, DAY_MS),
+]
+# Élagage explicite par nombre (prune_revisions)
+MAX_REVISIONS = 100
+
+def _timestamps():
+    """Horodatage courant : (texte affiché, millisecondes epoch)."""
+    now = datetime.datetime.now()
+    return now.strftime("%Y-%m-%d %H:%M"), int(now.timestamp() * 1000)
+
+def _format_ms(ms):
+    """Date affichée correspondant à un horodatage en millisecondes."""
+    return datetime.datetime.fromtimestamp(ms / 1000).strftime("%Y-%m-%d %H:%M")
+
+def revisions_to_keep(revisions, now_ms):
+    """Identifiants des révisions gardées par l'amincissement (REVISION_THINNING).
+
+    `revisions` : (id, created_ms) dans l'ordre. Dans chaque intervalle, la plus ancienne
+    révision est gardée : la première version d'une note reste toujours disponible.
+    """
+    keep = set()
+    seen = set()
+    for revision_id, created_ms in revisions:
+        age = now_ms - created_ms
+        rule = None
+        for index, (min_age, interval) in enumerate(REVISION_THINNING):
+            if age >= min_age:
+                rule = index
+        if rule is None:
+            keep.add(revision_id)
+            continue
+        bucket = (rule, created_ms // REVISION_THINNING[rule][1])
+        if bucket not in seen:
+            seen.add(bucket)
+            keep.add(revision_id)
+    return keep
+
+def fts_query(text):
+    """Transforme une saisie libre en requête FTS5 : chaque mot devient un préfixe, tous requis."""
+    words = re.findall(r"\w+", text)
+    return " ".join(f'"{word}"*' for word in words)
+
+class NoteManager:
+    def __init__(self, db_name="notes.db", lazy=False):
+        self.db_name = db_name
+        # Une connexion longue durée par thread (SQLite interdit le partage concurrent)
+        self._local = threading.local()
+        self._connections = []
+        self._lock = threading.Lock()
+        # Les écritures de tous les threads (sauvegardes, import, maintenance) passent
+        # l'une après l'autre plutôt que d'échouer sur le verrou SQLite.
+        self._write_lock = threading.RLock()
+        self._listeners = []
+        # lazy : la base n'est ouverte (et son schéma vérifié) qu'à la première requête
+        self._schema_ready = False
+        if not lazy:
+            self.init_db()
+
+    def add_listener(self, callback):
+        """Abonne `callback(kind, note_id, row)` aux modifications de notes.
+
+        `kind` vaut "inserted", "updated" ou "deleted" ; `row` est le tuple
+        (id, title, created_at, status, updated_ms) de la note, ou None après suppression.
+        Après un import en masse, un seul "reset" (id 0) signale que la liste est à recharger.
+        Le rappel est exécuté dans le thread qui a fait l'écriture, après le commit.
+        """
+        self._listeners.append(callback)
+
+    def remove_listener(self, callback):
+        if callback in self._listeners:
+            self._listeners.remove(callback)
+
+    def _notify(self, kind, note_id, row=None):
+        for callback in list(self._listeners):
+            callback(kind, note_id, row)
 
+    def _connect(self):
+        """Retourne la connexion du thread courant ; le schéma est vérifié au premier appel."""
+        if not self._schema_ready:
+            self.init_db()
+        return self._open()
+
+    def _open(self):
+        """Connexion du thread courant, créée et configurée au premier appel."""
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.db_name, check_same_thread=False, cached_statements=256)
+            # WAL : les lectures ne bloquent plus les écritures et chaque commit évite
+            # la réécriture du journal ; NORMAL reste sûr en WAL (pas de corruption).
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute("PRAGMA temp_store=MEMORY")
+            conn.execute("PRAGMA cache_size=-16000")
+            conn.create_function("note_text", 1, plain_text, deterministic=True)
+            conn.create_function("note_raw", 1, unpack_content, deterministic=True)
+            self._local.conn = conn
+            with self._lock:
+                self._connections.append(conn)
+        return conn
+
+    def close(self):
+        """Ferme toutes les connexions ouvertes (à appeler à la fermeture de l'application)."""
+        with self._lock:
+            connections, self._connections = self._connections, []
+            self._local = threading.local()
+        for conn in connections:
+            try:
+                conn.execute("PRAGMA optimize")
+                conn.close()
+            except sqlite3.Error:
+                pass
+
+    @tracing.traced("db.init_db")
+    def init_db(self):
+        """Met le schéma à jour en appliquant les migrations manquantes (une fois par instance)."""
+        for _ in self.migrate():
+            pass
+
+    def migrate(self):
+        """Générateur : applique les migrations manquantes, lot par lot.
+
+        Produit après chaque lot le nombre total de lignes traitées. Les écritures des
+        autres threads attendent la fin ; arrêté entre deux lots, il reprend au lancement
+        suivant. Ne produit rien si le schéma est déjà à jour.
+        """
+        with self._write_lock:
+            if self._schema_ready:
+                return
+            conn = self._open()
+            version = conn.execute("PRAGMA user_version").fetchone()[0]
+            done = 0
+            for number in range(version, SCHEMA_VERSION):
+                with tracing.span(f"db.migration_{number + 1}"):
+                    for count in MIGRATIONS[number](conn):
+                        done += count
+                        yield done
+                conn.execute(f"PRAGMA user_version = {number + 1}")
+            self._schema_ready = True
+
+    @tracing.traced("db.add_note")
     def add_note(self, title, content, status="En cours"):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-        cursor.execute('''
-            INSERT INTO notes (title, content, created_at, updated_at, status)
-            VALUES (?, ?, ?, ?, ?)
-        ''', (title, content, now, now, status))
-        conn.commit()
-        conn.close()
+        """Insère une note et retourne son identifiant."""
+        conn = self._connect()
+        now, now_ms = _timestamps()
+        with self._write_lock, conn:
+            cursor = conn.execute(SQL_INSERT_NOTE,
+                                  (title, pack_content(content), now, now, status, now_ms, now_ms))
+            note_id = cursor.lastrowid
+            self._record_revision(conn, note_id, title, content, status, now_ms, None)
+        self._notify("inserted", note_id, (note_id, title, now, status, now_ms))
+        return note_id
 
+    @tracing.traced("db.update_note")
     def update_note(self, note_id, title, content, status):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        now = datetime.datetime.now().strftime("%Y-%m-%d %H:%M")
-        cursor.execute('''
-            UPDATE notes 
-            SET title = ?, content = ?, updated_at = ?, status = ?
-            WHERE id = ?
-        ''', (title, content, now, status, note_id))
-        conn.commit()
-        conn.close()
+        conn = self._connect()
+        now, now_ms = _timestamps()
+        with self._write_lock, conn:
+            old = conn.execute(SQL_NOTE_FOR_UPDATE, (note_id,)).fetchone()
+            cursor = conn.execute(SQL_UPDATE_NOTE,
+                                  (title, pack_content(content), now, status, now_ms, note_id))
+            if old is not None:
+                old_title, old_content, old_status, old_ms = old
+                old_content = unpack_content(old_content)
+                if (old_title, old_content, old_status) != (title, content, status):
+                    if conn.execute(SQL_LAST_REVISION, (note_id,)).fetchone() is None:
+                        # Note sans historique (antérieure aux révisions ou importée) : la version
+                        # remplacée est d'abord enregistrée, sinon elle serait perdue
+                        self._record_revision(conn, note_id, old_title, old_content, old_status,
+                                              min(old_ms or now_ms, now_ms), None)
+                    self._record_revision(conn, note_id, title, content, status, now_ms, old_content)
+        if cursor.rowcount and self._listeners:
+            self._notify("updated", note_id, conn.execute(SQL_NOTE_ROW, (note_id,)).fetchone())
 
+    @tracing.traced("db.delete_note")
     def delete_note(self, note_id):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute('DELETE FROM notes WHERE id = ?', (note_id,))
-        conn.commit()
-        conn.close()
-
-    def get_all_notes(self):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute('SELECT id, title, created_at, status FROM notes ORDER BY updated_at DESC')
-        notes = cursor.fetchall()
-        conn.close()
-        return notes
+        conn = self._connect()
+        with self._write_lock, conn:
+            cursor = conn.execute(SQL_DELETE_NOTE, (note_id,))
+        if cursor.rowcount:
+            self._notify("deleted", note_id)
+
+    @tracing.traced("db.get_notes_page")
+    def get_notes_page(self, after=None, limit=200, status=None):
+        """Page de la liste, des plus récentes aux plus anciennes.
 
+        `after` est la clé (updated_ms, id) de la dernière ligne de la page précédente,
+        `status` restreint éventuellement la liste à un statut.
+        Retourne des tuples (id, title, created_at, status, updated_ms).
+        """
+        conn = self._connect()
+        if status is not None:
+            if after is None:
+                return conn.execute(SQL_FIRST_PAGE_STATUS, (status, limit)).fetchall()
+            return conn.execute(SQL_NEXT_PAGE_STATUS, (status, *after, limit)).fetchall()
+        if after is None:
+            return conn.execute(SQL_FIRST_PAGE, (limit,)).fetchall()
+        return conn.execute(SQL_NEXT_PAGE, (*after, limit)).fetchall()
+
+    @tracing.traced("db.count_notes")
+    def count_notes(self):
+        return self._connect().execute(SQL_COUNT_NOTES).fetchone()[0]
+
+    def iter_notes(self, batch=500):
+        """Parcourt toutes les notes par lots, en mémoire constante.
+
+        Produit des tuples (id, title, content, status, created_ms, updated_ms),
+        contenu décodé.
+        """
+        conn = self._connect()
+        after_id = 0
+        while True:
+            # Générateur : un span par lot lu, le parcours complet dépend de l'appelant
+            with tracing.span("db.iter_notes"):
+                rows = conn.execute(SQL_ITER_NOTES, (after_id, batch)).fetchall()
+            if not rows:
+                return
+            for note_id, title, content, status, created_ms, updated_ms in rows:
+                yield note_id, title, unpack_content(content), status, created_ms, updated_ms
+            after_id = rows[-1][0]
+
+    @tracing.traced("db.add_notes_bulk")
+    def add_notes_bulk(self, records, batch=1000, progress=None):
+        """Insère en masse des notes (title, content, status, created_ms, updated_ms).
+
+        `records` peut être un générateur : il est consommé par lots insérés avec
+        executemany, le tout dans une seule transaction. `progress(n)` est appelé après
+        chaque lot ; une exception levée par `progress` annule tout l'import.
+        Retourne le nombre de notes insérées.
+        """
+        conn = self._connect()
+        records = iter(records)
+        total = 0
+        with self._write_lock, conn:
+            while True:
+                chunk = list(itertools.islice(records, batch))
+                if not chunk:
+                    break
+                rows = []
+                now_ms = _timestamps()[1]
+                for title, content, status, created_ms, updated_ms in chunk:
+                    created_ms = created_ms or now_ms
+                    updated_ms = updated_ms or created_ms
+                    rows.append((title, pack_content(content),
+                                 _format_ms(created_ms), _format_ms(updated_ms),
+                                 status or "En cours", created_ms, updated_ms))
+                conn.executemany(SQL_INSERT_NOTE, rows)
+                total += len(rows)
+                if progress:
+                    progress(total)
+        if total:
+            self._notify("reset", 0)
+        return total
+
+    @tracing.traced("db.get_note_content")
     def get_note_content(self, note_id):
-        conn = sqlite3.connect(self.db_name)
-        cursor = conn.cursor()
-        cursor.execute('SELECT title, content, status FROM notes WHERE id = ?', (note_id,))
-        note = cursor.fetchone()
-        conn.close()
-        return note
+        conn = self._connect()
+        note = conn.execute(SQL_NOTE_CONTENT, (note_id,)).fetchone()
+        if note is None:
+            return None
+        title, content, status = note
+        return title, unpack_content(content), status
+
+    @tracing.traced("db.get_note_for_edit")
+    def get_note_for_edit(self, note_id):
+        """(title, content, status, updated_ms) : le contenu et la version lus ensemble."""
+        conn = self._connect()
+        note = conn.execute(SQL_NOTE_FOR_EDIT, (note_id,)).fetchone()
+        if note is None:
+            return None
+        title, content, status, updated_ms = note
+        return title, unpack_content(content), status, updated_ms
+
+    @tracing.traced("db.get_note_stamp")
+    def get_note_stamp(self, note_id):
+        """Version (updated_ms) d'une note, ou None si elle n'existe pas."""
+        row = self._connect().execute(SQL_NOTE_STAMP, (note_id,)).fetchone()
+        return row[0] if row else None
+
+    def compress_legacy_rows(self, batch=200):
+        """Générateur : compresse les anciennes notes stockées en texte brut.
+
+        Chaque itération traite un lot dans sa propre transaction et produit le nombre
+        de notes converties, ce qui permet d'interrompre la passe entre deux lots.
+        """
+        conn = self._connect()
+        after_id = 0
+        while True:
+            with tracing.span("db.compress_legacy_rows"):
+                rows = conn.execute(SQL_LEGACY_CONTENT, (after_id, batch)).fetchall()
+                if not rows:
+                    return
+                with self._write_lock, conn:
+                    conn.executemany(SQL_SET_CONTENT,
+                                     [(pack_content(content), note_id) for note_id, content in rows])
+            after_id = rows[-1][0]
+            yield len(rows)
+
+    @tracing.traced("db.search")
+    def search(self, query, limit=50):
+        """Recherche plein texte, résultats triés par pertinence.
+
+        Retourne des tuples (id, title, created_at, status, snippet).
+        """
+        match = fts_query(query)
+        if not match:
+            return []
+        conn = self._connect()
+        return conn.execute(SQL_SEARCH, (match, limit)).fetchall()
+
+    # --- Révisions ---
+
+    def _record_revision(self, conn, note_id, title, content, status, now_ms, previous):
+        """Ajoute une révision dans la transaction en cours.
+
+        `previous` est le contenu de la version précédente : la révision est stockée comme
+        un delta par rapport à lui, sauf s'il faut un nouvel instantané complet.
+        """
+        content = content or ""
+        last = conn.execute(SQL_LAST_REVISION, (note_id,)).fetchone()
+        if previous is None or last is None or last[1] + 1 >= SNAPSHOT_EVERY:
+            kind, depth, data = "full", 0, content
+        else:
+            kind, depth, data = "delta", last[1] + 1, encode_json(make_delta(previous, content))
+        conn.execute(SQL_INSERT_REVISION,
+                     (note_id, now_ms, title, status, kind, depth, pack_content(data)))
+
+        # Amincissement à chaque nouvel instantané complet, pas à chaque sauvegarde
+        if kind == "full" and last is not None:
+            self._thin_revisions(conn, note_id, now_ms)
+
+    def _thin_revisions(self, conn, note_id, now_ms):
+        """Supprime les révisions que l'amincissement ne garde pas, en réparant la chaîne."""
+        revisions = conn.execute(SQL_REVISION_TIMES, (note_id,)).fetchall()
+        keep = revisions_to_keep(revisions, now_ms)
+        dropped = [revision_id for revision_id, _ in revisions if revision_id not in keep]
+        if not dropped:
+            return
+        last_dropped = dropped[-1]
+        dropped = set(dropped)
+        chain = conn.execute(SQL_REVISIONS_FROM_SNAPSHOT,
+                             (note_id, note_id, min(dropped))).fetchall()
+        if not chain:
+            # Chaîne cassée (aucun instantané avant la zone à amincir) : rien n'est supprimé
+            return
+        content = ""
+        kept_content = None     # contenu de la dernière révision gardée
+        depth = 0
+        predecessor_dropped = False
+        for revision_id, kind, old_depth, data in chain:
+            if revision_id > last_dropped and not predecessor_dropped:
+                # Au-delà des suppressions, les deltas restent valables : seule la
+                # profondeur change, jusqu'au prochain instantané
+                if kind == "full":
+                    break
+                depth += 1
+                if depth != old_depth:
+                    conn.execute("UPDATE note_revisions SET depth = ? WHERE id = ?", (depth, revision_id))
+                continue
+            data = unpack_content(data)
+            content = data if kind == "full" else apply_delta(content, json.loads(data))
+            if revision_id in dropped:
+                predecessor_dropped = True
+                continue
+            if kind == "full":
+                depth = 0
+            elif predecessor_dropped:
+                # Le delta portait sur une révision supprimée : recalculé sur la précédente gardée
+                if kept_content is None or depth + 1 >= SNAPSHOT_EVERY:
+                    kind, depth, data = "full", 0, content
+                else:
+                    depth += 1
+                    data = encode_json(make_delta(kept_content, content))
+                conn.execute("UPDATE note_revisions SET kind = ?, depth = ?, data = ? WHERE id = ?",
+                             (kind, depth, pack_content(data), revision_id))
+            else:
+                depth += 1
+                if depth != old_depth:
+                    conn.execute("UPDATE note_revisions SET depth = ? WHERE id = ?", (depth, revision_id))
+            kept_content = content
+            predecessor_dropped = False
+        conn.executemany("DELETE FROM note_revisions WHERE id = ?", [(i,) for i in sorted(dropped)])
+
+    def _prune_revisions(self, conn, note_id, keep):
+        oldest = conn.execute(SQL_OLDEST_KEPT_REVISION, (note_id, keep - 1)).fetchone()
+        if oldest is None:
+            return
+        oldest_id = oldest[0]
+        # La plus ancienne révision conservée devient un instantané complet
+        revision = self._revision_content(conn, note_id, oldest_id)
+        if revision is None:
+            # Chaîne cassée : impossible de la reconstruire, on n'élague pas
+            return
+        title, content, status = revision
+        conn.execute("UPDATE note_revisions SET kind = 'full', depth = 0, data = ? WHERE id = ?",
+                     (pack_content(content), oldest_id))
+        conn.execute("DELETE FROM note_revisions WHERE note_id = ? AND id < ?", (note_id, oldest_id))
+
+    def _revision_content(self, conn, note_id, revision_id):
+        chain = conn.execute(SQL_REVISION_CHAIN,
+                             (note_id, revision_id, note_id, revision_id)).fetchall()
+        if not chain or chain[-1][0] != revision_id:
+            return None
+        content = ""
+        for _, title, status, kind, data in chain:
+            data = unpack_content(data)
+            content = data if kind == "full" else apply_delta(content, json.loads(data))
+        return title, content, status
+
+    @tracing.traced("db.list_revisions")
+    def list_revisions(self, note_id, limit=50):
+        """Révisions d'une note, de la plus récente à la plus ancienne.
+
+        Retourne des tuples (revision_id, created_ms, title, status, kind).
+        """
+        conn = self._connect()
+        return conn.execute(SQL_LIST_REVISIONS, (note_id, limit)).fetchall()
+
+    @tracing.traced("db.get_revision")
+    def get_revision(self, note_id, revision_id):
+        """Reconstruit une révision : (title, content, status), ou None si elle n'existe pas."""
+        return self._revision_content(self._connect(), note_id, revision_id)
+
+    @tracing.traced("db.restore_revision")
+    def restore_revision(self, note_id, revision_id):
+        """Remet une note dans l'état d'une révision (ce qui crée une nouvelle révision)."""
+        revision = self.get_revision(note_id, revision_id)
+        if revision is None:
+            return False
+        title, content, status = revision
+        self.update_note(note_id, title, content, status)
+        return True
+
+    @tracing.traced("db.prune_revisions")
+    def prune_revisions(self, note_id, keep=MAX_REVISIONS):
+        """Ne garde que les `keep` révisions les plus récentes d'une note."""
+        conn = self._connect()
+        with self._write_lock, conn:
+            self._prune_revisions(conn, note_id, keep)
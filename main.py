@@ -1,19 +1,18 @@
 import sys
+import tracing
 from PyQt6.QtWidgets import QApplication
 from ui.mainwindow import MainWindow
-from PyQt6.QtCore import QFile, QTextStream
 
 def main():
-    app = QApplication(sys.argv)
+    # --trace FICHIER (ou NOTEBLOCK_TRACE) active les mesures, voir tracing.py
+    argv = tracing.configure(sys.argv)
+    with tracing.span("main.startup"):
+        app = QApplication(argv)
+
+        # style/theme.qss est fusionné à la feuille de chaque thème (voir ui/themes.py)
+        window = MainWindow()
+        window.show()
 
-    style_file = QFile("style/theme.qss")
-    if style_file.open(QFile.OpenModeFlag.ReadOnly | QFile.OpenModeFlag.Text):
-        stream = QTextStream(style_file)
-        app.setStyleSheet(stream.readAll())
-    
-    window = MainWindow()
-    window.show()
-    
     sys.exit(app.exec())
 
 if __name__ == "__main__":
@@ -0,0 +1,335 @@
+import difflib
+import html
+import json
+import re
+import zlib
+from html.parser import HTMLParser
+
+# --- Stockage compressé ---
+# Le contenu est stocké en BLOB préfixé d'un octet indiquant le codec ; les anciennes
+# lignes restent des chaînes TEXT non compressées et se lisent telles quelles.
+CODEC_RAW = b"r"
+CODEC_ZLIB = b"z"
+COMPRESS_LEVEL = 6
+
+def pack_content(text):
+    """Encode un contenu de note pour le stockage (compressé quand c'est rentable)."""
+    if text is None:
+        return None
+    raw = text.encode("utf-8")
+    packed = zlib.compress(raw, COMPRESS_LEVEL)
+    if len(packed) < len(raw):
+        return CODEC_ZLIB + packed
+    return CODEC_RAW + raw
+
+def unpack_content(value):
+    """Décode un contenu stocké, compressé ou non."""
+    if not isinstance(value, bytes):
+        return value
+    codec, payload = value[:1], value[1:]
+    if codec == CODEC_ZLIB:
+        payload = zlib.decompress(payload)
+    elif codec != CODEC_RAW:
+        raise ValueError(f"Codec de contenu inconnu : {codec!r}")
+    return payload.decode("utf-8")
+
+# --- Format compact ---
+# Remplace la sortie de toHtml() : une ligne d'en-tête puis un bloc (paragraphe) par
+# ligne, encodé en JSON, ce qui rend les versions d'une note comparables ligne à ligne.
+#   bloc : [liste, run, run, ...]
+#   liste : 0 hors liste, sinon [style, indentation, numéro de la liste dans le document]
+#   run : [texte, attributs, couleur, surlignage, extra], valeurs par défaut omises en fin de run
+#   extra : {"href": lien, "font": [familles], "size": points, "px": pixels,
+#            "valign": 1 exposant / 2 indice}
+# Il couvre ce que propose l'éditeur (gras, italique, souligné, couleurs, listes) et ce
+# qu'apporte d'ordinaire un texte collé (liens, barré, polices). Un document qui va
+# au-delà (tableau, image, titre, alignement...) reste enregistré en HTML.
+COMPACT_HEADER = "NB1"
+FLAG_BOLD = 1
+FLAG_ITALIC = 2
+FLAG_UNDERLINE = 4
+FLAG_STRIKE = 8
+
+encode_json = json.JSONEncoder(ensure_ascii=False, separators=(",", ":")).encode
+
+def is_compact(content):
+    return content.startswith(COMPACT_HEADER) and content[len(COMPACT_HEADER):len(COMPACT_HEADER) + 1] in ("", "\n")
+
+def dump_compact(blocks):
+    """Sérialise une liste de blocs au format compact."""
+    return "\n".join([COMPACT_HEADER] + [encode_json(block) for block in blocks])
+
+def compact_lines(content):
+    """Lignes JSON des blocs d'un contenu compact (sans l'en-tête)."""
+    return content.split("\n")[1:]
+
+def parse_compact(content):
+    """Relit un contenu au format compact en liste de blocs."""
+    return [json.loads(line) for line in compact_lines(content)]
+
+def compact_to_text(content):
+    return "\n".join("".join(run[0] for run in block[1:]) for block in parse_compact(content))
+
+# --- Deltas ligne à ligne ---
+# Une révision est stockée comme la liste des opérations qui transforment la version
+# précédente en la suivante : ["=", n] garde n lignes, ["-", n] en supprime n,
+# ["+", [lignes]] en insère. Le format compact ayant un bloc par ligne, une modification
+# locale ne produit qu'un delta de quelques lignes.
+
+def make_delta(old, new):
+    """Calcule le delta (liste d'opérations) de `old` vers `new`."""
+    a = old.split("\n")
+    b = new.split("\n")
+    # Préfixe et suffixe communs retirés d'abord : le diff ne porte que sur la zone modifiée
+    start = 0
+    limit = min(len(a), len(b))
+    while start < limit and a[start] == b[start]:
+        start += 1
+    end = 0
+    while end < limit - start and a[-1 - end] == b[-1 - end]:
+        end += 1
+
+    ops = []
+    if start:
+        ops.append(["=", start])
+    matcher = difflib.SequenceMatcher(None, a[start:len(a) - end], b[start:len(b) - end], autojunk=False)
+    for tag, i1, i2, j1, j2 in matcher.get_opcodes():
+        if tag == "equal":
+            ops.append(["=", i2 - i1])
+            continue
+        if i2 > i1:
+            ops.append(["-", i2 - i1])
+        if j2 > j1:
+            ops.append(["+", b[start + j1:start + j2]])
+    if end:
+        ops.append(["=", end])
+    return ops
+
+def apply_delta(old, ops):
+    """Reconstruit la version suivante à partir de `old` et d'un delta."""
+    a = old.split("\n")
+    out = []
+    position = 0
+    for op, value in ops:
+        if op == "=":
+            out.extend(a[position:position + value])
+            position += value
+        elif op == "-":
+            position += value
+        else:
+            out.extend(value)
+    return "\n".join(out)
+
+# Balises qui terminent une ligne de texte
+BLOCK_TAGS = {"p", "div", "br", "li", "tr", "h1", "h2", "h3", "h4", "h5", "h6", "pre"}
+# Balises dont le contenu n'est pas du texte affiché
+SKIP_TAGS = {"head", "style", "script", "title"}
+
+class _TextExtractor(HTMLParser):
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.parts = []
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        if tag in SKIP_TAGS:
+            self._skip += 1
+        elif tag in BLOCK_TAGS:
+            self.parts.append("\n")
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TAGS:
+            self._skip = max(0, self._skip - 1)
+
+    def handle_data(self, data):
+        if not self._skip:
+            self.parts.append(data)
+
+def html_to_text(html):
+    """Extrait le texte brut d'un document HTML (sans balises ni feuille de style)."""
+    parser = _TextExtractor()
+    parser.feed(html)
+    parser.close()
+    text = "".join(parser.parts)
+    return re.sub(r"\n\s*\n+", "\n", text).strip()
+
+def plain_text(content):
+    """Texte brut d'un contenu de note stocké, quel que soit son format."""
+    content = unpack_content(content)
+    if not content:
+        return ""
+    if is_compact(content):
+        return compact_to_text(content)
+    if "<" not in content:
+        return content
+    return html_to_text(content)
+
+# --- Conversions pour l'import / export ---
+
+HTML_LIST_TAGS = {
+    "disc": ("ul", ' style="list-style-type: disc"'),
+    "circle": ("ul", ' style="list-style-type: circle"'),
+    "square": ("ul", ' style="list-style-type: square"'),
+    "decimal": ("ol", ""),
+    "lower-alpha": ("ol", ' type="a"'),
+    "upper-alpha": ("ol", ' type="A"'),
+    "lower-roman": ("ol", ' type="i"'),
+    "upper-roman": ("ol", ' type="I"'),
+}
+
+def _html_run(run):
+    text = html.escape(run[0]).replace("\u2028", "<br>")
+    flags = run[1] if len(run) > 1 else 0
+    if flags & FLAG_BOLD:
+        text = f"<b>{text}</b>"
+    if flags & FLAG_ITALIC:
+        text = f"<i>{text}</i>"
+    if flags & FLAG_UNDERLINE:
+        text = f"<u>{text}</u>"
+    if flags & FLAG_STRIKE:
+        text = f"<s>{text}</s>"
+    extra = run[4] if len(run) > 4 else {}
+    if extra.get("valign") == 1:
+        text = f"<sup>{text}</sup>"
+    elif extra.get("valign") == 2:
+        text = f"<sub>{text}</sub>"
+    styles = []
+    if len(run) > 2 and run[2]:
+        styles.append(f"color: {run[2]}")
+    if len(run) > 3 and run[3]:
+        styles.append(f"background-color: {run[3]}")
+    if "font" in extra:
+        styles.append("font-family: " + ", ".join(f"'{family}'" for family in extra["font"]))
+    if "size" in extra:
+        styles.append(f"font-size: {extra['size']:g}pt")
+    if "px" in extra:
+        styles.append(f"font-size: {extra['px']}px")
+    if styles:
+        text = f'<span style="{html.escape("; ".join(styles))}">{text}</span>'
+    if "href" in extra:
+        text = f'<a href="{html.escape(extra["href"])}">{text}</a>'
+    return text
+
+def compact_to_html(content, title=""):
+    """Document HTML autonome équivalent à un contenu compact."""
+    out = ['<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+           f"<title>{html.escape(title)}</title></head><body>"]
+    opened = []  # pile des listes ouvertes : (numéro, balise)
+    for block in parse_compact(content):
+        list_info = block[0]
+        depth = list_info[1] if list_info else 0
+        while opened and (len(opened) > depth or (len(opened) == depth and opened[-1][0] != list_info[2])):
+            out.append(f"</{opened.pop()[1]}>")
+        if list_info:
+            while len(opened) < depth:
+                tag, attributes = HTML_LIST_TAGS.get(list_info[0], HTML_LIST_TAGS["disc"])
+                out.append(f"<{tag}{attributes}>")
+                opened.append((list_info[2], tag))
+            out.append("<li>" + "".join(_html_run(run) for run in block[1:]) + "</li>")
+        else:
+            out.append("<p>" + "".join(_html_run(run) for run in block[1:]) + "</p>")
+    while opened:
+        out.append(f"</{opened.pop()[1]}>")
+    out.append("</body></html>\n")
+    return "\n".join(out)
+
+_MD_ESCAPE = re.compile(r"([\\`*_~\[\]#])")
+
+def _markdown_run(run):
+    text = _MD_ESCAPE.sub(r"\\\1", run[0])
+    flags = run[1] if len(run) > 1 else 0
+    stripped = text.strip()
+    if not stripped:
+        return text
+    # Les marqueurs doivent coller au texte : les espaces de bord restent à l'extérieur
+    lead = text[:len(text) - len(text.lstrip())]
+    trail = text[len(text.rstrip()):]
+    if flags & FLAG_ITALIC:
+        stripped = f"*{stripped}*"
+    if flags & FLAG_BOLD:
+        stripped = f"**{stripped}**"
+    if flags & FLAG_STRIKE:
+        stripped = f"~~{stripped}~~"
+    href = run[4].get("href") if len(run) > 4 else None
+    if href:
+        stripped = f"[{stripped}](<{href}>)"
+    return lead + stripped + trail
+
+def compact_to_markdown(content):
+    """Markdown équivalent à un contenu compact (couleurs, polices et soulignement perdus)."""
+    lines = []
+    counters = {}
+    for block in parse_compact(content):
+        text = "".join(_markdown_run(run) for run in block[1:])
+        list_info = block[0]
+        if not list_info:
+            lines.append(text)
+            continue
+        style, indent, number = list_info
+        prefix = "  " * max(0, indent - 1)
+        if HTML_LIST_TAGS.get(style, ("ul",))[0] == "ol":
+            counters[number] = counters.get(number, 0) + 1
+            lines.append(f"{prefix}{counters[number]}. {text}")
+        else:
+            lines.append(f"{prefix}- {text}")
+    return "\n".join(lines) + "\n"
+
+_MD_LIST_ITEM = re.compile(r"^( *)([-*+]|\d+[.)])\s+(.*)$")
+_MD_INLINE = re.compile(r"(?<!\\)\*\*(.+?)(?<!\\)\*\*|(?<!\\)__(.+?)(?<!\\)__"
+                        r"|(?<!\\)\*(.+?)(?<!\\)\*|(?<!\\)_(.+?)(?<!\\)_")
+
+def _markdown_runs(text):
+    runs = []
+    position = 0
+    for match in _MD_INLINE.finditer(text):
+        if match.start() > position:
+            runs.append([text[position:match.start()]])
+        bold_text = match.group(1) or match.group(2)
+        if bold_text is not None:
+            runs.append([bold_text, FLAG_BOLD])
+        else:
+            runs.append([match.group(3) or match.group(4), FLAG_ITALIC])
+        position = match.end()
+    if position < len(text):
+        runs.append([text[position:]])
+    for run in runs:
+        run[0] = re.sub(r"\\([\\`*_~\[\]#])", r"\1", run[0])
+    return runs
+
+def text_to_compact(text):
+    """Convertit un texte brut au format compact : un paragraphe par ligne, texte littéral."""
+    return dump_compact([[0, [line]] if line else [0] for line in text.splitlines()])
+
+def markdown_to_compact(text):
+    """Convertit un Markdown simple (paragraphes, listes, gras, italique) au format compact.
+
+    Retourne (titre, contenu) : le premier titre `# ...` sert de titre de note.
+    """
+    title = None
+    blocks = []
+    lists = {}      # niveau d'indentation -> (numéro de liste, style)
+    list_count = 0
+    for line in text.splitlines():
+        if title is None and line.startswith("# "):
+            title = line[2:].strip()
+            continue
+        item = _MD_LIST_ITEM.match(line)
+        if item:
+            spaces, marker, body = item.groups()
+            indent = len(spaces) // 2 + 1
+            style = "disc" if marker in "-*+" else "decimal"
+            for level in [level for level in lists if level > indent]:
+                del lists[level]
+            current = lists.get(indent)
+            if current is None or current[1] != style:
+                current = lists[indent] = (list_count, style)
+                list_count += 1
+            blocks.append([[style, indent, current[0]], *_markdown_runs(body)])
+        else:
+            lists.clear()
+            stripped = line.lstrip("#").strip() if line.startswith("#") else line
+            blocks.append([0, *_markdown_runs(stripped)] if stripped else [0])
+    # Lignes vides entre le titre et le corps
+    while blocks and blocks[0] == [0]:
+        blocks.pop(0)
+    return title, dump_compact(blocks)
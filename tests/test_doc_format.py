@@ -0,0 +1,75 @@
+"""Sérialisation des documents Qt au format compact (plateforme offscreen)."""
+import os
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+import pytest
+from PyQt6.QtWidgets import QApplication
+from PyQt6.QtGui import QTextDocument
+
+from note_format import dump_compact, parse_compact, is_compact, FLAG_BOLD, FLAG_ITALIC, FLAG_STRIKE
+from ui.doc_format import encode_document, decode_into
+from test_note_format import BLOCKS
+
+@pytest.fixture(scope="module", autouse=True)
+def app():
+    return QApplication.instance() or QApplication([])
+
+def fresh_encode(doc):
+    """Encode sans le cache des blocs amorcé au décodage."""
+    block = doc.begin()
+    while block.isValid():
+        block.setUserData(None)
+        block = block.next()
+    return encode_document(doc)
+
+def test_decode_encode_round_trip():
+    content = dump_compact(BLOCKS)
+    doc = QTextDocument()
+    decode_into(doc, content)
+    # Avec le cache amorcé, puis en réencodant chaque bloc
+    assert encode_document(doc) == content
+    assert parse_compact(fresh_encode(doc)) == BLOCKS
+
+def test_edit_invalidates_cached_block():
+    content = dump_compact([[0, ["un"]], [0, ["deux"]]])
+    doc = QTextDocument()
+    # Comme dans l'éditeur : sans mise en page, Qt n'émet pas contentsChange
+    doc.documentLayout()
+    decode_into(doc, content)
+    cursor = doc.find("deux")
+    cursor.insertText("trois")
+    assert parse_compact(encode_document(doc)) == [[0, ["un"]], [0, ["trois"]]]
+
+def test_legacy_html_keeps_links_and_fonts():
+    doc = QTextDocument()
+    # Paragraphe tel que l'écrivait toHtml() (marges nulles)
+    doc.setHtml('<p style="margin-top:0px; margin-bottom:0px;"><b>gras</b> <i>italique</i> <s>barré</s> '
+                '<a href="https://example.org">lien</a> <sup>2</sup> '
+                '<span style="font-size:20pt">grand</span></p>')
+    content = fresh_encode(doc)
+    assert is_compact(content)
+    (block,) = parse_compact(content)
+    runs = {run[0]: run[1:] for run in block[1:]}
+    assert runs["gras"][0] == FLAG_BOLD
+    assert runs["italique"][0] == FLAG_ITALIC
+    assert runs["barré"][0] == FLAG_STRIKE
+    assert runs["lien"][3]["href"] == "https://example.org"
+    assert runs["2"][3] == {"valign": 1}
+    assert runs["grand"][3] == {"size": 20}
+
+@pytest.mark.parametrize("html", [
+    "<h2>Titre</h2><p>texte</p>",
+    '<p align="center">centré</p>',
+    "<table><tr><td>cellule</td></tr></table>",
+    '<p><img src="image.png"></p>',
+    '<p><span style="font-weight:600">demi-gras</span></p>',
+])
+def test_unsupported_formatting_falls_back_to_html(html):
+    doc = QTextDocument()
+    doc.setHtml(html)
+    content = encode_document(doc)
+    assert not is_compact(content)
+    # Le HTML enregistré relit le même document
+    reread = QTextDocument()
+    reread.setHtml(content)
+    assert reread.toHtml() == content
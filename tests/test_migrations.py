@@ -0,0 +1,97 @@
+"""Migrations du schéma : reprise des horodatages, index plein texte, trigger de réindexation."""
+import sqlite3
+import time
+
+import pytest
+
+import database
+from database import NoteManager, SCHEMA_VERSION
+
+LEGACY_NOTES = [
+    ("Courses", "<html><body><p>Acheter du pain</p></body></html>", "2024-01-02 10:00", "2024-01-03 11:30"),
+    ("Réunion", "Ordre du jour : budget", "2023-12-31 23:59", "2024-02-29 08:15"),
+    ("Sans date", "<p>Brouillon</p>", None, None),
+]
+
+def local_ms(text):
+    """Millisecondes d'une ancienne date texte (heure locale, à la minute)."""
+    return int(time.mktime(time.strptime(text, "%Y-%m-%d %H:%M"))) * 1000
+
+@pytest.fixture
+def legacy_path(tmp_path):
+    """Base créée par une version sans migrations (user_version 0, dates en texte)."""
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE notes (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, content TEXT,
+                            created_at TEXT, updated_at TEXT, status TEXT DEFAULT 'En cours')
+    ''')
+    conn.executemany("INSERT INTO notes (title, content, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                     LEGACY_NOTES)
+    conn.commit()
+    conn.close()
+    return path
+
+def test_legacy_database_is_migrated(legacy_path):
+    db = NoteManager(legacy_path)
+    conn = db._connect()
+    assert conn.execute("PRAGMA user_version").fetchone()[0] == SCHEMA_VERSION
+    rows = conn.execute("SELECT title, created_ms, updated_ms FROM notes ORDER BY id").fetchall()
+    expected = [(title, local_ms(created) if created else 0, local_ms(updated) if updated else 0)
+                for title, _, created, updated in LEGACY_NOTES]
+    assert rows == expected
+    # Notes indexées par la reprise, sur le texte et non sur le HTML
+    assert [row[1] for row in db.search("pain")] == ["Courses"]
+    assert [row[1] for row in db.search("budget")] == ["Réunion"]
+    assert db.search("body") == []
+    db.close()
+
+def test_interrupted_migration_resumes(legacy_path, monkeypatch):
+    monkeypatch.setattr(database, "BACKFILL_BATCH", 1)
+    monkeypatch.setattr(database, "FTS_BACKFILL_BATCH", 1)
+    db = NoteManager(legacy_path, lazy=True)
+    steps = db.migrate()
+    for _ in range(4):
+        next(steps)
+    steps.close()
+    db.close()
+
+    conn = sqlite3.connect(legacy_path)
+    assert conn.execute("PRAGMA user_version").fetchone()[0] < SCHEMA_VERSION
+    conn.close()
+    db = NoteManager(legacy_path)
+    conn = db._connect()
+    assert conn.execute("SELECT count(*) FROM notes WHERE updated_ms IS NULL").fetchone()[0] == 0
+    assert conn.execute("SELECT count(*) FROM notes_fts").fetchone()[0] == len(LEGACY_NOTES)
+    assert [row[1] for row in db.search("brouillon")] == ["Sans date"]
+    db.close()
+
+def test_migrations_are_idempotent(legacy_path):
+    NoteManager(legacy_path).close()
+    db = NoteManager(legacy_path)
+    assert list(db.migrate()) == []
+    assert db.count_notes() == len(LEGACY_NOTES)
+    db.close()
+
+def test_compression_does_not_reindex(legacy_path):
+    db = NoteManager(legacy_path)
+    conn = db._connect()
+    calls = []
+
+    def counting_note_text(content):
+        calls.append(content)
+        return database.plain_text(content)
+    conn.create_function("note_text", 1, counting_note_text, deterministic=True)
+
+    # Anciennes lignes en TEXT réécrites compressées : même contenu décodé
+    assert sum(db.compress_legacy_rows()) == len(LEGACY_NOTES)
+    assert calls == []
+    assert all(isinstance(row[0], bytes) for row in conn.execute("SELECT content FROM notes"))
+    assert [row[1] for row in db.search("pain")] == ["Courses"]
+
+    # Un vrai changement de contenu, lui, réindexe
+    db.update_note(1, "Courses", "<p>Acheter des pommes</p>", "En cours")
+    assert calls
+    assert db.search("pain") == []
+    assert [row[1] for row in db.search("pommes")] == ["Courses"]
+    db.close()
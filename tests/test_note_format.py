@@ -0,0 +1,83 @@
+"""Format des notes : stockage compressé, format compact et conversions."""
+import zlib
+
+import pytest
+
+from note_format import (pack_content, unpack_content, CODEC_RAW, CODEC_ZLIB,
+                         dump_compact, parse_compact, is_compact, compact_to_text,
+                         compact_to_markdown, markdown_to_compact,
+                         FLAG_BOLD, FLAG_ITALIC, FLAG_UNDERLINE, FLAG_STRIKE)
+
+# Blocs couvrant tout le format : runs mis en forme, couleurs, attributs étendus,
+# paragraphe vide, listes imbriquées
+BLOCKS = [
+    [0, ["Texte "], ["gras", FLAG_BOLD], [" rouge", 0, "#ff0000"],
+     [" surligné", FLAG_ITALIC | FLAG_UNDERLINE, None, "#ffff00"]],
+    [0],
+    [["disc", 1, 0], ["un"]],
+    [["disc", 1, 0], ["deux", FLAG_STRIKE]],
+    [["decimal", 2, 1], ["lien", 0, None, None, {"href": "https://example.org/?a=1&b=2"}]],
+    [0, ["grand", 0, None, None, {"size": 18}], ["exposant", 0, None, None, {"valign": 1}],
+     ["mono", 0, None, None, {"font": ["Courier New"]}]],
+    [0, ["guillemets \"\" et barre \\ \u00e9"]],
+]
+
+@pytest.mark.parametrize("text", [
+    "",
+    "court",
+    "é€😀 accents et emoji",
+    "<p>Paragraphe répété</p>\n" * 500,
+])
+def test_pack_round_trip(text):
+    packed = pack_content(text)
+    assert isinstance(packed, bytes)
+    assert unpack_content(packed) == text
+
+def test_pack_compresses_only_when_smaller():
+    assert pack_content("abc") == CODEC_RAW + b"abc"
+    long_text = "ligne\n" * 1000
+    packed = pack_content(long_text)
+    assert packed[:1] == CODEC_ZLIB
+    assert len(packed) < len(long_text)
+
+def test_unpack_passes_legacy_values_through():
+    # Anciennes lignes TEXT et contenu absent
+    assert unpack_content("<p>ancien</p>") == "<p>ancien</p>"
+    assert pack_content(None) is None
+    assert unpack_content(None) is None
+
+def test_unpack_rejects_unknown_codec():
+    with pytest.raises(ValueError):
+        unpack_content(b"x" + zlib.compress(b"texte"))
+
+def test_compact_round_trip():
+    content = dump_compact(BLOCKS)
+    assert is_compact(content)
+    assert parse_compact(content) == BLOCKS
+    # Un bloc par ligne : les versions se comparent ligne à ligne
+    assert len(content.split("\n")) == len(BLOCKS) + 1
+
+def test_compact_empty_document():
+    content = dump_compact([])
+    assert is_compact(content)
+    assert parse_compact(content) == []
+
+def test_is_compact_rejects_html():
+    assert not is_compact("<html><body><p>NB1</p></body></html>")
+    assert not is_compact("NB12 notes")
+
+def test_compact_to_text():
+    assert compact_to_text(dump_compact(BLOCKS)).split("\n")[:3] == [
+        "Texte gras rouge surligné", "", "un"]
+
+def test_markdown_round_trip_keeps_lists_and_emphasis():
+    blocks = [
+        [0, ["Avant "], ["gras", FLAG_BOLD], [" et "], ["italique", FLAG_ITALIC]],
+        [["disc", 1, 0], ["un"]],
+        [["disc", 2, 1], ["sous-point"]],
+        [["decimal", 1, 2], ["premier"]],
+        [0, ["caractères *_#[] littéraux"]],
+    ]
+    title, content = markdown_to_compact("# Titre\n\n" + compact_to_markdown(dump_compact(blocks)))
+    assert title == "Titre"
+    assert parse_compact(content)[:len(blocks)] == blocks
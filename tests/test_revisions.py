@@ -0,0 +1,189 @@
+"""Historique des révisions : chaîne de deltas, amincissement, élagage, notes sans historique."""
+import sqlite3
+
+import random
+
+import pytest
+
+import database
+from database import NoteManager, SNAPSHOT_EVERY, MINUTE_MS, HOUR_MS, DAY_MS
+from note_format import dump_compact, make_delta, apply_delta
+
+def content(i, lines=30):
+    """Contenu compact dont une ligne change à chaque version."""
+    blocks = [[0, [f"ligne {n}"]] for n in range(lines)]
+    blocks[i % lines] = [0, [f"version {i}"]]
+    return dump_compact(blocks)
+
+@pytest.fixture
+def db(tmp_path):
+    manager = NoteManager(str(tmp_path / "notes.db"))
+    yield manager
+    manager.close()
+
+@pytest.fixture
+def clock(monkeypatch):
+    """Horloge contrôlée : `clock.now` (ms) est l'heure des écritures."""
+    class Clock:
+        now = 1_700_000_000_000
+    monkeypatch.setattr(database, "_timestamps", lambda: (database._format_ms(Clock.now), Clock.now))
+    return Clock
+
+def history(db, note_id):
+    """{created_ms: contenu} de toutes les révisions, reconstruites une à une."""
+    return {created_ms: db.get_revision(note_id, revision_id)[1]
+            for revision_id, created_ms, _, _, _ in db.list_revisions(note_id, limit=10_000)}
+
+@pytest.mark.parametrize("old, new", [
+    ("", ""),
+    ("", "une ligne"),
+    ("a\nb\nc", ""),
+    ("a\nb\nc", "a\nb\nc"),
+    ("a\nb\nc", "a\nB\nc"),
+    ("a\nb\nc", "x\na\nb\nc\ny"),
+    ("a\nb\na\nb", "b\na\nb\na"),
+    ("a\n\n\nb", "a\n\nb\n"),
+])
+def test_delta_round_trip(old, new):
+    assert apply_delta(old, make_delta(old, new)) == new
+
+def test_delta_round_trip_random_edits():
+    rng = random.Random(0)
+    lines = [f"ligne {i}" for i in range(50)]
+    for _ in range(200):
+        old = "\n".join(lines)
+        position = rng.randrange(len(lines) + 1)
+        action = rng.choice(("insert", "delete", "change"))
+        if action == "insert" or not lines:
+            lines[position:position] = [f"ajout {rng.random()}"] * rng.randint(1, 3)
+        elif action == "delete":
+            del lines[position:position + rng.randint(1, 3)]
+        else:
+            lines[min(position, len(lines) - 1)] = f"modifiée {rng.random()}"
+        new = "\n".join(lines)
+        assert apply_delta(old, make_delta(old, new)) == new
+
+def test_local_edit_gives_small_delta():
+    old = content(0, lines=1000)
+    new = content(1, lines=1000)
+    ops = make_delta(old, new)
+    assert sum(len(value) for op, value in ops if op == "+") <= 2
+
+def test_revision_chain_rebuilds_every_version(db):
+    note_id = db.add_note("Note", content(0))
+    for i in range(1, 2 * SNAPSHOT_EVERY + 5):
+        db.update_note(note_id, "Note", content(i), "En cours")
+    revisions = db.list_revisions(note_id, limit=1000)[::-1]
+    assert len(revisions) == 2 * SNAPSHOT_EVERY + 5
+    for i, (revision_id, _, _, _, kind) in enumerate(revisions):
+        assert db.get_revision(note_id, revision_id)[1] == content(i)
+        # Un instantané complet toutes les SNAPSHOT_EVERY révisions, des deltas entre deux
+        assert kind == ("full" if i % SNAPSHOT_EVERY == 0 else "delta")
+
+def test_unchanged_save_records_no_revision(db):
+    note_id = db.add_note("Note", content(0))
+    db.update_note(note_id, "Note", content(0), "En cours")
+    assert len(db.list_revisions(note_id)) == 1
+
+def test_restore_revision(db):
+    note_id = db.add_note("Note", content(0))
+    db.update_note(note_id, "Note", "", "En cours")
+    first = db.list_revisions(note_id)[-1][0]
+    assert db.restore_revision(note_id, first)
+    assert db.get_note_content(note_id)[1] == content(0)
+
+def test_first_edit_of_legacy_note_keeps_original(tmp_path):
+    path = str(tmp_path / "legacy.db")
+    conn = sqlite3.connect(path)
+    conn.execute('''
+        CREATE TABLE notes (id INTEGER PRIMARY KEY AUTOINCREMENT, title TEXT NOT NULL, content TEXT,
+                            created_at TEXT, updated_at TEXT, status TEXT DEFAULT 'En cours')
+    ''')
+    original = "<html><body><p>Texte d'origine</p></body></html>"
+    conn.execute("INSERT INTO notes (title, content, created_at, updated_at) VALUES (?, ?, ?, ?)",
+                 ("t0", original, "2024-01-02 10:00", "2024-01-03 11:00"))
+    conn.commit()
+    conn.close()
+
+    db = NoteManager(path)
+    assert db.list_revisions(1) == []
+    db.update_note(1, "t0", "changed", "En cours")
+    revisions = db.list_revisions(1)
+    assert len(revisions) == 2
+    (new_id, _, _, _, _), (old_id, old_ms, _, _, old_kind) = revisions
+    assert old_kind == "full"
+    assert db.get_revision(1, old_id) == ("t0", original, "En cours")
+    assert db.get_revision(1, new_id)[1] == "changed"
+    assert old_ms < revisions[0][1]
+    db.close()
+
+def test_first_edit_of_imported_note_keeps_original(db):
+    db.add_notes_bulk([("Importée", content(0), "En cours", None, None)])
+    note_id = db.get_notes_page()[0][0]
+    db.update_note(note_id, "Importée", "", "En cours")
+    revisions = db.list_revisions(note_id)
+    assert [db.get_revision(note_id, revision[0])[1] for revision in revisions] == ["", content(0)]
+
+def test_thinning_keeps_recent_and_spaced_history(db, clock):
+    start = clock.now
+    note_id = db.add_note("Note", content(0))
+    versions = {start: content(0)}
+    # Trois jours d'auto-saves toutes les 5 minutes
+    for i in range(1, 3 * 24 * 12):
+        clock.now = start + i * 5 * MINUTE_MS
+        db.update_note(note_id, "Note", content(i), "En cours")
+        versions[clock.now] = content(i)
+
+    kept = history(db, note_id)
+    # Chaque révision gardée se reconstruit à l'identique
+    assert all(versions[created_ms] == text for created_ms, text in kept.items())
+    # La première version n'est jamais supprimée
+    assert start in kept
+    times = sorted(kept)
+    # Tout est gardé sur la dernière heure (au dernier amincissement près)
+    recent = [t for t in versions if clock.now - t < HOUR_MS - SNAPSHOT_EVERY * 5 * MINUTE_MS]
+    assert all(t in kept for t in recent)
+    # Au-delà d'un jour, au plus une révision par heure
+    old = [t for t in times if clock.now - t >= DAY_MS + SNAPSHOT_EVERY * 5 * MINUTE_MS]
+    assert len({t // HOUR_MS for t in old}) == len(old)
+    assert len(kept) < len(versions) // 3
+
+def test_thinning_preserves_version_before_long_session(db, clock):
+    start = clock.now
+    note_id = db.add_note("Note", content(0))
+    clock.now += DAY_MS
+    # Suppression accidentelle, puis une longue séance d'auto-saves
+    db.update_note(note_id, "Note", "", "En cours")
+    for i in range(1, 600):
+        clock.now += 10 * 1000
+        db.update_note(note_id, "Note", f"suite {i}", "En cours")
+    kept = history(db, note_id)
+    assert kept[start] == content(0)
+
+def test_prune_revisions_keeps_latest_and_rebuilds_oldest(db):
+    note_id = db.add_note("Note", content(0))
+    for i in range(1, 50):
+        db.update_note(note_id, "Note", content(i), "En cours")
+    db.prune_revisions(note_id, keep=15)
+    revisions = db.list_revisions(note_id, limit=100)
+    assert len(revisions) == 15
+    assert revisions[-1][4] == "full"
+    assert [db.get_revision(note_id, r[0])[1] for r in revisions[::-1]] == [content(i) for i in range(35, 50)]
+
+def test_broken_chain_is_left_alone(db, clock):
+    note_id = db.add_note("Note", content(0))
+    for i in range(1, 30):
+        clock.now += DAY_MS
+        db.update_note(note_id, "Note", content(i), "En cours")
+    # Instantanés complets perdus : les deltas restants ne se reconstruisent plus
+    conn = db._connect()
+    with conn:
+        conn.execute("DELETE FROM note_revisions WHERE note_id = ? AND kind = 'full'", (note_id,))
+    count = len(db.list_revisions(note_id, limit=100))
+    db.prune_revisions(note_id, keep=5)
+    assert len(db.list_revisions(note_id, limit=100)) == count
+    # Les sauvegardes suivantes (et l'amincissement qu'elles déclenchent) passent quand même
+    for i in range(30, 60):
+        clock.now += DAY_MS
+        db.update_note(note_id, "Note", content(i), "En cours")
+    assert db.get_note_content(note_id)[1] == content(59)
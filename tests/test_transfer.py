@@ -0,0 +1,77 @@
+"""Import / export des notes : archive JSON Lines et dossiers de fichiers."""
+import pytest
+
+from database import NoteManager
+from note_format import dump_compact, parse_compact, compact_to_text, FLAG_BOLD, FLAG_ITALIC
+from transfer import (export_jsonl, export_directory, iter_jsonl, iter_directory, import_notes,
+                      TransferCancelled)
+
+COMPACT = dump_compact([
+    [0, ["Début "], ["gras", FLAG_BOLD], [" puis "], ["italique", FLAG_ITALIC]],
+    [["disc", 1, 0], ["point"]],
+    [0],
+    [0, ["fin"]],
+])
+HTML = "<html><body><p>Ancienne note <b>HTML</b></p></body></html>"
+
+def make_db(path):
+    return NoteManager(str(path))
+
+@pytest.fixture
+def source(tmp_path):
+    db = make_db(tmp_path / "source.db")
+    db.add_notes_bulk([
+        ("Compacte", COMPACT, "En cours", 1_700_000_000_000, 1_700_000_100_000),
+        ("Ancienne", HTML, "Terminé", 1_600_000_000_000, 1_600_000_000_000),
+        ("Vide", "", "En cours", 1_650_000_000_000, 1_650_000_000_000),
+    ])
+    yield db
+    db.close()
+
+def notes(db):
+    return [note[1:] for note in db.iter_notes()]
+
+def test_jsonl_round_trip(source, tmp_path):
+    archive = str(tmp_path / "notes.jsonl")
+    assert export_jsonl(source, archive) == 3
+    target = make_db(tmp_path / "target.db")
+    assert import_notes(target, iter_jsonl(archive)) == 3
+    assert notes(target) == notes(source)
+    target.close()
+
+def test_markdown_directory_round_trip(source, tmp_path):
+    directory = str(tmp_path / "export")
+    assert export_directory(source, directory, "md") == 3
+    records = {title: content for title, content, *_ in iter_directory(directory)}
+    assert set(records) == {"Compacte", "Ancienne", "Vide"}
+    assert parse_compact(records["Compacte"]) == parse_compact(COMPACT)
+    assert compact_to_text(records["Ancienne"]) == "Ancienne note HTML"
+
+def test_html_directory_round_trip(source, tmp_path):
+    directory = str(tmp_path / "export")
+    export_directory(source, directory, "html")
+    records = {title: (content, updated_ms) for title, content, _, _, updated_ms in iter_directory(directory)}
+    assert records["Ancienne"] == (HTML, 1_600_000_000_000)
+    assert "<b>gras</b>" in records["Compacte"][0]
+
+def test_text_files_are_imported_literally(tmp_path):
+    with open(tmp_path / "brut.txt", "w", encoding="utf-8") as out:
+        out.write("# pas un titre\n\n- pas une liste\n**pas gras** et_pas_italique\n")
+    with open(tmp_path / "ignoré.pdf", "w") as out:
+        out.write("binaire")
+    ((title, content, *_),) = iter_directory(str(tmp_path))
+    assert title == "brut"
+    assert parse_compact(content) == [
+        [0, ["# pas un titre"]], [0], [0, ["- pas une liste"]], [0, ["**pas gras** et_pas_italique"]]]
+
+def test_cancelled_import_inserts_nothing(source, tmp_path):
+    archive = str(tmp_path / "notes.jsonl")
+    export_jsonl(source, archive)
+    target = make_db(tmp_path / "target.db")
+
+    def cancel(count):
+        raise TransferCancelled
+    with pytest.raises(TransferCancelled):
+        target.add_notes_bulk(iter_jsonl(archive), batch=1, progress=cancel)
+    assert target.count_notes() == 0
+    target.close()
@@ -0,0 +1,284 @@
+"""Mesures légères : durées nommées (spans) et compteurs.
+
+Désactivé par défaut, le module ne coûte qu'un test par appel. Il s'active avec la
+variable d'environnement NOTEBLOCK_TRACE ou l'option --trace de main.py, qui donnent
+le fichier de sortie :
+- un fichier .json reçoit une trace au format Chrome (chrome://tracing, Perfetto) ;
+- tout autre fichier reçoit, toutes les STATS_INTERVAL secondes, une ligne par span
+  (nombre, total, p50, p90, max) et par compteur.
+Le panneau de performances (ui/perf_overlay.py) branche en plus, tant qu'il est
+affiché, un RecentTracer qui garde les dernières mesures en mémoire.
+
+    with tracing.span("db.search"):
+        ...
+
+    @tracing.traced("MainWindow.apply_theme")
+    def apply_theme(self): ...
+
+    tracing.count("saves.coalesced")
+"""
+import atexit
+import contextlib
+import functools
+import json
+import os
+import threading
+import time
+from collections import deque
+
+ENV_VAR = "NOTEBLOCK_TRACE"
+# Secondes entre deux blocs du journal de statistiques
+STATS_INTERVAL = 10
+# Au-delà, les événements de la trace Chrome sont comptés mais plus gardés en mémoire
+MAX_EVENTS = 1_000_000
+
+_NULL_SPAN = contextlib.nullcontext()
+# Destinataire des mesures : None, un enregistreur, ou _Fanout s'il y en a plusieurs
+_tracer = None
+_sinks = []
+_file_tracer = None
+
+class _Span:
+    __slots__ = ("tracer", "name", "start")
+
+    def __init__(self, tracer, name):
+        self.tracer = tracer
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc):
+        self.tracer.record(self.name, self.start, time.perf_counter_ns())
+        return False
+
+class ChromeTracer:
+    """Garde les événements en mémoire et les écrit en une fois à la fermeture."""
+
+    def __init__(self, path):
+        self.path = path
+        self.origin = time.perf_counter_ns()
+        self.pid = os.getpid()
+        self.events = []
+        self.dropped = 0
+        self.counters = {}
+        self.threads = set()
+        self._lock = threading.Lock()
+
+    def _append(self, event):
+        tid = threading.get_native_id()
+        event["pid"] = self.pid
+        event["tid"] = tid
+        if tid not in self.threads:
+            self.threads.add(tid)
+            self.events.append({"ph": "M", "name": "thread_name", "pid": self.pid, "tid": tid,
+                                "args": {"name": threading.current_thread().name}})
+        if len(self.events) < MAX_EVENTS:
+            self.events.append(event)
+        else:
+            self.dropped += 1
+
+    def record(self, name, start, end):
+        event = {"ph": "X", "name": name, "ts": (start - self.origin) / 1000, "dur": (end - start) / 1000}
+        with self._lock:
+            self._append(event)
+
+    def count(self, name, value):
+        with self._lock:
+            total = self.counters[name] = self.counters.get(name, 0) + value
+            self._append({"ph": "C", "name": name, "ts": (time.perf_counter_ns() - self.origin) / 1000,
+                          "args": {name: total}})
+
+    def close(self):
+        with self._lock:
+            trace = {"traceEvents": self.events, "displayTimeUnit": "ms",
+                     "otherData": {"dropped_events": self.dropped}}
+            with open(self.path, "w", encoding="utf-8") as output:
+                json.dump(trace, output)
+
+class StatsTracer:
+    """Agrège les durées par nom et ajoute périodiquement un bloc au journal."""
+
+    def __init__(self, path, interval=STATS_INTERVAL):
+        self.path = path
+        self.interval = interval
+        self.durations = {}
+        self.counters = {}
+        self.totals = {}
+        self.next_flush = time.monotonic() + interval
+        self._lock = threading.Lock()
+
+    def record(self, name, start, end):
+        with self._lock:
+            self.durations.setdefault(name, []).append(end - start)
+        self._maybe_flush()
+
+    def count(self, name, value):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + value
+        self._maybe_flush()
+
+    def _maybe_flush(self):
+        # Pas de thread dédié : le bloc est écrit par la première mesure qui suit l'échéance
+        if time.monotonic() >= self.next_flush:
+            self.flush()
+
+    def flush(self):
+        with self._lock:
+            self.next_flush = time.monotonic() + self.interval
+            durations, self.durations = self.durations, {}
+            counters, self.counters = self.counters, {}
+            if not durations and not counters:
+                return
+            stamp = time.strftime("%Y-%m-%d %H:%M:%S")
+            lines = []
+            for name, values in sorted(durations.items()):
+                values.sort()
+                ms = [value / 1e6 for value in values]
+                lines.append(f"{stamp} span {name} n={len(ms)} total={sum(ms):.2f}ms "
+                             f"p50={ms[len(ms) // 2]:.3f}ms p90={ms[int(len(ms) * 0.9)]:.3f}ms "
+                             f"max={ms[-1]:.3f}ms")
+            for name, value in sorted(counters.items()):
+                total = self.totals[name] = self.totals.get(name, 0) + value
+                lines.append(f"{stamp} counter {name} +{value} total={total}")
+            with open(self.path, "a", encoding="utf-8") as output:
+                output.write("\n".join(lines) + "\n")
+
+    def close(self):
+        self.flush()
+
+class RecentTracer:
+    """Garde en mémoire les dernières mesures de chaque nom (panneau de performances)."""
+
+    def __init__(self, size=240):
+        self.size = size
+        # nom -> deque de (fin, durée), en nanosecondes
+        self.spans = {}
+        self.counters = {}
+
+    def record(self, name, start, end):
+        # deque.append est atomique : pas de verrou pour les spans des autres threads
+        spans = self.spans.get(name)
+        if spans is None:
+            spans = self.spans.setdefault(name, deque(maxlen=self.size))
+        spans.append((end, end - start))
+
+    def count(self, name, value):
+        self.counters[name] = self.counters.get(name, 0) + value
+
+    def recent(self, name):
+        """Mesures (fin, durée) de `name`, de la plus ancienne à la plus récente."""
+        spans = self.spans.get(name)
+        return list(spans) if spans else []
+
+    def close(self):
+        pass
+
+class _Fanout:
+    """Transmet chaque mesure à plusieurs enregistreurs."""
+
+    def __init__(self, sinks):
+        self.sinks = sinks
+
+    def record(self, name, start, end):
+        for sink in self.sinks:
+            sink.record(name, start, end)
+
+    def count(self, name, value):
+        for sink in self.sinks:
+            sink.count(name, value)
+
+def _update():
+    global _tracer
+    if not _sinks:
+        _tracer = None
+    elif len(_sinks) == 1:
+        _tracer = _sinks[0]
+    else:
+        _tracer = _Fanout(tuple(_sinks))
+
+def attach(sink):
+    """Ajoute un enregistreur (objet avec record(name, start, end) et count(name, value))."""
+    if sink not in _sinks:
+        _sinks.append(sink)
+        _update()
+    return sink
+
+def detach(sink):
+    if sink in _sinks:
+        _sinks.remove(sink)
+        _update()
+
+def enable(path):
+    """Active les mesures vers `path` (trace Chrome si .json, journal sinon)."""
+    global _file_tracer
+    disable()
+    if path.lower().endswith(".json"):
+        _file_tracer = ChromeTracer(path)
+    else:
+        _file_tracer = StatsTracer(path)
+    attach(_file_tracer)
+    atexit.register(disable)
+    return _file_tracer
+
+def disable():
+    """Arrête l'écriture des mesures dans le fichier et écrit ce qui reste."""
+    global _file_tracer
+    tracer, _file_tracer = _file_tracer, None
+    if tracer is not None:
+        detach(tracer)
+        atexit.unregister(disable)
+        tracer.close()
+
+def is_enabled():
+    return _tracer is not None
+
+def configure(argv=None):
+    """Active les mesures d'après --trace PATH (retiré de `argv`) ou NOTEBLOCK_TRACE.
+
+    Retourne les arguments restants.
+    """
+    argv = list(argv or [])
+    path = os.environ.get(ENV_VAR)
+    for index, arg in enumerate(argv):
+        if arg == "--trace" and index + 1 < len(argv):
+            path = argv[index + 1]
+            del argv[index:index + 2]
+            break
+        if arg.startswith("--trace="):
+            path = arg.split("=", 1)[1]
+            del argv[index]
+            break
+    if path:
+        enable(path)
+    return argv
+
+def span(name):
+    """Contexte qui mesure son bloc sous `name` (sans effet si les mesures sont désactivées)."""
+    tracer = _tracer
+    if tracer is None:
+        return _NULL_SPAN
+    return _Span(tracer, name)
+
+def traced(name):
+    """Décorateur : chaque appel de la fonction est un span `name`."""
+    def decorate(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            tracer = _tracer
+            if tracer is None:
+                return func(*args, **kwargs)
+            start = time.perf_counter_ns()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                tracer.record(name, start, time.perf_counter_ns())
+        return wrapper
+    return decorate
+
+def count(name, value=1):
+    """Ajoute `value` au compteur `name`."""
+    tracer = _tracer
+    if tracer is not None:
+        tracer.count(name, value)
@@ -0,0 +1,106 @@
+import json
+import os
+import re
+from note_format import (is_compact, compact_to_html, compact_to_markdown, markdown_to_compact,
+                         text_to_compact, html_to_text)
+
+# Import / export en flux : les notes sont lues et écrites une par une (générateurs),
+# la mémoire utilisée ne dépend pas de la taille de l'archive.
+
+class TransferCancelled(Exception):
+    """Levée par un rappel de progression pour interrompre un import ou un export."""
+
+_TITLE_TAG = re.compile(r"<title>(.*?)</title>", re.IGNORECASE | re.DOTALL)
+_UNSAFE_CHARS = re.compile(r'[\\/:*?"<>|\s]+')
+
+def _file_name(note_id, title, extension):
+    slug = _UNSAFE_CHARS.sub("-", title).strip("-")[:60] or "note"
+    return f"{note_id:06d}-{slug}.{extension}"
+
+def _as_html(content, title):
+    if content and is_compact(content):
+        return compact_to_html(content, title)
+    return content or ""
+
+def _as_markdown(content, title):
+    if content and is_compact(content):
+        body = compact_to_markdown(content)
+    else:
+        body = html_to_text(content or "") + "\n"
+    return f"# {title}\n\n{body}"
+
+# --- Export ---
+
+def export_jsonl(db, path, progress=None):
+    """Écrit toutes les notes dans une archive JSON Lines (un objet par ligne)."""
+    count = 0
+    with open(path, "w", encoding="utf-8") as out:
+        for note_id, title, content, status, created_ms, updated_ms in db.iter_notes():
+            out.write(json.dumps({
+                "id": note_id, "title": title, "status": status,
+                "created_ms": created_ms, "updated_ms": updated_ms, "content": content,
+            }, ensure_ascii=False))
+            out.write("\n")
+            count += 1
+            if progress:
+                progress(count)
+    return count
+
+def export_directory(db, directory, fmt="md", progress=None):
+    """Écrit une note par fichier, en Markdown (`md`) ou en HTML (`html`)."""
+    convert = _as_markdown if fmt == "md" else _as_html
+    os.makedirs(directory, exist_ok=True)
+    count = 0
+    for note_id, title, content, status, created_ms, updated_ms in db.iter_notes():
+        path = os.path.join(directory, _file_name(note_id, title, fmt))
+        with open(path, "w", encoding="utf-8") as out:
+            out.write(convert(content, title))
+        if updated_ms:
+            os.utime(path, (updated_ms / 1000, updated_ms / 1000))
+        count += 1
+        if progress:
+            progress(count)
+    return count
+
+# --- Import ---
+
+def iter_jsonl(path):
+    """Lit une archive JSON Lines : produit des tuples (title, content, status, created_ms, updated_ms)."""
+    with open(path, encoding="utf-8") as source:
+        for line in source:
+            line = line.strip()
+            if not line:
+                continue
+            note = json.loads(line)
+            yield (note.get("title") or "Sans titre", note.get("content") or "",
+                   note.get("status"), note.get("created_ms"), note.get("updated_ms"))
+
+def iter_directory(directory):
+    """Lit les fichiers .md, .markdown, .txt, .html et .htm d'un dossier (récursivement)."""
+    for root, dirs, files in os.walk(directory):
+        dirs.sort()
+        for name in sorted(files):
+            stem, extension = os.path.splitext(name)
+            extension = extension.lower()
+            if extension not in (".md", ".markdown", ".txt", ".html", ".htm"):
+                continue
+            path = os.path.join(root, name)
+            with open(path, encoding="utf-8", errors="replace") as source:
+                text = source.read()
+            modified_ms = int(os.path.getmtime(path) * 1000)
+            # Les fichiers exportés sont préfixés par l'id de la note : on le retire du titre
+            stem = re.sub(r"^\d{6}-", "", stem)
+            if extension in (".html", ".htm"):
+                match = _TITLE_TAG.search(text)
+                title = html_to_text(match.group(1)) if match else stem
+                yield title or stem, text, None, modified_ms, modified_ms
+            elif extension == ".txt":
+                # Texte brut : `_`, `*`, `#` ou `-` n'y sont pas des marques de format
+                yield stem, text_to_compact(text), None, modified_ms, modified_ms
+            else:
+                title, content = markdown_to_compact(text)
+                yield title or stem, content, None, modified_ms, modified_ms
+
+def import_notes(db, records, progress=None):
+    """Insère un flux de notes en masse ; retourne le nombre de notes importées."""
+    return db.add_notes_bulk(records, progress=progress)
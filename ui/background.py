@@ -1,68 +1,47 @@
-import random
 import math
 from PyQt6.QtWidgets import QWidget
-from PyQt6.QtCore import QTimer, Qt, QPointF, QRectF
-from PyQt6.QtGui import QPainter, QColor, QFont, QPen, QPainterPath
-
-class FloatingElement:
-    def __init__(self, width, height):
-        self.reset(width, height)
-        self.y = random.randint(0, height)
-        self.opacity = random.randint(0, 100)
-
-    def reset(self, width, height):
-        self.x = random.randint(0, width)
-        self.y = height + 100
-        self.speed = random.uniform(0.5, 1.5)
-        self.opacity = 0
-        self.fading_in = True
-        self.rotation = random.randint(0, 360)
-        self.rot_speed = random.uniform(-1, 1)
-        
-        self.type = random.choice(['text', 'atom', 'cube', 'dna', 'gear'])
-        
-        if self.type == 'text':
-            self.content = random.choice([
-                "E=mc²", "φ = 1.618", "0xDEADBEEF", "SYSTEM_READY", 
-                "ANALYSIS", "BLUEPRINT", "V.1.0.4", "LOADING..."
-            ])
-            self.size = random.randint(10, 18)
-        else:
-            self.size = random.randint(30, 80)
+from PyQt6.QtCore import Qt, QPointF, QRectF, QSizeF
+from PyQt6.QtGui import QPainter, QColor, QFont, QPen, QPainterPath, QImage, QFontMetrics, QRegion
+import tracing
+from ui.background_renderer import BackgroundRenderer
+from ui.frame_scheduler import FrameScheduler
+from ui.particles import ParticleField, KINDS, TEXTS, SPAWN_MARGIN, EXIT_MARGIN
 
-    def update(self, width, height):
-        self.y -= self.speed
-        self.rotation += self.rot_speed
-        
-        if self.y < -150:
-            self.reset(width, height)
+# Au-delà de cette part de la surface à repeindre, une peinture complète coûte moins
+# cher que la découpe en rectangles
+FULL_REPAINT_RATIO = 0.5
 
-        if self.fading_in:
-            self.opacity += 1.5
-            if self.opacity >= 120:
-                self.fading_in = False
-        else:
-            if random.random() < 0.005:
-                self.opacity -= 1
-        
-        self.opacity = max(0, min(255, self.opacity))
+# Éléments par million de pixels de la zone parcourue (la fenêtre et les marges
+# d'apparition et de sortie) : environ 25 pour une fenêtre de 1920x1080
+ELEMENTS_PER_MEGAPIXEL = 10
+
+# Les formes sont rendues par paliers de taille (px) : 13 sprites par forme au lieu
+# d'un par taille tirée, l'écart ne se voit pas
+SPRITE_SIZE_STEP = 4
 
 class AnimatedBackground(QWidget):
-    def __init__(self, parent=None):
+    def __init__(self, parent=None, density=ELEMENTS_PER_MEGAPIXEL, threaded=False):
         super().__init__(parent)
         self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
-        self.elements = []
         self.is_static = False # Mode sans animation
-        
-        for _ in range(25):
-            self.elements.append(FloatingElement(1920, 1080))
+        # Le nombre d'éléments suit la surface : un écran 4K est aussi dense qu'un écran HD
+        self.density = density
+        self.particles = ParticleField(self.element_count(1920, 1080), 1920, 1080)
             
-        self.timer = QTimer(self)
-        self.timer.timeout.connect(self.update_animation)
-        self.timer.start(30)
+        # Cadence adaptative : en pause quand la fenêtre est cachée, ralentie pendant la saisie
+        self.scheduler = FrameScheduler(self, self.update_animation)
         
         self.bg_color = QColor(0, 0, 0)
         self.pen_color = QColor(255, 255, 255)
+        # Sprites pré-rendus : (type, taille, texte) -> (image, origine, emprise)
+        self.sprites = {}
+        # Rectangles occupés par les éléments lors de la dernière image
+        self.drawn_rects = []
+        # Mode threadé : les images sont composées hors du thread Qt, paintEvent
+        # ne fait que recopier la dernière terminée
+        self.renderer = None
+        self.front = QImage()
+        self.set_threaded(threaded)
 
     def set_theme(self, is_dark):
         if is_dark:
@@ -71,87 +50,220 @@ class AnimatedBackground(QWidget):
         else:
             self.bg_color = QColor(240, 242, 245) # Gris très clair
             self.pen_color = QColor(20, 20, 20)
+        self.sprites.clear()
+        self.drawn_rects = []
+        self.request_frame()
+
+    def set_threaded(self, enabled):
+        """Active ou arrête la composition des images dans un thread dédié."""
+        if enabled == (self.renderer is not None):
+            return
+        if enabled:
+            self.renderer = BackgroundRenderer(self)
+            self.renderer.frame_ready.connect(self.on_frame_ready)
+            self.renderer.start()
+            self.request_frame()
+        else:
+            renderer, self.renderer = self.renderer, None
+            renderer.frame_ready.disconnect(self.on_frame_ready)
+            renderer.stop()
+            renderer.deleteLater()
+            self.front = QImage()
+            self.update()
 
     def set_static_mode(self, enabled):
         self.is_static = enabled
         if enabled:
-            self.timer.stop()
+            self.scheduler.pause("static")
             self.update() # Redessiner une dernière fois (juste le fond)
         else:
-            if not self.timer.isActive():
-                self.timer.start(30)
+            self.scheduler.resume("static")
 
-    def update_animation(self):
+    @tracing.traced("AnimatedBackground.frame")
+    def update_animation(self, dt=1.0):
         if self.is_static: return
         
         w = self.width()
         h = self.height()
         if w <= 0: return
-        for el in self.elements:
-            el.update(w, h)
-        self.update()
+        self.particles.step(w, h, dt)
+        # Seules les zones quittées et atteintes par les éléments sont repeintes
+        rects = self.particle_rects()
+        dirty = QRegion()
+        for rect in self.drawn_rects + rects:
+            dirty = dirty.united(rect)
+        self.drawn_rects = rects
+        # Un élément ne se déplace que d'un ou deux pixels par image : l'emprise de sa
+        # position actuelle suffit à estimer la surface à repeindre
+        area = sum(rect.width() * rect.height() for rect in rects)
+        if area > w * h * FULL_REPAINT_RATIO:
+            dirty = QRegion(self.rect())
+        if self.renderer is not None:
+            self.submit_frame(dirty)
+        # Peinture immédiate : le planificateur mesure ainsi le coût réel de l'image
+        elif not dirty.isEmpty():
+            self.repaint(dirty)
+
+    def submit_frame(self, dirty):
+        """Confie au thread de rendu l'état courant des éléments (sprites compris)."""
+        items = []
+        for x, y, rotation, opacity, kind, size, text in self.particles.visible():
+            image, origin = self.sprite(kind, size, text)[:2]
+            items.append((x, y, rotation, opacity, image, origin, text < 0))
+        self.renderer.submit(self.width(), self.height(), self.devicePixelRatioF(),
+                             QColor(self.bg_color), items, dirty)
+
+    def request_frame(self):
+        """Recompose toute l'image (thème, taille) sans attendre la prochaine image animée."""
+        if self.renderer is not None and self.width() > 0 and not self.is_static:
+            self.submit_frame(QRegion(self.rect()))
+
+    def on_frame_ready(self, image, dirty):
+        if self.renderer is None:
+            return
+        self.front = image
+        self.update(dirty)
+
+    def particle_rects(self):
+        """Rectangles (coordonnées du widget) couverts par les éléments visibles."""
+        rects = []
+        for x, y, rotation, opacity, kind, size, text in self.particles.visible():
+            reach = self.sprite(kind, size, text)[2]
+            rects.append(reach.translated(x, y).toAlignedRect().adjusted(-1, -1, 1, 1))
+        return rects
 
+    def element_count(self, width, height):
+        return max(1, round(width * (height + SPAWN_MARGIN + EXIT_MARGIN) / 1_000_000 * self.density))
+
+    def set_density(self, density):
+        self.density = density
+        self.particles.resize(self.element_count(self.width(), self.height()), self.width(), self.height())
+
+    def resizeEvent(self, event):
+        # La fenêtre a pu changer d'écran (et de densité de pixels)
+        self.sprites.clear()
+        self.drawn_rects = []
+        size = event.size()
+        self.particles.resize(self.element_count(size.width(), size.height()), size.width(), size.height())
+        super().resizeEvent(event)
+        self.request_frame()
+
+    def sprite(self, kind, size, text):
+        """Image d'un élément, rendue une seule fois par (forme, palier de taille, texte) et thème."""
+        if text < 0:
+            size = (size + SPRITE_SIZE_STEP // 2) // SPRITE_SIZE_STEP * SPRITE_SIZE_STEP
+        key = (kind, size, text)
+        cached = self.sprites.get(key)
+        if cached is None:
+            cached = self.sprites[key] = self.render_sprite(KINDS[kind], size, TEXTS[text] if text >= 0 else None)
+        return cached
+
+    def render_sprite(self, kind, size, content=None):
+        ratio = self.devicePixelRatioF()
+        if kind == 'text':
+            font = QFont("Courier New", size)
+            font.setBold(True)
+            bounds = QRectF(QFontMetrics(font).boundingRect(content)).adjusted(-2, -2, 2, 2)
+            reach = bounds
+        else:
+            # Demi-côté couvrant toutes les formes (décalage du cube, dents de l'engrenage)
+            half = size * 3 // 4 + 12
+            bounds = QRectF(-half, -half, half * 2, half * 2)
+            # Le sprite tourne : son emprise est le carré circonscrit au cercle qui
+            # contient la forme dans toutes ses positions (plus l'épaisseur du trait)
+            if kind == 'cube':
+                radius = (size // 2 + size // 4) * math.sqrt(2)
+            elif kind == 'gear':
+                radius = size / 2 + 10
+            else:
+                radius = size / 2 + 5
+            radius += 2
+            reach = QRectF(-radius, -radius, radius * 2, radius * 2)
+
+        # QImage plutôt que QPixmap : le thread de rendu peut la peindre lui aussi
+        image = QImage(math.ceil(bounds.width() * ratio), math.ceil(bounds.height() * ratio),
+                       QImage.Format.Format_ARGB32_Premultiplied)
+        image.setDevicePixelRatio(ratio)
+        image.fill(Qt.GlobalColor.transparent)
+
+        painter = QPainter(image)
+        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        painter.translate(-bounds.left(), -bounds.top())
+        pen = QPen(self.pen_color, 1.5)
+        pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
+        painter.setPen(pen)
+        painter.setBrush(Qt.BrushStyle.NoBrush)
+
+        if kind == 'text':
+            painter.setFont(font)
+            painter.drawText(0, 0, content)
+        elif kind == 'atom':
+            painter.drawEllipse(-5, -5, 10, 10)
+            painter.drawEllipse(-size//2, -size//4, size, size//2)
+            painter.rotate(60)
+            painter.drawEllipse(-size//2, -size//4, size, size//2)
+            painter.rotate(60)
+            painter.drawEllipse(-size//2, -size//4, size, size//2)
+        elif kind == 'cube':
+            s = size // 2
+            painter.drawRect(-s, -s, s*2, s*2)
+            offset = s // 2
+            painter.drawRect(-s+offset, -s-offset, s*2, s*2)
+            painter.drawLine(-s, -s, -s+offset, -s-offset)
+            painter.drawLine(s, -s, s+offset, -s-offset)
+            painter.drawLine(s, s, s+offset, s-offset)
+            painter.drawLine(-s, s, -s+offset, s-offset)
+        elif kind == 'dna':
+            path = QPainterPath()
+            h = size
+            w = size // 3
+            path.moveTo(0, -h//2)
+            path.cubicTo(w, -h//4, -w, h//4, 0, h//2)
+            painter.drawPath(path)
+            for i in range(-h//2, h//2, 10):
+                painter.drawLine(-5, i, 5, i)
+        elif kind == 'gear':
+            painter.drawEllipse(-size//2, -size//2, size, size)
+            painter.drawEllipse(-size//4, -size//4, size//2, size//2)
+            for i in range(0, 360, 45):
+                painter.rotate(45)
+                painter.drawLine(0, -size//2, 0, -size//2 - 10)
+        painter.end()
+        return image, bounds.topLeft(), reach
+
+    @tracing.traced("AnimatedBackground.paintEvent")
     def paintEvent(self, event):
+        # Un affichage après une occultation relance l'animation
+        self.scheduler.wake()
         painter = QPainter(self)
-        painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+        # Le peintre est limité à la zone à repeindre : le fond et les éléments qui
+        # ne la touchent pas sont ignorés
+        region = event.region()
+
+        if (self.renderer is not None and not self.is_static
+                and self.front.deviceIndependentSize() == QSizeF(self.size())):
+            # Mode threadé : simple copie de la dernière image terminée
+            painter.drawImage(QPointF(0, 0), self.front)
+            return
         
         # Fond
-        painter.fillRect(self.rect(), self.bg_color)
+        painter.fillRect(event.rect(), self.bg_color)
         
 
-        if self.is_static:
+        # Mode threadé sans image à la bonne taille (premier affichage, redimensionnement) :
+        # le fond seul en attendant
+        if self.is_static or self.renderer is not None:
             return
         
-        for el in self.elements:
-            if el.opacity <= 0: continue
-            
-            c = QColor(self.pen_color)
-            c.setAlpha(int(el.opacity))
-            pen = QPen(c, 1.5)
-            pen.setJoinStyle(Qt.PenJoinStyle.RoundJoin)
-            painter.setPen(pen)
-            painter.setBrush(Qt.BrushStyle.NoBrush)
-            
-            painter.save()
-            painter.translate(el.x, el.y)
-            painter.rotate(el.rotation)
-            
-            if el.type == 'text':
-                painter.rotate(-el.rotation)
-                font = QFont("Courier New", el.size)
-                font.setBold(True)
-                painter.setFont(font)
-                painter.drawText(0, 0, el.content)
-            elif el.type == 'atom':
-                painter.drawEllipse(-5, -5, 10, 10)
-                painter.drawEllipse(-el.size//2, -el.size//4, el.size, el.size//2)
-                painter.rotate(60)
-                painter.drawEllipse(-el.size//2, -el.size//4, el.size, el.size//2)
-                painter.rotate(60)
-                painter.drawEllipse(-el.size//2, -el.size//4, el.size, el.size//2)
-            elif el.type == 'cube':
-                s = el.size // 2
-                painter.drawRect(-s, -s, s*2, s*2)
-                offset = s // 2
-                painter.drawRect(-s+offset, -s-offset, s*2, s*2)
-                painter.drawLine(-s, -s, -s+offset, -s-offset)
-                painter.drawLine(s, -s, s+offset, -s-offset)
-                painter.drawLine(s, s, s+offset, s-offset)
-                painter.drawLine(-s, s, -s+offset, s-offset)
-            elif el.type == 'dna':
-                path = QPainterPath()
-                h = el.size
-                w = el.size // 3
-                path.moveTo(0, -h//2)
-                path.cubicTo(w, -h//4, -w, h//4, 0, h//2)
-                painter.drawPath(path)
-                for i in range(-h//2, h//2, 10):
-                    painter.drawLine(-5, i, 5, i)
-            elif el.type == 'gear':
-                painter.drawEllipse(-el.size//2, -el.size//2, el.size, el.size)
-                painter.drawEllipse(-el.size//4, -el.size//4, el.size//2, el.size//2)
-                for i in range(0, 360, 45):
-                    painter.rotate(45)
-                    painter.drawLine(0, -el.size//2, 0, -el.size//2 - 10)
-
-            painter.restore()
+        # Chaque élément n'est plus qu'une copie de son sprite, tournée et transparente
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for x, y, rotation, opacity, kind, size, text in self.particles.visible():
+            image, origin, reach = self.sprite(kind, size, text)
+            if not region.intersects(reach.translated(x, y).toAlignedRect()):
+                continue
+            painter.setOpacity(opacity / 255)
+            painter.resetTransform()
+            painter.translate(x, y)
+            if text < 0:
+                painter.rotate(rotation)
+            painter.drawImage(origin, image)
@@ -0,0 +1,73 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal, QRectF
+from PyQt6.QtGui import QImage, QPainter, QRegion
+import tracing
+
+class BackgroundRenderer(QThread):
+    """Compose les images du fond animé hors du thread Qt, dans un double tampon.
+
+    Le thread Qt soumet l'état des éléments (positions et sprites, déjà prêts) ; ce
+    thread peint l'image complète dans le tampon arrière puis la publie avec la
+    région à rafraîchir. Seule la demande la plus récente est peinte.
+    """
+
+    frame_ready = pyqtSignal(QImage, QRegion)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._cond = threading.Condition()
+        self._pending = None
+        self._stopping = False
+        # Deux tampons alternés : l'image publiée reste intacte pendant que l'autre est peinte
+        self._buffers = [QImage(), QImage()]
+        self._back = 0
+
+    def submit(self, width, height, ratio, bg_color, items, dirty):
+        """Demande une image ; `items` : tuples (x, y, rotation, opacité, sprite, origine, tourne)."""
+        with self._cond:
+            if self._pending is not None:
+                # L'image sautée ne sera jamais affichée : ses zones modifiées restent à rafraîchir
+                dirty = dirty.united(self._pending[5])
+            self._pending = (width, height, ratio, bg_color, items, dirty)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                request, self._pending = self._pending, None
+            width, height, ratio, bg_color, items, dirty = request
+            image = self._render(width, height, ratio, bg_color, items)
+            self.frame_ready.emit(image, dirty)
+
+    @tracing.traced("BackgroundRenderer.render")
+    def _render(self, width, height, ratio, bg_color, items):
+        buffer = self._buffers[self._back]
+        pixel_width, pixel_height = round(width * ratio), round(height * ratio)
+        if buffer.width() != pixel_width or buffer.height() != pixel_height:
+            buffer = QImage(pixel_width, pixel_height, QImage.Format.Format_ARGB32_Premultiplied)
+            buffer.setDevicePixelRatio(ratio)
+            self._buffers[self._back] = buffer
+        self._back ^= 1
+
+        painter = QPainter(buffer)
+        painter.fillRect(QRectF(0, 0, width, height), bg_color)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for x, y, rotation, opacity, sprite, origin, rotated in items:
+            painter.setOpacity(opacity / 255)
+            painter.resetTransform()
+            painter.translate(x, y)
+            if rotated:
+                painter.rotate(rotation)
+            painter.drawImage(origin, sprite)
+        painter.end()
+        return buffer
@@ -0,0 +1,116 @@
+from PyQt6.QtWidgets import QWidget, QGraphicsScene, QGraphicsDropShadowEffect
+from PyQt6.QtGui import QPainter, QPixmap, QImage, QColor
+from PyQt6.QtCore import Qt, QEvent, QRectF
+
+# Ombres déjà floutées : (rayon des coins, flou, couleur, densité de pixels) -> pixmap
+_cache = {}
+
+def shadow_pixmap(radius, blur, color, ratio):
+    """Ombre floutée d'un rectangle arrondi, découpable en neuf parties.
+
+    Le rectangle a des côtés droits de 2 * blur + 1 pixels : la colonne et la ligne
+    centrales ne dépendent pas des coins et peuvent être étirées à toute taille.
+    """
+    key = (radius, blur, QColor(color).rgba(), ratio)
+    pixmap = _cache.get(key)
+    if pixmap is not None:
+        return pixmap
+
+    # Tout est calculé en pixels physiques, la densité n'est appliquée qu'à la fin
+    core = round((2 * radius + 2 * blur + 1) * ratio)
+    margin = round(blur * ratio)
+    size = core + 2 * margin
+    mask = QImage(size, size, QImage.Format.Format_ARGB32_Premultiplied)
+    mask.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(mask)
+    painter.setRenderHint(QPainter.RenderHint.Antialiasing)
+    painter.setPen(Qt.PenStyle.NoPen)
+    painter.setBrush(QColor(0, 0, 0))
+    painter.drawRoundedRect(QRectF(margin, margin, core, core), radius * ratio, radius * ratio)
+    painter.end()
+
+    # L'effet d'origine, appliqué une seule fois à une carte témoin ; l'ombre est
+    # décalée d'une largeur pour être récupérée sans la carte par-dessus
+    scene = QGraphicsScene()
+    item = scene.addPixmap(QPixmap.fromImage(mask))
+    effect = QGraphicsDropShadowEffect()
+    effect.setBlurRadius(margin)
+    effect.setOffset(size, 0)
+    effect.setColor(QColor(color))
+    item.setGraphicsEffect(effect)
+    image = QImage(size * 2, size, QImage.Format.Format_ARGB32_Premultiplied)
+    image.fill(Qt.GlobalColor.transparent)
+    painter = QPainter(image)
+    scene.render(painter, QRectF(0, 0, size * 2, size), QRectF(0, 0, size * 2, size))
+    painter.end()
+
+    pixmap = QPixmap.fromImage(image.copy(size, 0, size, size))
+    pixmap.setDevicePixelRatio(ratio)
+    _cache[key] = pixmap
+    return pixmap
+
+class CardShadow(QWidget):
+    """Ombre portée d'une carte, peinte derrière elle par un widget voisin.
+
+    Contrairement à QGraphicsDropShadowEffect, la carte et ses enfants (l'éditeur)
+    sont peints directement : une frappe ne refait ni rendu hors écran ni flou.
+    """
+
+    def __init__(self, target, blur=40, offset=(0, 10), radius=24, color=QColor(0, 0, 0, 50)):
+        super().__init__(target.parentWidget())
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.target = target
+        self.blur = blur
+        self.offset = offset
+        self.radius = radius
+        self.color = QColor(color)
+        target.installEventFilter(self)
+        self._follow()
+
+    def set_color(self, color):
+        self.color = QColor(color)
+        self.update()
+
+    def eventFilter(self, obj, event):
+        if obj is self.target:
+            kind = event.type()
+            if kind == QEvent.Type.ParentChange:
+                self.setParent(self.target.parentWidget())
+                self._follow()
+            elif kind in (QEvent.Type.Move, QEvent.Type.Resize, QEvent.Type.Show, QEvent.Type.Hide):
+                self._follow()
+        return False
+
+    def _follow(self):
+        """Suit la position, la visibilité et l'empilement de la carte."""
+        if self.parentWidget() is None:
+            return
+        dx, dy = self.offset
+        self.setGeometry(self.target.geometry().adjusted(-self.blur + dx, -self.blur + dy,
+                                                         self.blur + dx, self.blur + dy))
+        if self.target.isHidden():
+            self.hide()
+        else:
+            self.show()
+            self.stackUnder(self.target)
+
+    def paintEvent(self, event):
+        ratio = self.devicePixelRatioF()
+        pixmap = shadow_pixmap(self.radius, self.blur, self.color, ratio)
+        # Coins : flou extérieur, rayon et flou intérieur ; le reste est étiré
+        corner = 2 * self.blur + self.radius
+        source = [0, round(corner * ratio), round((corner + 1) * ratio), pixmap.width()]
+        cx = min(corner, self.width() / 2)
+        cy = min(corner, self.height() / 2)
+        xs = [0, cx, self.width() - cx, self.width()]
+        ys = [0, cy, self.height() - cy, self.height()]
+
+        painter = QPainter(self)
+        painter.setRenderHint(QPainter.RenderHint.SmoothPixmapTransform)
+        for row in range(3):
+            for col in range(3):
+                target = QRectF(xs[col], ys[row], xs[col + 1] - xs[col], ys[row + 1] - ys[row])
+                if not target.isEmpty():
+                    painter.drawPixmap(target, pixmap, QRectF(source[col], source[row],
+                                                              source[col + 1] - source[col],
+                                                              source[row + 1] - source[row]))
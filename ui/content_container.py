@@ -1,6 +1,6 @@
-from PyQt6.QtWidgets import QFrame, QVBoxLayout, QWidget, QGraphicsDropShadowEffect
-from PyQt6.QtGui import QColor
+from PyQt6.QtWidgets import QFrame, QVBoxLayout, QWidget
 from PyQt6.QtCore import Qt
+from ui.card_shadow import CardShadow
 
 class ContentContainer(QFrame):
 
@@ -16,23 +16,8 @@ class ContentContainer(QFrame):
         layout.addWidget(content_widget)
         
 
-        self._setup_shadow()
-
-    def _setup_shadow(self):
-        self.shadow = QGraphicsDropShadowEffect(self)
-        self.shadow.setBlurRadius(40)
-        self.shadow.setOffset(0, 10)
-        self.setGraphicsEffect(self.shadow)
+        # Ombre pré-rendue peinte derrière la carte (voir CardShadow)
+        self.shadow = CardShadow(self, blur=40, offset=(0, 10))
 
     def set_shadow_color(self, color):
-
-        if self.graphicsEffect() is None:
-            self._setup_shadow()
-
-        if self.shadow:
-            try:
-                self.shadow.setColor(color)
-            except RuntimeError:
-
-                self._setup_shadow()
-                self.shadow.setColor(color)
+        self.shadow.set_color(color)
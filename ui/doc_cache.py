@@ -0,0 +1,87 @@
+from collections import OrderedDict
+from PyQt6.QtCore import QObject
+import tracing
+
+# Mémoire totale des documents gardés (octets, estimation)
+MAX_BYTES = 64 * 1024 * 1024
+# Estimation de la mémoire d'un document : texte en UTF-16 avec ses fragments, et
+# structures (format, mise en page) de chaque bloc ; mesurée à environ 7 octets par
+# caractère, mise en page comprise.
+BYTES_PER_CHAR = 8
+BYTES_PER_BLOCK = 256
+
+def document_size(doc):
+    """Mémoire approximative occupée par un QTextDocument (octets)."""
+    return doc.characterCount() * BYTES_PER_CHAR + doc.blockCount() * BYTES_PER_BLOCK
+
+class DocumentCache(QObject):
+    """Documents des notes récemment quittées, pour les rouvrir sans les relire.
+
+    Chaque document est rangé sous (id, updated_ms) : il ne sert que si la note n'a pas
+    changé depuis. Le cache est un LRU borné par la mémoire estimée des documents.
+    Un document n'existe qu'en un exemplaire : `take` le retire du cache pour
+    l'éditeur, `put` l'y range quand l'éditeur passe à une autre note.
+    """
+
+    def __init__(self, max_bytes=MAX_BYTES, parent=None):
+        super().__init__(parent)
+        self.max_bytes = max_bytes
+        # (id, updated_ms) -> (titre, statut, document, taille)
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def has_note(self, note_id):
+        return any(key[0] == note_id for key in self.entries)
+
+    def take(self, note_id, stamp):
+        """Retire et retourne (titre, statut, document), ou None si absent."""
+        entry = self.entries.pop((note_id, stamp), None)
+        if entry is None:
+            tracing.count("doc_cache.misses")
+            # Les versions restantes de la note sont périmées
+            self.discard(note_id)
+            return None
+        tracing.count("doc_cache.hits")
+        title, status, doc, size = entry
+        self.size -= size
+        doc.setParent(None)
+        return title, status, doc
+
+    def put(self, note_id, stamp, title, status, doc):
+        """Range `doc`, qui passe sous la garde du cache. Retourne False s'il est trop gros."""
+        size = document_size(doc)
+        if size > self.max_bytes:
+            return False
+        self.discard(note_id)
+        # Rouvert, le document repart sans l'historique de la session précédente
+        doc.clearUndoRedoStacks()
+        doc.setParent(self)
+        self.entries[(note_id, stamp)] = (title, status, doc, size)
+        self.size += size
+        while self.size > self.max_bytes:
+            self._evict(next(iter(self.entries)))
+        return True
+
+    def discard(self, note_id):
+        """Oublie toutes les versions de la note `note_id`."""
+        for key in [key for key in self.entries if key[0] == note_id]:
+            self._evict(key)
+
+    def clear(self):
+        for key in list(self.entries):
+            self._evict(key)
+
+    def _evict(self, key):
+        _, _, doc, size = self.entries.pop(key)
+        self.size -= size
+        doc.deleteLater()
+
+    def on_note_changed(self, kind, note_id, row):
+        """Rappel des notifications de NoteManager (relayées dans le thread Qt)."""
+        if kind == "reset":
+            self.clear()
+        elif kind in ("updated", "deleted"):
+            self.discard(note_id)
@@ -0,0 +1,374 @@
+import json
+from PyQt6.QtGui import (QTextDocument, QTextCursor, QTextFormat, QTextCharFormat, QTextBlockFormat,
+                         QTextListFormat, QTextBlockUserData, QColor, QFont)
+from PyQt6.QtCore import Qt, QObject
+from note_format import (COMPACT_HEADER, compact_lines, encode_json,
+                         FLAG_BOLD, FLAG_ITALIC, FLAG_UNDERLINE, FLAG_STRIKE)
+
+# Noms stables des styles de liste dans le format compact
+LIST_STYLES = {
+    QTextListFormat.Style.ListDisc: "disc",
+    QTextListFormat.Style.ListCircle: "circle",
+    QTextListFormat.Style.ListSquare: "square",
+    QTextListFormat.Style.ListDecimal: "decimal",
+    QTextListFormat.Style.ListLowerAlpha: "lower-alpha",
+    QTextListFormat.Style.ListUpperAlpha: "upper-alpha",
+    QTextListFormat.Style.ListLowerRoman: "lower-roman",
+    QTextListFormat.Style.ListUpperRoman: "upper-roman",
+}
+LIST_STYLES_BY_NAME = {name: style for style, name in LIST_STYLES.items()}
+
+OBJECT_REPLACEMENT = "\ufffc"
+
+Property = QTextFormat.Property
+# Propriétés de bloc et de liste que setHtml() pose à leur valeur neutre : à ces
+# valeurs, le bloc s'encode sans perte. Toute autre propriété (alignement, titre,
+# marges, filet...) fait enregistrer la note en HTML.
+NEUTRAL_BLOCK_PROPERTIES = {
+    Property.BlockAlignment.value: Qt.AlignmentFlag.AlignLeft.value,
+    Property.BlockTopMargin.value: 0,
+    Property.BlockBottomMargin.value: 0,
+    Property.BlockLeftMargin.value: 0,
+    Property.BlockRightMargin.value: 0,
+    Property.BlockIndent.value: 0,
+    Property.TextIndent.value: 0,
+    Property.HeadingLevel.value: 0,
+    Property.BlockNonBreakableLines.value: False,
+    Property.LineHeightType.value: 0,
+    Property.LayoutDirection.value: Qt.LayoutDirection.LeftToRight.value,
+}
+NEUTRAL_LIST_PROPERTIES = {
+    Property.ListStart.value: 1,
+    Property.ListNumberPrefix.value: "",
+    Property.ListNumberSuffix.value: ".",
+}
+LIST_PROPERTIES = {Property.ListStyle.value, Property.ListIndent.value}
+
+# --- Cache par bloc ---
+# Sérialiser tous les fragments d'un long document coûte plus cher que toHtml() ;
+# chaque bloc garde donc ses runs déjà encodés, invalidés dès que le bloc change.
+# Une sauvegarde ne réencode ainsi que les paragraphes modifiés depuis la précédente.
+# Un bloc que le format compact ne sait pas représenter garde `runs_json` à None.
+
+class _BlockRuns(QTextBlockUserData):
+    def __init__(self, runs_json):
+        super().__init__()
+        self.runs_json = runs_json
+
+class BlockCache(QObject):
+    """Efface le cache des blocs touchés par une modification (texte ou format).
+
+    Qt n'émet contentsChange que pour un document mis en page : celui de l'éditeur.
+    """
+
+    def __init__(self, doc):
+        super().__init__(doc)
+        self.doc = doc
+        self.paused = False
+        # Police par défaut avec laquelle les runs en cache ont été encodés
+        self.defaults = None
+        doc.contentsChange.connect(self._invalidate)
+
+    def _invalidate(self, position, removed, added):
+        if self.paused:
+            return
+        block = self.doc.findBlock(position)
+        end = position + added
+        while block.isValid() and block.position() <= end:
+            if block.userData() is not None:
+                block.setUserData(None)
+            block = block.next()
+
+def _block_cache(doc):
+    cache = doc.findChild(BlockCache)
+    if cache is None:
+        cache = BlockCache(doc)
+    return cache
+
+# --- Encodage ---
+
+class _Unsupported(Exception):
+    """Le document contient une mise en forme que le format compact ne représente pas."""
+
+def _brush_color(brush):
+    if brush.style() == Qt.BrushStyle.NoBrush:
+        return None
+    if brush.style() != Qt.BrushStyle.SolidPattern:
+        raise _Unsupported
+    color = brush.color()
+    if color.alpha() == 0:
+        return None
+    return color.name(QColor.NameFormat.HexArgb) if color.alpha() < 255 else color.name()
+
+def _font_defaults(doc):
+    """(familles, taille en points, taille en pixels) de la police par défaut de `doc`."""
+    font = doc.defaultFont()
+    families = font.families() or [font.family()]
+    return (families, [font.family()]), font.pointSizeF(), font.pixelSize()
+
+def _run_attributes(fmt, defaults):
+    """Attributs d'un run dans le format compact, sans le texte.
+
+    La police n'est stockée que si elle diffère de celle du document : les anciennes
+    notes HTML la répètent sur chaque run. Lève _Unsupported pour toute autre propriété.
+    """
+    families, point_size, pixel_size = defaults
+    flags = 0
+    extra = {}
+    for key, value in fmt.properties().items():
+        if key == Property.FontWeight.value:
+            if value == QFont.Weight.Bold.value:
+                flags |= FLAG_BOLD
+            elif value != QFont.Weight.Normal.value:
+                raise _Unsupported
+        elif key == Property.FontItalic.value:
+            if value:
+                flags |= FLAG_ITALIC
+        elif key == Property.FontUnderline.value:
+            if value:
+                flags |= FLAG_UNDERLINE
+        elif key == Property.TextUnderlineStyle.value:
+            if value == QTextCharFormat.UnderlineStyle.SingleUnderline.value:
+                flags |= FLAG_UNDERLINE
+            elif value != QTextCharFormat.UnderlineStyle.NoUnderline.value:
+                raise _Unsupported
+        elif key == Property.FontStrikeOut.value:
+            if value:
+                flags |= FLAG_STRIKE
+        elif key == Property.AnchorHref.value:
+            if value:
+                extra["href"] = value
+        elif key == Property.IsAnchor.value:
+            if value and not fmt.anchorHref():
+                raise _Unsupported
+        elif key == Property.FontFamilies.value:
+            if value and list(value) not in families:
+                extra["font"] = list(value)
+        elif key == Property.FontPointSize.value:
+            if value != point_size:
+                extra["size"] = value
+        elif key == Property.FontPixelSize.value:
+            if value != pixel_size:
+                extra["px"] = value
+        elif key == Property.TextVerticalAlignment.value:
+            if value in (QTextCharFormat.VerticalAlignment.AlignSuperScript.value,
+                         QTextCharFormat.VerticalAlignment.AlignSubScript.value):
+                extra["valign"] = value
+            elif value != QTextCharFormat.VerticalAlignment.AlignNormal.value:
+                raise _Unsupported
+        elif key not in (Property.ForegroundBrush.value, Property.BackgroundBrush.value):
+            raise _Unsupported
+    attributes = [flags, _brush_color(fmt.foreground()), _brush_color(fmt.background()), extra]
+    # Les valeurs par défaut en fin de run ne sont pas stockées
+    while attributes and not attributes[-1]:
+        attributes.pop()
+    return attributes
+
+def _check_neutral(fmt, neutral, handled=()):
+    for key, value in fmt.properties().items():
+        if key in handled:
+            continue
+        if key not in neutral or neutral[key] != value:
+            raise _Unsupported
+
+def _encode_runs(block, attributes_by_index, defaults):
+    _check_neutral(block.blockFormat(), NEUTRAL_BLOCK_PROPERTIES, (Property.ObjectIndex.value,))
+    runs = []
+    it = block.begin()
+    while not it.atEnd():
+        fragment = it.fragment()
+        text = fragment.text()
+        if OBJECT_REPLACEMENT in text:
+            text = text.replace(OBJECT_REPLACEMENT, "")
+        if text:
+            # Les formats sont partagés par index dans le document : chacun n'est analysé qu'une fois
+            index = fragment.charFormatIndex()
+            attributes = attributes_by_index.get(index)
+            if attributes is None:
+                attributes = attributes_by_index[index] = _run_attributes(fragment.charFormat(), defaults)
+            runs.append([text, *attributes])
+        it += 1
+    return encode_json(runs)[1:-1]
+
+def _line(head, runs_json):
+    if runs_json:
+        return f"[{head},{runs_json}]"
+    return f"[{head}]"
+
+def _list_head(text_list, number):
+    list_fmt = text_list.format()
+    _check_neutral(list_fmt, NEUTRAL_LIST_PROPERTIES, LIST_PROPERTIES)
+    style = LIST_STYLES.get(list_fmt.style())
+    if style is None:
+        raise _Unsupported
+    return encode_json([style, list_fmt.indent(), number])
+
+def encode_document(doc):
+    """Sérialise un QTextDocument au format compact.
+
+    Un document dont la mise en forme dépasse le format compact (tableau, image,
+    titre, alignement...) est enregistré en HTML, comme avant : rien n'est perdu.
+    """
+    cache = _block_cache(doc)
+    defaults = _font_defaults(doc)
+    if cache.defaults is not None and cache.defaults != defaults:
+        # Police de l'éditeur changée : les runs en cache en dépendent
+        block = doc.begin()
+        while block.isValid():
+            block.setUserData(None)
+            block = block.next()
+    cache.defaults = defaults
+    if doc.rootFrame().childFrames():
+        return doc.toHtml()
+    lines = [COMPACT_HEADER]
+    heads = {}
+    attributes_by_index = {}
+    block = doc.begin()
+    while block.isValid():
+        cached = block.userData()
+        if cached is None:
+            try:
+                runs_json = _encode_runs(block, attributes_by_index, defaults)
+            except _Unsupported:
+                runs_json = None
+            cached = _BlockRuns(runs_json)
+            block.setUserData(cached)
+        if cached.runs_json is None:
+            return doc.toHtml()
+
+        text_list = block.textList()
+        if text_list is None:
+            head = "0"
+        else:
+            head = heads.get(text_list.objectIndex())
+            if head is None:
+                try:
+                    head = heads[text_list.objectIndex()] = _list_head(text_list, len(heads))
+                except _Unsupported:
+                    return doc.toHtml()
+        lines.append(_line(head, cached.runs_json))
+        block = block.next()
+    return "\n".join(lines)
+
+# --- Décodage ---
+
+def _char_format(flags=0, color=None, highlight=None, extra=None):
+    fmt = QTextCharFormat()
+    if flags & FLAG_BOLD:
+        fmt.setFontWeight(QFont.Weight.Bold)
+    if flags & FLAG_ITALIC:
+        fmt.setFontItalic(True)
+    if flags & FLAG_UNDERLINE:
+        fmt.setFontUnderline(True)
+    if flags & FLAG_STRIKE:
+        fmt.setFontStrikeOut(True)
+    if color:
+        fmt.setForeground(QColor(color))
+    if highlight:
+        fmt.setBackground(QColor(highlight))
+    if extra:
+        if "href" in extra:
+            fmt.setAnchor(True)
+            fmt.setAnchorHref(extra["href"])
+        if "font" in extra:
+            fmt.setFontFamilies(extra["font"])
+        if "size" in extra:
+            fmt.setFontPointSize(extra["size"])
+        if "px" in extra:
+            fmt.setProperty(Property.FontPixelSize.value, extra["px"])
+        if "valign" in extra:
+            fmt.setVerticalAlignment(QTextCharFormat.VerticalAlignment(extra["valign"]))
+    return fmt
+
+def parse_blocks(content):
+    """Lignes et blocs décodés d'un contenu compact (sans Qt : utilisable hors du thread Qt)."""
+    lines = compact_lines(content)
+    return lines, [json.loads(line) for line in lines]
+
+class DocumentBuilder:
+    """Ajoute des blocs compacts à la fin d'un document, en une ou plusieurs fois."""
+
+    def __init__(self, doc):
+        self.doc = doc
+        self.count = 0
+        self.formats = {}
+        self.lists = {}
+
+    def append(self, lines, blocks):
+        doc = self.doc
+        first = self.count
+        cursor = QTextCursor(doc)
+        cursor.movePosition(QTextCursor.MoveOperation.End)
+        cursor.beginEditBlock()
+        for block in blocks:
+            if self.count:
+                cursor.insertBlock(QTextBlockFormat(), QTextCharFormat())
+            self.count += 1
+            for run in block[1:]:
+                attributes = run[1:]
+                # Les attributs étendus (dict) ne sont pas hachables : clé JSON
+                key = encode_json(attributes) if len(attributes) > 3 else tuple(attributes)
+                fmt = self.formats.get(key)
+                if fmt is None:
+                    fmt = self.formats[key] = _char_format(*attributes)
+                cursor.insertText(run[0], fmt)
+
+            list_info = block[0]
+            if list_info:
+                style, indent, number = list_info
+                text_list = self.lists.get(number)
+                if text_list is None:
+                    list_fmt = QTextListFormat()
+                    list_fmt.setStyle(LIST_STYLES_BY_NAME.get(style, QTextListFormat.Style.ListDisc))
+                    list_fmt.setIndent(indent)
+                    self.lists[number] = cursor.createList(list_fmt)
+                else:
+                    text_list.add(cursor.block())
+        cursor.endEditBlock()
+
+        # Les lignes lues sont déjà la sérialisation des blocs : elles amorcent le cache,
+        # la première sauvegarde n'a rien à réencoder.
+        _block_cache(doc)
+        text_block = doc.findBlockByNumber(first)
+        for line, block in zip(lines, blocks):
+            head = "[" + encode_json(block[0])
+            if line.startswith(head):
+                text_block.setUserData(_BlockRuns(line[len(head) + 1:-1]))
+            text_block = text_block.next()
+
+def decode_into(doc, content):
+    """Remplace le contenu de `doc` par un document au format compact."""
+    lines, blocks = parse_blocks(content)
+    undo_enabled = doc.isUndoRedoEnabled()
+    doc.setUndoRedoEnabled(False)
+    doc.clear()
+    DocumentBuilder(doc).append(lines, blocks)
+    doc.setUndoRedoEnabled(undo_enabled)
+    doc.setModified(False)
+
+def new_document(text_edit, parent=None):
+    """Document vide, avec la police et les marges de celui de l'éditeur."""
+    previous = text_edit.document()
+    doc = QTextDocument(parent)
+    doc.setDefaultFont(previous.defaultFont())
+    doc.setDocumentMargin(previous.documentMargin())
+    return doc
+
+def install_document(text_edit, doc):
+    """Remplace le document de l'éditeur.
+
+    Le document remplacé n'est détruit par Qt que s'il est celui créé par l'éditeur.
+    """
+    previous = text_edit.document()
+    owned = previous.parent() is text_edit
+    doc.setParent(text_edit)
+    # L'éditeur signale tout le document comme modifié pour le mettre en page : le
+    # contenu, lui, n'a pas changé et le cache des blocs reste valable
+    cache = doc.findChild(BlockCache)
+    if cache is not None:
+        cache.paused = True
+    text_edit.setDocument(doc)
+    if cache is not None:
+        cache.paused = False
+    if owned:
+        previous.deleteLater()
@@ -9,6 +9,10 @@ class RichTextEdit(QTextEdit):
         self.setTabChangesFocus(False) # Important pour gérer la tabulation nous-mêmes
 
     def keyPressEvent(self, event):
+        # Lecture seule (note en cours de chargement) : pas de réindentation des listes
+        if self.isReadOnly():
+            super().keyPressEvent(event)
+            return
         cursor = self.textCursor()
         
 
@@ -0,0 +1,143 @@
+import time
+from PyQt6.QtCore import QObject, QTimer, QEvent, Qt
+from PyQt6.QtGui import QWindow
+from PyQt6.QtWidgets import QApplication, QLineEdit, QTextEdit
+
+# Intervalles entre deux images (ms)
+FRAME_INTERVAL = 30         # cadence normale, environ 33 images/s
+TYPING_INTERVAL = 100       # un champ de saisie a le focus : le fond passe au second plan
+INACTIVE_INTERVAL = 250     # la fenêtre n'est pas au premier plan
+MAX_INTERVAL = 500
+# Part d'une image normale que le fond peut consommer : au-delà, la cadence baisse
+FRAME_BUDGET_MS = 8.0
+# Retard moyen du minuteur au-delà duquel le système est considéré comme chargé
+BUSY_LATENESS_MS = 20.0
+BUSY_INTERVAL = 120
+# Moyenne glissante des mesures (poids de la dernière image)
+SMOOTHING = 0.1
+# Rattrapage maximal après une image tardive ou une pause, en images normales
+MAX_STEP = 3.0
+
+class FrameScheduler(QObject):
+    """Cadence d'une animation : pause quand rien n'est visible, ralentissement sinon.
+
+    `callback(dt)` dessine une image ; `dt` est le temps écoulé depuis la précédente,
+    en nombre d'images normales, pour que la vitesse apparente ne dépende pas de la
+    cadence. Le coût mesuré de chaque image abaisse la cadence s'il dépasse le budget.
+    """
+
+    def __init__(self, widget, callback):
+        super().__init__(widget)
+        self.widget = widget
+        self.callback = callback
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self._tick)
+        # Raisons de pause en cours ("static", "hidden", "minimized", "occluded", ...)
+        self.paused = set() if widget.isVisible() else {"hidden"}
+        self.typing = False
+        self.frame_cost = 0.0
+        self.lateness = 0.0
+        self._last_tick = None
+        self._window = None
+
+        app = QApplication.instance()
+        app.focusChanged.connect(self._on_focus_changed)
+        app.applicationStateChanged.connect(self._reschedule)
+        widget.installEventFilter(self)
+
+    # --- Pauses ---
+
+    def pause(self, reason):
+        self.paused.add(reason)
+        self._reschedule()
+
+    def resume(self, reason):
+        if reason in self.paused:
+            self.paused.discard(reason)
+            self._reschedule()
+
+    def wake(self):
+        """Appelé à chaque affichage du widget : reprend après une occultation."""
+        if "occluded" in self.paused:
+            self.resume("occluded")
+
+    def is_running(self):
+        return self.timer.isActive()
+
+    # --- Cadence ---
+
+    def interval(self):
+        """Intervalle cible selon l'état de l'application et le coût des images."""
+        interval = FRAME_INTERVAL
+        if self.frame_cost > FRAME_BUDGET_MS:
+            interval = FRAME_INTERVAL * self.frame_cost / FRAME_BUDGET_MS
+        if self.lateness > BUSY_LATENESS_MS:
+            interval = max(interval, BUSY_INTERVAL)
+        if QApplication.applicationState() != Qt.ApplicationState.ApplicationActive:
+            interval = max(interval, INACTIVE_INTERVAL)
+        elif self.typing:
+            interval = max(interval, TYPING_INTERVAL)
+        return int(min(interval, MAX_INTERVAL))
+
+    def _reschedule(self, *args):
+        if self.paused:
+            self.timer.stop()
+            self._last_tick = None
+            return
+        interval = self.interval()
+        if not self.timer.isActive():
+            self.timer.start(interval)
+        elif self.timer.interval() != interval:
+            self.timer.setInterval(interval)
+
+    def _tick(self):
+        window = self.widget.window().windowHandle()
+        if window is not None and not window.isExposed():
+            # Fenêtre entièrement masquée : plus rien à peindre jusqu'au prochain affichage
+            self.pause("occluded")
+            return
+
+        now = time.perf_counter()
+        if self._last_tick is None:
+            dt = 1.0
+        else:
+            elapsed = (now - self._last_tick) * 1000
+            late = max(0.0, elapsed - self.timer.interval())
+            self.lateness += (late - self.lateness) * SMOOTHING
+            dt = min(elapsed / FRAME_INTERVAL, MAX_STEP)
+        self._last_tick = now
+
+        self.callback(dt)
+        cost = (time.perf_counter() - now) * 1000
+        self.frame_cost += (cost - self.frame_cost) * SMOOTHING
+        self._reschedule()
+
+    # --- Événements ---
+
+    def _on_focus_changed(self, old, new):
+        typing = isinstance(new, (QTextEdit, QLineEdit))
+        if typing != self.typing:
+            self.typing = typing
+            self._reschedule()
+
+    def _on_visibility_changed(self, visibility):
+        if visibility in (QWindow.Visibility.Hidden, QWindow.Visibility.Minimized):
+            self.pause("minimized")
+        else:
+            self.resume("minimized")
+            self.wake()
+
+    def eventFilter(self, obj, event):
+        if obj is self.widget:
+            if event.type() == QEvent.Type.Show:
+                self._watch_window()
+                self.resume("hidden")
+            elif event.type() == QEvent.Type.Hide:
+                self.pause("hidden")
+        return False
+
+    def _watch_window(self):
+        window = self.widget.window().windowHandle()
+        if window is not None and window is not self._window:
+            self._window = window
+            window.visibilityChanged.connect(self._on_visibility_changed)
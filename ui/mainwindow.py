@@ -1,36 +1,100 @@
 from PyQt6.QtWidgets import (QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, 
                              QLabel, QPushButton, QStackedWidget, QMessageBox, 
-                             QLineEdit, QTableWidget, QTableWidgetItem, QHeaderView, 
-                             QMenu, QFrame, QGraphicsDropShadowEffect, QColorDialog)
-from PyQt6.QtCore import Qt, QSize, QSettings, QTimer
-from PyQt6.QtGui import QIcon, QAction, QColor, QFont, QTextListFormat
+                             QLineEdit, QTableView, QAbstractItemView, QHeaderView, 
+                             QMenu, QFrame, QColorDialog,
+                             QFileDialog, QProgressDialog)
+from PyQt6.QtCore import Qt, QSize, QSettings, QTimer, pyqtSignal
+from PyQt6.QtGui import QIcon, QAction, QFont, QTextListFormat
 from ui.background import AnimatedBackground
 from ui.editor_widget import RichTextEdit
 from ui.toast import Toast
 from ui.content_container import ContentContainer
+from ui.themes import THEMES, stylesheet
+from ui.save_worker import SaveWorker
+from ui.notes_model import NotesTableModel
+from ui.doc_format import encode_document
+from ui.transfer_worker import TransferWorker
+from ui.perf_overlay import PerfOverlay
+from ui.note_loader import NoteLoader
 from database import NoteManager
+import tracing
+import transfer
+import datetime
+import hashlib
+import itertools
 import os
 
 class MainWindow(QMainWindow):
-    def __init__(self):
+    # Relaie vers le thread Qt les notifications émises par NoteManager depuis le thread d'écriture
+    note_changed = pyqtSignal(str, int, object)
+
+    @tracing.traced("MainWindow.__init__")
+    def __init__(self, db_name="notes.db"):
         super().__init__()
         self.setWindowTitle("NoteBlock")
         
         self.settings = QSettings("MyCompany", "FuturisticNotes")
         
-        self.db = NoteManager()
+        # Ouverture paresseuse : le schéma n'est vérifié qu'après le premier affichage
+        self.db = NoteManager(db_name, lazy=True)
+        self.db.add_listener(self.note_changed.emit)
+        # Schéma migré dans le thread d'écriture (voir finish_startup)
+        self.db_ready = False
+        self.migration_count = 0
         self.current_note_id = None
-        
-
+        # Clé identifiant la note en cours d'édition dans la file d'écriture
+        self._new_note_keys = itertools.count()
+        self.edit_key = None
+
+        self.saver = SaveWorker(self.db, self)
+        self.saver.saved.connect(self.on_note_saved)
+        self.saver.deleted.connect(self.on_note_deleted)
+        self.saver.failed.connect(self.on_save_failed)
+        self.saver.maintenance_failed.connect(
+            lambda message: Toast(self, f"Tâche de fond interrompue : {message}", self.is_dark_theme))
+        self.saver.start()
+        self.transfer_worker = None
+
+        # Ouverture des notes : lecture dans un thread, affichage progressif
+        self.note_loader = NoteLoader(self.db, self)
+        self.note_loader.opened.connect(self.on_note_opened)
+        self.note_loader.progressed.connect(self.on_note_load_progress)
+        self.note_loader.finished.connect(self.on_note_loaded)
+        self.note_loader.missing.connect(self.on_note_missing)
+        self.note_loader.failed.connect(self.on_note_load_failed)
+        self.note_loader.history.connect(self.on_history_read)
+        self.note_changed.connect(self.note_loader.cache.on_note_changed)
+        self.note_changed.connect(self.on_note_changed)
+        # Version (id, updated_ms) du contenu affiché, (id, None) tant que sa sauvegarde
+        # n'est pas confirmée : un document à jour peut être gardé en cache à la sortie
+        self.doc_stamp = None
+        # Le chargement en cours est celui d'une révision (menu Historique)
+        self.loading_revision = False
+
+        # Empreinte du dernier état écrit : l'auto-save ignore les contenus inchangés
+        self.saved_hash = None
+        self.saved_meta = None
+
+        # Filet de sécurité : une frappe continue est tout de même sauvegardée toutes les 30s
         self.autosave_timer = QTimer(self)
         self.autosave_timer.setInterval(30000)
         self.autosave_timer.timeout.connect(self.auto_save)
+
+        # Sauvegarde principale : 2s après la dernière frappe
+        self.autosave_debounce = QTimer(self)
+        self.autosave_debounce.setSingleShot(True)
+        self.autosave_debounce.setInterval(2000)
+        self.autosave_debounce.timeout.connect(self.auto_save)
         
+        self.icons = {}
+        self.perf_overlay = None
         self.central_widget = QWidget()
         self.setCentralWidget(self.central_widget)
         
         self.background = AnimatedBackground(self.central_widget)
         self.background.lower() 
+        # L'animation attend la fin du démarrage (voir finish_startup)
+        self.background.scheduler.pause("startup")
         
         self.main_layout = QVBoxLayout(self.central_widget)
         self.main_layout.setContentsMargins(0, 0, 0, 0)
@@ -40,19 +104,101 @@ class MainWindow(QMainWindow):
         
         self.stack = QStackedWidget()
         self.main_layout.addWidget(self.stack)
-        
-        self.home_page = self.create_home_page()
-        self.list_page = self.create_list_page()
-        self.editor_page = self.create_editor_page()
-        self.about_page = self.create_about_page()
-        
-        self.stack.addWidget(self.home_page)
-        self.stack.addWidget(self.list_page)
-        self.stack.addWidget(self.editor_page)
-        self.stack.addWidget(self.about_page)
+
+        # Pages construites à la première visite (voir page())
+        self.page_builders = {
+            "home": self.create_home_page,
+            "list": self.create_list_page,
+            "editor": self.create_editor_page,
+            "about": self.create_about_page,
+        }
+        self.pages = {}
+        # Widgets dont l'apparence suit le thème, au fur et à mesure de leur création
+        self.cards = []
+        self.toggle_buttons = []
         
         self.load_settings()
         self.apply_theme()
+        self.show_page("home")
+        self.startup_pending = True
+
+    def page(self, name):
+        """Page `name` ("home", "list", "editor", "about"), construite au premier appel."""
+        page = self.pages.get(name)
+        if page is None:
+            page = self.pages[name] = self.page_builders[name]()
+            self.stack.addWidget(page)
+        return page
+
+    def show_page(self, name):
+        if name != "editor":
+            # Quitter l'éditeur abandonne la note en cours de chargement
+            self.cancel_note_load()
+        self.stack.setCurrentWidget(self.page(name))
+
+    def is_page_shown(self, name):
+        page = self.pages.get(name)
+        return page is not None and self.stack.currentWidget() is page
+
+    def paintEvent(self, event):
+        super().paintEvent(event)
+        if self.startup_pending:
+            # Le reste du démarrage attend que la première image soit peinte
+            self.startup_pending = False
+            QTimer.singleShot(0, self.finish_startup)
+
+    def finish_startup(self):
+        """Travail non urgent, repoussé après le premier affichage de la fenêtre."""
+        # Migrations du schéma dans le thread d'écriture (après une mise à jour, la reprise
+        # des anciennes notes peut durer) ; la liste et la recherche attendent la fin
+        self.saver.migration_progressed.connect(self.on_migration_progress)
+        self.saver.migrated.connect(self.on_db_ready)
+        self.saver.migration_failed.connect(self.on_migration_failed)
+        self.saver.submit_migration(self.db.migrate())
+        self.background.scheduler.resume("startup")
+
+    def on_migration_progress(self, count):
+        self.migration_count = count
+        self.update_db_label()
+
+    def on_db_ready(self):
+        self.db_ready = True
+        self.update_db_label()
+        # Passe unique : compresse en arrière-plan les notes enregistrées avant la compression
+        self.saver.submit_maintenance(self.db.compress_legacy_rows())
+        # La liste est préparée à l'itération suivante, pour garder la fenêtre réactive
+        QTimer.singleShot(0, self.preload_notes_list)
+
+    def on_migration_failed(self, message):
+        Toast(self, f"Échec de la mise à jour de la base : {message}", self.is_dark_theme)
+
+    def update_db_label(self):
+        if not hasattr(self, "db_label"):
+            return
+        if self.db_ready:
+            self.db_label.hide()
+            return
+        text = "Mise à jour de la base…"
+        if self.migration_count:
+            text += f" {self.migration_count} lignes traitées"
+        self.db_label.setText(text)
+        self.db_label.show()
+
+    def db_busy(self):
+        """Vrai (avec un message) tant que les migrations ou la compression des anciennes
+        notes ne sont pas finies : imports et exports attendent la fin."""
+        busy = not self.db_ready or self.saver.has_maintenance()
+        if busy:
+            Toast(self, "Mise à jour de la base en cours…", self.is_dark_theme)
+        return busy
+
+    def preload_notes_list(self):
+        """Construit la liste et charge sa première page avant la première visite."""
+        self.page("list")
+        if not self.notes_model.loaded:
+            self.refresh_notes_list()
+            if self.notes_model.canFetchMore():
+                self.notes_model.fetchMore()
 
     def load_settings(self):
         geometry = self.settings.value("geometry")
@@ -64,13 +210,21 @@ class MainWindow(QMainWindow):
         self.is_dark_theme = self.settings.value("dark_theme", False, type=bool)
         self.auto_save_enabled = self.settings.value("auto_save", False, type=bool)
         self.static_mode_enabled = self.settings.value("static_mode", False, type=bool)
+        self.threaded_background_enabled = self.settings.value("threaded_background", False, type=bool)
+        self.perf_overlay_enabled = self.settings.value("perf_overlay", False, type=bool)
         
         if hasattr(self, 'action_autosave'):
             self.action_autosave.setChecked(self.auto_save_enabled)
         if hasattr(self, 'action_static'):
             self.action_static.setChecked(self.static_mode_enabled)
+        if hasattr(self, 'action_threaded'):
+            self.action_threaded.setChecked(self.threaded_background_enabled)
+        if hasattr(self, 'action_perf'):
+            self.action_perf.setChecked(self.perf_overlay_enabled)
             
         self.update_static_mode()
+        self.update_threaded_background()
+        self.update_perf_overlay()
         self.update_autosave()
 
     def closeEvent(self, event):
@@ -78,6 +232,21 @@ class MainWindow(QMainWindow):
         self.settings.setValue("dark_theme", self.is_dark_theme)
         self.settings.setValue("auto_save", self.auto_save_enabled)
         self.settings.setValue("static_mode", self.static_mode_enabled)
+        self.settings.setValue("threaded_background", self.threaded_background_enabled)
+        self.settings.setValue("perf_overlay", self.perf_overlay_enabled)
+        # Modifications des 2 dernières secondes : sauvegardées avant l'arrêt du SaveWorker
+        if self.autosave_debounce.isActive():
+            self.autosave_debounce.stop()
+            self.auto_save()
+        self.background.set_threaded(False)
+        self.note_loader.stop()
+        if "list" in self.pages:
+            self.notes_model.stop()
+        if self.transfer_worker is not None:
+            self.transfer_worker.cancel()
+            self.transfer_worker.wait()
+        self.saver.stop()
+        self.db.close()
         super().closeEvent(event)
 
     def resizeEvent(self, event):
@@ -88,8 +257,16 @@ class MainWindow(QMainWindow):
     def get_icon_path(self, icon_name):
         return os.path.join("Asset", "ICON", icon_name)
 
+    def icon(self, icon_name):
+        """Icône chargée une seule fois, puis partagée."""
+        icon = self.icons.get(icon_name)
+        if icon is None:
+            icon = self.icons[icon_name] = QIcon(self.get_icon_path(icon_name))
+        return icon
+
     def create_header(self):
         header_widget = QWidget()
+        header_widget.setObjectName("Header")
         header_widget.setFixedHeight(70)
         header_layout = QHBoxLayout(header_widget)
         header_layout.setContentsMargins(30, 0, 30, 0)
@@ -108,7 +285,7 @@ class MainWindow(QMainWindow):
         self.settings_btn.setIconSize(QSize(24, 24))
         
         self.settings_menu = QMenu(self)
-        self.action_autosave = QAction("Sauvegarde Auto (30s)", self)
+        self.action_autosave = QAction("Sauvegarde Auto (2 s après la saisie)", self)
         self.action_autosave.setCheckable(True)
         self.action_autosave.triggered.connect(self.toggle_autosave)
         self.settings_menu.addAction(self.action_autosave)
@@ -117,6 +294,24 @@ class MainWindow(QMainWindow):
         self.action_static.setCheckable(True)
         self.action_static.triggered.connect(self.toggle_static_mode)
         self.settings_menu.addAction(self.action_static)
+
+        self.action_threaded = QAction("Fond rendu en arrière-plan", self)
+        self.action_threaded.setCheckable(True)
+        self.action_threaded.triggered.connect(self.toggle_threaded_background)
+        self.settings_menu.addAction(self.action_threaded)
+
+        self.action_perf = QAction("Panneau de performances", self)
+        self.action_perf.setCheckable(True)
+        self.action_perf.triggered.connect(self.toggle_perf_overlay)
+        self.settings_menu.addAction(self.action_perf)
+
+        transfer_menu = self.settings_menu.addMenu("Import / Export")
+        transfer_menu.addAction("Importer une archive JSON Lines…", self.import_jsonl)
+        transfer_menu.addAction("Importer un dossier (Markdown / HTML)…", self.import_folder)
+        transfer_menu.addSeparator()
+        transfer_menu.addAction("Exporter en JSON Lines…", self.export_jsonl)
+        transfer_menu.addAction("Exporter en Markdown…", lambda: self.export_folder("md"))
+        transfer_menu.addAction("Exporter en HTML…", lambda: self.export_folder("html"))
         
         self.settings_btn.setMenu(self.settings_menu)
         header_layout.addWidget(self.settings_btn)
@@ -151,17 +346,39 @@ class MainWindow(QMainWindow):
                 self.autosave_timer.start()
         else:
             self.autosave_timer.stop()
+            self.autosave_debounce.stop()
+
+    def on_editor_changed(self):
+        if self.auto_save_enabled:
+            self.autosave_debounce.start()
+
+    def note_hash(self, title, content, status):
+        return hashlib.blake2b(f"{title}\0{status}\0{content}".encode("utf-8"), digest_size=16).digest()
+
+    def mark_clean(self, title, content, status):
+        """Mémorise l'état écrit (ou chargé) pour détecter les modifications suivantes."""
+        self.saved_hash = self.note_hash(title, content, status) if content is not None else None
+        self.saved_meta = (title, status)
+        self.text_edit.document().setModified(False)
+
+    def is_dirty(self):
+        meta = (self.title_edit.text(), self.current_status)
+        return self.text_edit.document().isModified() or meta != self.saved_meta
 
+    @tracing.traced("MainWindow.auto_save")
     def auto_save(self):
-        if self.stack.currentWidget() == self.editor_page:
-            title = self.title_edit.text()
-            if title:
-                content = self.text_edit.toHtml()
-                if self.current_note_id is None:
-                    self.db.add_note(title, content, self.current_status)
-                else:
-                    self.db.update_note(self.current_note_id, title, content, self.current_status)
-                print("Auto-save effectué")
+        if not self.is_page_shown("editor") or self.note_loader.is_loading():
+            return
+        title = self.title_edit.text()
+        if not title or not self.is_dirty():
+            return
+        content = encode_document(self.text_edit.document())
+        digest = self.note_hash(title, content, self.current_status)
+        if digest != self.saved_hash:
+            self.saver.submit_save(self.edit_key, self.current_note_id, title, content,
+                                   self.current_status, manual=False)
+            self.mark_saving()
+        self.mark_clean(title, content, self.current_status)
 
     def toggle_static_mode(self):
         self.static_mode_enabled = self.action_static.isChecked()
@@ -171,123 +388,55 @@ class MainWindow(QMainWindow):
     def update_static_mode(self):
         self.background.set_static_mode(self.static_mode_enabled)
 
-    def apply_theme(self):
-        if self.is_dark_theme:
-            self.theme_btn.setIcon(QIcon(self.get_icon_path("wht_sun.png")))
-            self.settings_btn.setIcon(QIcon(self.get_icon_path("wht_setting.png")))
-            
-            text_color = "#E3E3E3"
-            header_bg = "#121212"
-            
-            container_bg = "#1E1E1E"
-            
-            self.btn_bg_color = "#2D2D2D"
-            self.btn_hover_color = "#3D3D3D"
-            self.toolbar_checked_color = "#5A5A5A"
-            
-            btn_checked = "#0D47A1"
-            menu_bg = "#2D2D2D"
-            shadow_color = QColor(0, 0, 0, 150)
-        else:
-            self.theme_btn.setIcon(QIcon(self.get_icon_path("BLK_moon.png")))
-            self.settings_btn.setIcon(QIcon(self.get_icon_path("blk_setting.png")))
-            
-            text_color = "#1F1F1F"
-            header_bg = "#F5F7FA"
-            
-            container_bg = "#E8F0FE" 
-            
-            self.btn_bg_color = "#FFFFFF"
-            self.btn_hover_color = "#D2E3FC"
-            self.toolbar_checked_color = "#AECBFA"
-            
-            btn_checked = "#AECBFA"
-            menu_bg = "#FFFFFF"
-            shadow_color = QColor(0, 0, 0, 40)
+    def toggle_threaded_background(self):
+        self.threaded_background_enabled = self.action_threaded.isChecked()
+        self.update_threaded_background()
 
-        self.background.set_theme(self.is_dark_theme)
-        self.header_widget.setStyleSheet(f"background-color: {header_bg}; border-bottom: none;")
+    def update_threaded_background(self):
+        self.background.set_threaded(self.threaded_background_enabled)
 
-        for widget in [self.home_container, self.list_container, self.about_container, self.editor_container]:
-            self.add_shadow(widget)
-            widget.set_shadow_color(shadow_color)
-            widget.setStyleSheet(f"background-color: {container_bg}; border-radius: 24px;")
+    def toggle_perf_overlay(self):
+        self.perf_overlay_enabled = self.action_perf.isChecked()
+        self.update_perf_overlay()
 
-        style = f"""
-            QWidget {{ color: {text_color}; }}
-            QLabel {{ color: {text_color}; }}
-            
-            QPushButton {{
-                background-color: {self.btn_bg_color};
-                color: {text_color};
-                border: none;
-            }}
-            QPushButton:hover {{
-                background-color: {self.btn_hover_color};
-            }}
-            
-            QPushButton#IconBtn {{
-                background-color: transparent;
-                border: none;
-            }}
-            QPushButton#IconBtn:hover {{
-                background-color: {self.btn_hover_color};
-                border-radius: 22px;
-            }}
-            
-            QPushButton:checked {{
-                background-color: {btn_checked};
-            }}
-            
-            QPushButton#PrimaryBtn {{
-                background-color: {self.btn_bg_color};
-                color: {text_color};
-                border: 2px solid {text_color};
-                font-weight: bold;
-            }}
-            QPushButton#PrimaryBtn:hover {{
-                background-color: {self.btn_hover_color};
-                border: 2px solid {text_color};
-            }}
-            
-            #ContentContainer {{
-                background-color: {container_bg};
-                border: none;
-            }}
-            
-            QTextEdit, QLineEdit {{
-                background-color: transparent;
-                color: {text_color};
-                selection-background-color: #1A73E8;
-                selection-color: white;
-            }}
-            
-            QMenu {{
-                background-color: {menu_bg};
-                color: {text_color};
-                border: 1px solid {self.btn_hover_color};
-            }}
-            QMenu::item:selected {{
-                background-color: {self.btn_hover_color};
-            }}
-            
-            QPushButton#ToolBtn {{
-                border-radius: 8px;
-                padding: 5px;
-                min-width: 32px;
-                font-weight: bold;
-            }}
-        """
-        self.setStyleSheet(style)
-        self.update_toolbar_state()
+    def update_perf_overlay(self):
+        if self.perf_overlay is None:
+            if not self.perf_overlay_enabled:
+                return
+            # Construit à la première utilisation : sans coût pour qui ne l'ouvre jamais
+            self.perf_overlay = PerfOverlay(self.central_widget, self.editor_document, self.is_dark_theme)
+        self.perf_overlay.setVisible(self.perf_overlay_enabled)
 
-    def add_shadow(self, widget):
-        if widget.graphicsEffect() is None:
-            shadow = QGraphicsDropShadowEffect()
-            shadow.setBlurRadius(30)
-            shadow.setOffset(0, 8)
-            shadow.setColor(QColor(0, 0, 0, 50))
-            widget.setGraphicsEffect(shadow)
+    def editor_document(self):
+        """Document en cours d'édition (panneau de performances), ou None."""
+        return self.text_edit.document() if self.is_page_shown("editor") else None
+
+    @tracing.traced("MainWindow.apply_theme")
+    def apply_theme(self):
+        theme = THEMES[self.is_dark_theme]
+        self.theme_btn.setIcon(self.icon(theme["theme_icon"]))
+        self.settings_btn.setIcon(self.icon(theme["settings_icon"]))
+
+        self.background.set_theme(self.is_dark_theme)
+        if self.perf_overlay is not None:
+            self.perf_overlay.set_theme(self.is_dark_theme)
+        for card in self.cards:
+            self.style_card(card)
+        for button in self.toggle_buttons:
+            button.setStyleSheet(stylesheet("toggle_button", self.is_dark_theme))
+
+        # Feuilles compilées une fois par thème (style/theme.qss compris)
+        self.setStyleSheet(stylesheet("window", self.is_dark_theme))
+
+    def add_card(self, container):
+        """Enregistre une carte de page : l'ombre (créée par ContentContainer) et les
+        couleurs suivent le thème courant."""
+        self.cards.append(container)
+        self.style_card(container)
+
+    def style_card(self, container):
+        container.set_shadow_color(THEMES[self.is_dark_theme]["shadow_color"])
+        container.setStyleSheet(stylesheet("container", self.is_dark_theme))
 
     # --- PAGES ---
 
@@ -326,7 +475,7 @@ class MainWindow(QMainWindow):
         btn_about = QPushButton("À propos")
         btn_about.setFixedSize(220, 55)
         btn_about.setCursor(Qt.CursorShape.PointingHandCursor)
-        btn_about.clicked.connect(lambda: self.stack.setCurrentWidget(self.about_page))
+        btn_about.clicked.connect(lambda: self.show_page("about"))
         
         box_layout.addWidget(btn_add)
         box_layout.addWidget(btn_list)
@@ -334,7 +483,7 @@ class MainWindow(QMainWindow):
         
         self.home_container = ContentContainer(content_widget)
         self.home_container.setFixedSize(500, 500)
-        self.add_shadow(self.home_container)
+        self.add_card(self.home_container)
         
         layout.addWidget(self.home_container)
         return page
@@ -355,21 +504,45 @@ class MainWindow(QMainWindow):
         top_layout.addStretch()
         
         btn_back = QPushButton()
-        btn_back.setIcon(QIcon(self.get_icon_path("left-arrow.png")))
+        btn_back.setIcon(self.icon("left-arrow.png"))
         btn_back.setFixedSize(45, 45)
         btn_back.setCursor(Qt.CursorShape.PointingHandCursor)
         btn_back.clicked.connect(self.go_back_home)
         top_layout.addWidget(btn_back)
         box_layout.addLayout(top_layout)
-        
-        self.notes_table = QTableWidget()
-        self.notes_table.setColumnCount(4)
-        self.notes_table.setHorizontalHeaderLabels(["Titre", "Date", "Statut", "ID"])
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("Rechercher dans les notes…")
+        self.search_edit.setClearButtonEnabled(True)
+        self.search_edit.setStyleSheet("background: rgba(128, 128, 128, 0.1); border-radius: 12px;")
+        box_layout.addWidget(self.search_edit)
+
+        # Recherche à la frappe, regroupée sur une courte pause pour ne pas requêter à chaque touche
+        self.search_timer = QTimer(self)
+        self.search_timer.setSingleShot(True)
+        self.search_timer.setInterval(120)
+        self.search_timer.timeout.connect(self.refresh_notes_list)
+        self.search_edit.textChanged.connect(self.search_timer.start)
+
+        # Pendant les migrations de démarrage, la liste reste vide (voir on_db_ready)
+        self.db_label = QLabel()
+        self.db_label.setStyleSheet("background: transparent;")
+        box_layout.addWidget(self.db_label)
+        self.update_db_label()
+        
+        self.notes_model = NotesTableModel(self.db, parent=self)
+        self.notes_model.search_failed.connect(
+            lambda message: Toast(self, f"Échec de la recherche : {message}", self.is_dark_theme))
+        self.note_changed.connect(self.notes_model.apply_change)
+        self.notes_table = QTableView()
+        self.notes_table.setModel(self.notes_model)
         self.notes_table.horizontalHeader().setSectionResizeMode(0, QHeaderView.ResizeMode.Stretch)
-        self.notes_table.setColumnHidden(3, True)
-        self.notes_table.setSelectionBehavior(QTableWidget.SelectionBehavior.SelectRows)
-        self.notes_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.notes_table.setSelectionBehavior(QAbstractItemView.SelectionBehavior.SelectRows)
+        self.notes_table.setSelectionMode(QAbstractItemView.SelectionMode.SingleSelection)
+        self.notes_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         self.notes_table.setShowGrid(False)
+        # Hauteur de ligne fixe : la vue n'a pas à mesurer chaque ligne chargée
+        self.notes_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
         self.notes_table.verticalHeader().setVisible(False)
         self.notes_table.doubleClicked.connect(self.open_selected_note)
         box_layout.addWidget(self.notes_table)
@@ -383,7 +556,7 @@ class MainWindow(QMainWindow):
         box_layout.addLayout(action_layout)
         
         self.list_container = ContentContainer(content_widget)
-        self.add_shadow(self.list_container)
+        self.add_card(self.list_container)
         
         layout.addWidget(self.list_container)
         return page
@@ -401,7 +574,7 @@ class MainWindow(QMainWindow):
         header_layout = QHBoxLayout()
         
         btn_back = QPushButton()
-        btn_back.setIcon(QIcon(self.get_icon_path("left-arrow.png")))
+        btn_back.setIcon(self.icon("left-arrow.png"))
         btn_back.setFixedSize(45, 45)
         btn_back.setCursor(Qt.CursorShape.PointingHandCursor)
         btn_back.clicked.connect(self.go_back_home)
@@ -420,6 +593,14 @@ class MainWindow(QMainWindow):
         self.status_menu.addAction("Terminé", lambda: self.set_status("Terminé"))
         self.btn_status.setMenu(self.status_menu)
         header_layout.addWidget(self.btn_status)
+
+        btn_history = QPushButton("Historique")
+        btn_history.setFixedSize(130, 40)
+        btn_history.setCursor(Qt.CursorShape.PointingHandCursor)
+        self.history_menu = QMenu(self)
+        self.history_menu.aboutToShow.connect(self.populate_history_menu)
+        btn_history.setMenu(self.history_menu)
+        header_layout.addWidget(btn_history)
         
         btn_save = QPushButton("Sauvegarder")
         btn_save.setObjectName("PrimaryBtn")
@@ -456,6 +637,10 @@ class MainWindow(QMainWindow):
         btn_color.setFixedSize(36, 36)
         btn_color.clicked.connect(self.choose_text_color)
         
+        self.toggle_buttons = [self.btn_bold, self.btn_italic, self.btn_underline]
+        for button in self.toggle_buttons:
+            button.setStyleSheet(stylesheet("toggle_button", self.is_dark_theme))
+
         toolbar_layout.addWidget(self.btn_bold)
         toolbar_layout.addWidget(self.btn_italic)
         toolbar_layout.addWidget(self.btn_underline)
@@ -477,6 +662,11 @@ class MainWindow(QMainWindow):
         toolbar_layout.addWidget(btn_list_menu)
         
         toolbar_layout.addStretch()
+
+        # Progression du chargement d'une longue note
+        self.load_label = QLabel()
+        self.load_label.hide()
+        toolbar_layout.addWidget(self.load_label)
         content_layout.addLayout(toolbar_layout)
         
         line = QFrame()
@@ -488,10 +678,12 @@ class MainWindow(QMainWindow):
         
         self.text_edit = RichTextEdit()
         self.text_edit.cursorPositionChanged.connect(self.update_toolbar_state)
+        self.text_edit.textChanged.connect(self.on_editor_changed)
+        self.title_edit.textChanged.connect(self.on_editor_changed)
         content_layout.addWidget(self.text_edit)
         
         self.editor_container = ContentContainer(content_widget)
-        self.add_shadow(self.editor_container)
+        self.add_card(self.editor_container)
         
         layout.addWidget(self.editor_container)
         return page
@@ -523,115 +715,303 @@ class MainWindow(QMainWindow):
         
         self.about_container = ContentContainer(content_widget)
         self.about_container.setFixedSize(500, 300)
-        self.add_shadow(self.about_container)
+        self.add_card(self.about_container)
         
         layout.addWidget(self.about_container)
         return page
 
-    def update_button_style(self, button, is_checked):
-        if is_checked:
-            button.setStyleSheet(f"background-color: {self.toolbar_checked_color};")
-        else:
-            button.setStyleSheet(f"background-color: {self.btn_bg_color};")
-
     def toggle_bold(self, checked):
         self.text_edit.setFontWeight(QFont.Weight.Bold if checked else QFont.Weight.Normal)
-        self.update_button_style(self.btn_bold, checked)
         self.text_edit.setFocus()
 
     def toggle_italic(self, checked):
         self.text_edit.setFontItalic(checked)
-        self.update_button_style(self.btn_italic, checked)
         self.text_edit.setFocus()
 
     def toggle_underline(self, checked):
         self.text_edit.setFontUnderline(checked)
-        self.update_button_style(self.btn_underline, checked)
         self.text_edit.setFocus()
 
     def update_toolbar_state(self):
+        # L'apparence suit l'état coché (:checked dans la feuille du thème) : aucun
+        # setStyleSheet à chaque déplacement du curseur
         fmt = self.text_edit.currentCharFormat()
-        
-        is_bold = fmt.fontWeight() == QFont.Weight.Bold
-        self.btn_bold.setChecked(is_bold)
-        self.update_button_style(self.btn_bold, is_bold)
-        
-        is_italic = fmt.fontItalic()
-        self.btn_italic.setChecked(is_italic)
-        self.update_button_style(self.btn_italic, is_italic)
-        
-        is_underline = fmt.fontUnderline()
-        self.btn_underline.setChecked(is_underline)
-        self.update_button_style(self.btn_underline, is_underline)
+        self.btn_bold.setChecked(fmt.fontWeight() == QFont.Weight.Bold)
+        self.btn_italic.setChecked(fmt.fontItalic())
+        self.btn_underline.setChecked(fmt.fontUnderline())
 
     def go_back_home(self):
-        self.stack.setCurrentWidget(self.home_page)
+        if self.auto_save_enabled:
+            self.autosave_debounce.stop()
+            self.auto_save()
+        self.show_page("home")
 
     def start_new_note(self):
+        self.page("editor")
+        self.cancel_note_load()
+        self.release_note_document()
         self.current_note_id = None
+        self.edit_key = ("new", next(self._new_note_keys))
         self.title_edit.clear()
         self.text_edit.clear()
         self.set_status("En cours")
-        self.stack.setCurrentWidget(self.editor_page)
+        self.mark_clean("", None, self.current_status)
+        self.show_page("editor")
 
     def show_notes_list(self):
-        self.refresh_notes_list()
-        self.stack.setCurrentWidget(self.list_page)
+        # La liste est tenue à jour par les notifications : un seul chargement initial
+        self.page("list")
+        if not self.notes_model.loaded:
+            self.refresh_notes_list()
+        self.show_page("list")
 
     def refresh_notes_list(self):
-        self.notes_table.setRowCount(0)
-        notes = self.db.get_all_notes()
-        for row_idx, (note_id, title, date, status) in enumerate(notes):
-            self.notes_table.insertRow(row_idx)
-            self.notes_table.setItem(row_idx, 0, QTableWidgetItem(title))
-            self.notes_table.setItem(row_idx, 1, QTableWidgetItem(date))
-            self.notes_table.setItem(row_idx, 2, QTableWidgetItem(status))
-            self.notes_table.setItem(row_idx, 3, QTableWidgetItem(str(note_id)))
+        if not self.db_ready:
+            return
+        self.notes_model.set_query(self.search_edit.text())
+
+    def selected_note_id(self):
+        selected = self.notes_table.selectionModel().selectedRows()
+        if not selected:
+            return None
+        return self.notes_model.note_id(selected[0].row())
 
     def open_selected_note(self):
-        selected = self.notes_table.selectedItems()
-        if not selected: return
-        row = selected[0].row()
-        note_id = int(self.notes_table.item(row, 3).text())
-        
-        note = self.db.get_note_content(note_id)
-        if note:
-            title, content, status = note
+        # Span plutôt que décorateur : PyQt passerait au slot les arguments du signal
+        with tracing.span("MainWindow.open_selected_note"):
+            note_id = self.selected_note_id()
+            if note_id is None: return
+
+            # L'éditeur s'affiche tout de suite ; la note y arrive au fil du chargement
+            self.page("editor")
+            self.cancel_note_load()
+            self.release_note_document()
             self.current_note_id = note_id
-            self.title_edit.setText(title)
-            self.text_edit.setHtml(content)
-            self.set_status(status)
-            self.stack.setCurrentWidget(self.editor_page)
+            self.edit_key = note_id
+            self.title_edit.clear()
+            self.note_loader.load(self.text_edit, note_id)
+            self.show_page("editor")
+
+    def on_note_opened(self, note_id, title, status):
+        self.title_edit.setText(title)
+        self.set_status(status)
+        self.mark_clean(title, None, status)
+
+    def on_note_load_progress(self, percent):
+        self.load_label.setText(f"Chargement… {percent} %")
+        self.load_label.show()
+
+    def on_note_loaded(self, note_id, stamp):
+        self.load_label.hide()
+        if self.loading_revision:
+            # La révision remplace la note à la prochaine sauvegarde
+            self.loading_revision = False
+            self.text_edit.document().setModified(True)
+            self.on_editor_changed()
+            Toast(self, "Révision chargée", self.is_dark_theme)
+            return
+        self.doc_stamp = (note_id, stamp)
+
+    def on_note_missing(self, note_id):
+        self.load_label.hide()
+        if self.reload_after_revision():
+            Toast(self, "Révision introuvable", self.is_dark_theme)
+            return
+        Toast(self, "Note introuvable", self.is_dark_theme)
+        self.show_notes_list()
+
+    def on_note_load_failed(self, note_id, message):
+        self.load_label.hide()
+        self.reload_after_revision()
+        Toast(self, f"Échec de l'ouverture : {message}", self.is_dark_theme)
+
+    def reload_after_revision(self):
+        """Révision illisible : l'éditeur, déjà vidé, reprend la note elle-même."""
+        if not self.loading_revision:
+            return False
+        self.loading_revision = False
+        self.note_loader.load(self.text_edit, self.current_note_id)
+        return True
+
+    def mark_saving(self):
+        """Le contenu affiché part en écriture : sa version sera celle de la notification."""
+        self.doc_stamp = (self.current_note_id, None) if self.current_note_id else None
+
+    def on_note_changed(self, kind, note_id, row):
+        if self.doc_stamp is None or self.doc_stamp[0] != note_id:
+            return
+        if kind == "updated" and self.doc_stamp[1] is None:
+            self.doc_stamp = (note_id, row[4])
+        else:
+            # Modifiée ailleurs (ou supprimée) : le contenu affiché n'est plus celui en base
+            self.doc_stamp = None
+
+    def release_note_document(self):
+        """Avant de remplacer le contenu de l'éditeur : garde en cache un document à jour."""
+        stamp, self.doc_stamp = self.doc_stamp, None
+        if (stamp is None or stamp[1] is None or stamp[0] != self.current_note_id
+                or self.note_loader.is_loading() or self.is_dirty()):
+            return
+        title, status = self.saved_meta
+        self.note_loader.release(self.text_edit, stamp[0], stamp[1], title, status)
+
+    def cancel_note_load(self):
+        self.loading_revision = False
+        if self.note_loader.is_loading():
+            self.note_loader.cancel()
+            self.load_label.hide()
 
     def delete_selected_note(self):
-        selected = self.notes_table.selectedItems()
-        if not selected: return
-        row = selected[0].row()
-        note_id = int(self.notes_table.item(row, 3).text())
+        note_id = self.selected_note_id()
+        if note_id is None: return
         
         confirm = QMessageBox.question(self, "Confirmer", "Supprimer ?", QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
         if confirm == QMessageBox.StandardButton.Yes:
-            self.db.delete_note(note_id)
-            self.refresh_notes_list()
-            Toast(self, "Note supprimée", self.is_dark_theme)
+            self.saver.submit_delete(note_id)
 
     def save_note(self):
-        title = self.title_edit.text()
-        content = self.text_edit.toHtml()
-        if not title:
-            QMessageBox.warning(self, "Erreur", "Titre requis")
+        with tracing.span("MainWindow.save_note"):
+            if self.note_loader.is_loading():
+                Toast(self, "Chargement de la note en cours…", self.is_dark_theme)
+                return
+            title = self.title_edit.text()
+            content = encode_document(self.text_edit.document())
+            if not title:
+                QMessageBox.warning(self, "Erreur", "Titre requis")
+                return
+            self.autosave_debounce.stop()
+            self.saver.submit_save(self.edit_key, self.current_note_id, title, content, self.current_status)
+            self.mark_saving()
+            self.mark_clean(title, content, self.current_status)
+            self.show_notes_list()
+
+    # --- Import / Export ---
+
+    def import_jsonl(self):
+        path, _ = QFileDialog.getOpenFileName(self, "Importer des notes", "", "JSON Lines (*.jsonl *.json)")
+        if path and not self.db_busy():
+            self.run_transfer("Import des notes", "importées",
+                              lambda progress: transfer.import_notes(self.db, transfer.iter_jsonl(path), progress))
+
+    def import_folder(self):
+        directory = QFileDialog.getExistingDirectory(self, "Importer un dossier de notes")
+        if directory and not self.db_busy():
+            self.run_transfer("Import des notes", "importées",
+                              lambda progress: transfer.import_notes(self.db, transfer.iter_directory(directory), progress))
+
+    def export_jsonl(self):
+        path, _ = QFileDialog.getSaveFileName(self, "Exporter les notes", "notes.jsonl", "JSON Lines (*.jsonl)")
+        if path and not self.db_busy():
+            self.run_transfer("Export des notes", "exportées",
+                              lambda progress: transfer.export_jsonl(self.db, path, progress),
+                              total=self.db.count_notes())
+
+    def export_folder(self, fmt):
+        directory = QFileDialog.getExistingDirectory(self, "Exporter les notes dans un dossier")
+        if directory and not self.db_busy():
+            self.run_transfer("Export des notes", "exportées",
+                              lambda progress: transfer.export_directory(self.db, directory, fmt, progress),
+                              total=self.db.count_notes())
+
+    def run_transfer(self, label, verb, task, total=0):
+        """Lance un import/export en arrière-plan avec une fenêtre de progression."""
+        if self.transfer_worker is not None:
+            Toast(self, "Un transfert est déjà en cours", self.is_dark_theme)
             return
-        if self.current_note_id is None:
-            self.db.add_note(title, content, self.current_status)
-            Toast(self, "Note créée !", self.is_dark_theme)
+        dialog = QProgressDialog(label + "…", "Annuler", 0, total, self)
+        dialog.setWindowModality(Qt.WindowModality.WindowModal)
+        dialog.setMinimumDuration(300)
+        dialog.setAutoClose(False)
+        dialog.setAutoReset(False)
+
+        worker = TransferWorker(task, self)
+        self.transfer_worker = worker
+
+        def on_progress(count):
+            if total:
+                dialog.setValue(min(count, total))
+            dialog.setLabelText(f"{label}… {count} notes")
+
+        def finish(message):
+            dialog.close()
+            self.transfer_worker = None
+            worker.deleteLater()
+            Toast(self, message, self.is_dark_theme)
+
+        worker.progressed.connect(on_progress)
+        worker.completed.connect(lambda count: finish(f"{count} notes {verb}"))
+        worker.cancelled.connect(lambda: finish("Transfert annulé"))
+        worker.failed.connect(lambda message: finish(f"Échec du transfert : {message}"))
+        dialog.canceled.connect(worker.cancel)
+
+        # Les sauvegardes en attente passent avant un export, pour qu'il soit à jour : le
+        # transfert démarre quand le thread d'écriture a vidé sa file, sans bloquer l'interface
+        def start():
+            self.saver.flushed.disconnect(start)
+            worker.start()
+        self.saver.flushed.connect(start)
+        self.saver.request_flush()
+
+    # --- Retours du thread d'écriture ---
+
+    def on_note_saved(self, key, note_id, created, manual):
+        if key == self.edit_key:
+            self.current_note_id = note_id
+        if manual:
+            Toast(self, "Note créée !" if created else "Note sauvegardée", self.is_dark_theme)
         else:
-            self.db.update_note(self.current_note_id, title, content, self.current_status)
-            Toast(self, "Note sauvegardée", self.is_dark_theme)
-        self.show_notes_list()
+            print("Auto-save effectué")
+
+    def on_note_deleted(self, note_id):
+        if note_id == self.current_note_id:
+            self.current_note_id = None
+            self.edit_key = ("new", next(self._new_note_keys))
+        Toast(self, "Note supprimée", self.is_dark_theme)
+
+    def on_save_failed(self, key, message):
+        Toast(self, f"Échec de la sauvegarde : {message}", self.is_dark_theme)
+        if key == self.edit_key:
+            # Le contenu n'est pas écrit : la note redevient modifiée, l'auto-save réessaiera
+            self.saved_hash = None
+            self.doc_stamp = None
+            self.text_edit.document().setModified(True)
+
+    def populate_history_menu(self):
+        self.history_menu.clear()
+        if not self.current_note_id:
+            self.history_menu.addAction("Aucune révision").setEnabled(False)
+            return
+        # Lecture dans le thread des notes : le menu se remplit à l'arrivée de la liste
+        self.history_menu.addAction("Chargement…").setEnabled(False)
+        self.note_loader.list_revisions(self.current_note_id, 30)
+
+    def on_history_read(self, note_id, revisions):
+        if note_id != self.current_note_id:
+            return
+        self.history_menu.clear()
+        if not revisions:
+            text = "Aucune révision" if revisions is not None else "Historique illisible"
+            self.history_menu.addAction(text).setEnabled(False)
+            return
+        for revision_id, created_ms, title, status, kind in revisions:
+            date = datetime.datetime.fromtimestamp(created_ms / 1000).strftime("%d/%m/%Y %H:%M:%S")
+            self.history_menu.addAction(f"{date} — {title}",
+                                        lambda revision_id=revision_id: self.load_revision(revision_id))
+
+    def load_revision(self, revision_id):
+        """Charge une révision dans l'éditeur ; elle remplace la note à la prochaine sauvegarde.
+
+        La révision est reconstruite dans le thread des notes, comme une note ouverte.
+        """
+        self.cancel_note_load()
+        self.release_note_document()
+        self.loading_revision = True
+        self.note_loader.load(self.text_edit, self.current_note_id, revision_id)
 
     def set_status(self, status):
         self.current_status = status
         self.btn_status.setText(status)
+        self.on_editor_changed()
         if status == "Terminé":
             self.btn_status.setStyleSheet("background-color: #E6F4EA; color: #137333; border: none; border-radius: 18px;")
         else:
@@ -0,0 +1,300 @@
+import json
+import threading
+import time
+from PyQt6.QtCore import QObject, QThread, QTimer, QCoreApplication, pyqtSignal
+from PyQt6.QtGui import QTextDocument
+from note_format import is_compact, compact_lines
+from ui.doc_format import DocumentBuilder, new_document, install_document
+from ui.doc_cache import DocumentCache
+import tracing
+
+# Temps de construction par itération de la boucle Qt (ms) : la première tranche
+# remplit l'écran, les suivantes laissent la fenêtre réactive
+FIRST_SLICE_MS = 30
+SLICE_MS = 8
+# Blocs ajoutés entre deux lectures de l'horloge
+BATCH_BLOCKS = 32
+# Blocs décodés par message du thread de lecture (le premier, plus court, arrive vite)
+FIRST_CHUNK_BLOCKS = 500
+CHUNK_BLOCKS = 2000
+
+class NoteReader(QThread):
+    """Lit et décode les notes à ouvrir, hors de la boucle Qt.
+
+    Seule la demande la plus récente est traitée : une note ouverte puis aussitôt
+    quittée n'est pas lue jusqu'au bout. Chaque message porte le numéro de sa demande :
+    - ("start", titre, statut, nombre de blocs, version), puis des ("blocks", lignes, blocs) ;
+    - ("document", titre, statut, document, version) pour une note en ancien HTML ;
+    - ("missing",) si la note n'existe plus, ("error", message) en cas d'échec.
+    Une révision (`revision_id`) se lit de la même façon, avec une version None.
+
+    La liste des révisions d'une note (menu Historique) est une demande à part :
+    elle ne remplace pas l'ouverture en cours, le résultat arrive par `history`.
+    """
+
+    read = pyqtSignal(int, object)
+    history = pyqtSignal(int, object)   # id de la note, révisions (ou None en cas d'échec)
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._cond = threading.Condition()
+        self._pending = None
+        self._history = None
+        self._stopping = False
+
+    def submit(self, number, note_id, font, margin, revision_id=None):
+        with self._cond:
+            self._pending = (number, note_id, font, margin, revision_id)
+            self._cond.notify()
+
+    def submit_history(self, note_id, limit):
+        with self._cond:
+            self._history = (note_id, limit)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+
+    def _superseded(self):
+        return self._pending is not None or self._stopping
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and self._history is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                history, self._history = self._history, None
+                request, self._pending = self._pending, None
+            if history is not None:
+                note_id, limit = history
+                try:
+                    self.history.emit(note_id, self.db.list_revisions(note_id, limit=limit))
+                except Exception:
+                    self.history.emit(note_id, None)
+            if request is None:
+                continue
+            number = request[0]
+            try:
+                self._read(*request)
+            except Exception as e:
+                self.read.emit(number, ("error", str(e)))
+
+    @tracing.traced("NoteReader.read")
+    def _read(self, number, note_id, font, margin, revision_id):
+        if revision_id is None:
+            note = self.db.get_note_for_edit(note_id)
+        else:
+            revision = self.db.get_revision(note_id, revision_id)
+            note = None if revision is None else (*revision, None)
+        if note is None:
+            self.read.emit(number, ("missing",))
+            return
+        title, content, status, stamp = note
+        if content and is_compact(content):
+            lines = compact_lines(content)
+            self.read.emit(number, ("start", title, status, len(lines), stamp))
+            # Décodage par morceaux : le début de la note s'affiche sans attendre la fin
+            start, size = 0, FIRST_CHUNK_BLOCKS
+            while start < len(lines):
+                if self._superseded():
+                    return
+                chunk = lines[start:start + size]
+                self.read.emit(number, ("blocks", chunk, [json.loads(line) for line in chunk]))
+                start, size = start + size, CHUNK_BLOCKS
+            return
+        # Ancien HTML : l'analyse par Qt se fait ici, le document est confié au thread Qt
+        doc = QTextDocument()
+        doc.setDefaultFont(font)
+        doc.setDocumentMargin(margin)
+        doc.setHtml(content or "")
+        doc.moveToThread(QCoreApplication.instance().thread())
+        self.read.emit(number, ("document", title, status, doc, stamp))
+
+class NoteLoader(QObject):
+    """Ouvre une note dans l'éditeur sans figer la fenêtre.
+
+    La note est lue dans un thread dédié. Son document est construit hors de
+    l'éditeur, par tranches courtes entre deux événements : une copie du début est
+    affichée dès la première tranche, le document complet la remplace à la fin.
+    L'éditeur reste en lecture seule jusque-là.
+
+    Les documents des notes quittées sans modification sont gardés dans un
+    DocumentCache : une note rouverte sans avoir changé s'affiche aussitôt.
+    """
+
+    opened = pyqtSignal(int, str, str)      # id, titre, statut : le début est affiché
+    progressed = pyqtSignal(int)            # pourcentage des blocs construits
+    finished = pyqtSignal(int, object)      # id, version (updated_ms) du document affiché
+    missing = pyqtSignal(int)
+    failed = pyqtSignal(int, str)
+    history = pyqtSignal(int, object)       # id, révisions (list_revisions) ou None
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.reader = None
+        self.number = 0
+        self.note_id = None
+        self.text_edit = None
+        self.cache = DocumentCache(parent=self)
+        self.doc = None
+        self.builder = None
+        self.title = self.status = self.stamp = None
+        self.lines = self.blocks = None
+        self.total = self.done = 0
+        self.timer = QTimer(self)
+        self.timer.setInterval(0)
+        self.timer.timeout.connect(self._build_slice)
+
+    def is_loading(self):
+        return self.note_id is not None
+
+    def load(self, text_edit, note_id, revision_id=None):
+        """Lance l'ouverture de `note_id`, ou de l'une de ses révisions (et abandonne le
+        chargement en cours). Une révision se termine par `finished` avec une version None."""
+        self.cancel()
+        if revision_id is None and self.cache.has_note(note_id):
+            stamp = self.db.get_note_stamp(note_id)
+            entry = self.cache.take(note_id, stamp)
+            if entry is not None:
+                title, status, doc = entry
+                install_document(text_edit, doc)
+                text_edit.setReadOnly(False)
+                self.opened.emit(note_id, title, status)
+                self.finished.emit(note_id, stamp)
+                return
+        self.number += 1
+        self.note_id = note_id
+        self.text_edit = text_edit
+        doc = text_edit.document()
+        self._reader().submit(self.number, note_id, doc.defaultFont(), doc.documentMargin(), revision_id)
+        # Page blanche en attendant : l'ancien document est détruit plus tard par Qt,
+        # au lieu d'être vidé ici bloc par bloc
+        install_document(text_edit, new_document(text_edit))
+        text_edit.setReadOnly(True)
+
+    def list_revisions(self, note_id, limit):
+        """Demande la liste des révisions de `note_id` ; elle arrive par `history`."""
+        self._reader().submit_history(note_id, limit)
+
+    def _reader(self):
+        if self.reader is None:
+            self.reader = NoteReader(self.db, self)
+            self.reader.read.connect(self._on_read)
+            self.reader.history.connect(self.history)
+            self.reader.start()
+        return self.reader
+
+    def cancel(self):
+        """Abandonne le chargement en cours ; le début affiché reste dans l'éditeur."""
+        if self.note_id is None:
+            return
+        self.timer.stop()
+        if self.doc is not None:
+            self.doc.deleteLater()
+        # Le début de note affiché n'est pas une modification à sauvegarder
+        self.text_edit.document().setModified(False)
+        self.text_edit.setReadOnly(False)
+        self._reset()
+
+    def release(self, text_edit, note_id, stamp, title, status):
+        """Range dans le cache le document de l'éditeur, identique à la version `stamp`."""
+        if self.cache.put(note_id, stamp, title, status, text_edit.document()):
+            install_document(text_edit, new_document(text_edit))
+
+    def stop(self):
+        self.cancel()
+        if self.reader is not None:
+            self.reader.stop()
+
+    def _reset(self):
+        self.number += 1  # un message encore en route sera ignoré
+        self.note_id = None
+        self.text_edit = None
+        self.doc = self.builder = None
+        self.lines = self.blocks = None
+
+    def _on_read(self, number, message):
+        if number != self.number:
+            return
+        note_id = self.note_id
+        kind = message[0]
+        if kind == "missing":
+            self.cancel()
+            self.missing.emit(note_id)
+        elif kind == "error":
+            self.cancel()
+            self.failed.emit(note_id, message[1])
+        elif kind == "document":
+            _, self.title, self.status, doc, self.stamp = message
+            install_document(self.text_edit, doc)
+            self.opened.emit(note_id, self.title, self.status)
+            self._finish()
+        elif kind == "start":
+            _, self.title, self.status, self.total, self.stamp = message
+            self.lines, self.blocks = [], []
+            self.done = 0
+            self.doc = new_document(self.text_edit)
+            self.doc.setUndoRedoEnabled(False)
+            self.builder = DocumentBuilder(self.doc)
+            if not self.total:
+                self.opened.emit(note_id, self.title, self.status)
+                self._finish()
+        else:
+            self.lines += message[1]
+            self.blocks += message[2]
+            if self.done == 0:
+                self._build(FIRST_SLICE_MS)
+                if self.done < self.total:
+                    # La copie du début ne sert qu'à l'affichage, le temps de finir
+                    install_document(self.text_edit, self.doc.clone())
+                    self.text_edit.setReadOnly(True)
+                self.opened.emit(note_id, self.title, self.status)
+            self._schedule()
+
+    def _schedule(self):
+        if self.done >= self.total:
+            self.timer.stop()
+            self._finish()
+        else:
+            self.progressed.emit(self.done * 100 // self.total)
+            if self.done < len(self.blocks):
+                self.timer.start()
+            else:
+                # Tout ce qui est décodé est construit : en attente du morceau suivant
+                self.timer.stop()
+
+    def _build(self, budget_ms):
+        deadline = time.perf_counter() + budget_ms / 1000
+        while self.done < len(self.blocks):
+            end = self.done + BATCH_BLOCKS
+            self.builder.append(self.lines[self.done:end], self.blocks[self.done:end])
+            self.done = min(end, len(self.blocks))
+            if time.perf_counter() >= deadline:
+                break
+
+    @tracing.traced("NoteLoader.slice")
+    def _build_slice(self):
+        self._build(SLICE_MS)
+        self._schedule()
+
+    def _finish(self):
+        note_id, stamp = self.note_id, self.stamp
+        text_edit = self.text_edit
+        if self.doc is not None:
+            # Le document complet remplace la copie affichée, à la même position
+            scroll = text_edit.verticalScrollBar().value()
+            install_document(text_edit, self.doc)
+            text_edit.verticalScrollBar().setValue(scroll)
+        doc = text_edit.document()
+        doc.setUndoRedoEnabled(True)
+        doc.setModified(False)
+        text_edit.setReadOnly(False)
+        self._reset()
+        self.finished.emit(note_id, stamp)
@@ -0,0 +1,169 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from ui.search_worker import SearchWorker
+import tracing
+
+class NotesTableModel(QAbstractTableModel):
+    """Modèle de la liste des notes, chargé page par page à mesure que la vue défile."""
+
+    HEADERS = ["Titre", "Date", "Statut"]
+    NoteIdRole = Qt.ItemDataRole.UserRole
+    SEARCH_LIMIT = 500
+
+    search_failed = pyqtSignal(str)
+
+    def __init__(self, db, page_size=200, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self.page_size = page_size
+        self.query = ""
+        # Lignes : (id, titre, date, statut, clé de tri, extrait de recherche)
+        self._rows = []
+        self._cursor = None
+        self._exhausted = False
+        self.loaded = False
+        # Recherches dans un thread, démarré à la première ; numéro de la dernière demande
+        self.searcher = None
+        self._search_number = 0
+        self.searching = False
+
+    # --- Chargement ---
+
+    def reload(self):
+        """Repart de la première page (ou relance la recherche en cours)."""
+        self.loaded = True
+        self._search_number += 1  # une recherche encore en cours sera ignorée
+        if self.query:
+            # Le classement parcourt toutes les correspondances : il se fait dans un thread,
+            # la liste affichée reste en place jusqu'aux résultats
+            if self.searcher is None:
+                self.searcher = SearchWorker(self.db, self)
+                self.searcher.found.connect(self._on_found)
+                self.searcher.failed.connect(self._on_search_failed)
+                self.searcher.start()
+            self.searcher.submit(self._search_number, self.query, self.SEARCH_LIMIT)
+            self.searching = True
+            return
+        self.searching = False
+        self.beginResetModel()
+        self._rows = []
+        self._cursor = None
+        self._exhausted = False
+        self.endResetModel()
+
+    def _on_found(self, number, rows):
+        if number != self._search_number:
+            return
+        self.searching = False
+        # La recherche est classée par pertinence : un seul lot borné, pas de pagination
+        self.beginResetModel()
+        self._rows = [(note_id, title, date, status, None, snippet)
+                      for note_id, title, date, status, snippet in rows]
+        self._cursor = None
+        self._exhausted = True
+        self.endResetModel()
+
+    def _on_search_failed(self, number, message):
+        if number == self._search_number:
+            self.searching = False
+            self.search_failed.emit(message)
+
+    def stop(self):
+        if self.searcher is not None:
+            self.searcher.stop()
+
+    def set_query(self, text):
+        self.query = text.strip()
+        self.reload()
+
+    def canFetchMore(self, parent=QModelIndex()):
+        # Rien n'est lu avant le premier reload() (la base peut être en cours de migration)
+        return not parent.isValid() and self.loaded and not self._exhausted
+
+    def fetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._exhausted:
+            return
+        page = self.db.get_notes_page(self._cursor, self.page_size)
+        if len(page) < self.page_size:
+            self._exhausted = True
+        if not page:
+            return
+        start = len(self._rows)
+        self.beginInsertRows(QModelIndex(), start, start + len(page) - 1)
+        self._rows.extend((note_id, title, date, status, sort_key, None)
+                          for note_id, title, date, status, sort_key in page)
+        self.endInsertRows()
+        tracing.count("notes_model.rows_fetched", len(page))
+        last = page[-1]
+        self._cursor = (last[4], last[0])
+
+    # --- Mises à jour incrémentales ---
+
+    def apply_change(self, kind, note_id, row):
+        """Applique une modification signalée par NoteManager sans recharger la liste."""
+        if kind == "reset":
+            if self.loaded:
+                self.reload()
+            return
+        position = self._find(note_id)
+        if kind == "deleted":
+            if position is not None:
+                self.beginRemoveRows(QModelIndex(), position, position)
+                del self._rows[position]
+                self.endRemoveRows()
+            return
+
+        note_id, title, date, status, sort_key = row
+        if self.query:
+            # En recherche, l'ordre est celui de la pertinence : mise à jour sur place seulement
+            if position is not None:
+                self._rows[position] = (note_id, title, date, status, sort_key, self._rows[position][5])
+                self.dataChanged.emit(self.index(position, 0), self.index(position, len(self.HEADERS) - 1))
+            return
+
+        if position is not None:
+            self.beginRemoveRows(QModelIndex(), position, position)
+            del self._rows[position]
+            self.endRemoveRows()
+        if self._cursor is None and not self._exhausted:
+            # Rien n'est encore chargé : la première page contiendra déjà cette note
+            return
+        # La note modifiée est la plus récente : elle remonte en tête de liste
+        self.beginInsertRows(QModelIndex(), 0, 0)
+        self._rows.insert(0, (note_id, title, date, status, sort_key, None))
+        self.endInsertRows()
+
+    def _find(self, note_id):
+        for position, row in enumerate(self._rows):
+            if row[0] == note_id:
+                return position
+        return None
+
+    # --- Accès ---
+
+    def note_id(self, row):
+        if 0 <= row < len(self._rows):
+            return self._rows[row][0]
+        return None
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rows)
+
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        row = self._rows[index.row()]
+        if role == Qt.ItemDataRole.DisplayRole:
+            return row[index.column() + 1]
+        if role == Qt.ItemDataRole.ToolTipRole and index.column() == 0:
+            return row[5]
+        if role == self.NoteIdRole:
+            return row[0]
+        return None
+
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole and orientation == Qt.Orientation.Horizontal:
+            return self.HEADERS[section]
+        return None
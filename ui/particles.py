@@ -0,0 +1,94 @@
+import numpy
+
+# Simulation des éléments du fond animé, stockée en colonnes NumPy (une par
+# attribut) : un pas de simulation traite toutes les particules d'un coup.
+
+KINDS = ['text', 'atom', 'cube', 'dna', 'gear']
+TEXT_KIND = KINDS.index('text')
+TEXTS = ["E=mc²", "φ = 1.618", "0xDEADBEEF", "SYSTEM_READY",
+         "ANALYSIS", "BLUEPRINT", "V.1.0.4", "LOADING..."]
+
+# Au-delà de cette hauteur au-dessus du bord, une particule réapparaît en bas
+EXIT_MARGIN = 150
+SPAWN_MARGIN = 100
+FADE_IN_STEP = 1.5
+FADE_IN_TARGET = 120
+FADE_OUT_CHANCE = 0.005
+
+# Colonnes de l'état : (nom, type) ; "?" est un booléen
+COLUMNS = (('x', 'd'), ('y', 'd'), ('speed', 'd'), ('opacity', 'd'), ('rotation', 'd'),
+           ('rot_speed', 'd'), ('fading_in', '?'), ('kind', 'b'), ('size', 'h'), ('text', 'b'))
+
+def _column(code, length):
+    return numpy.zeros(length, dtype=bool if code == '?' else code)
+
+class ParticleField:
+    """Particules du fond : position, vitesse, rotation, opacité, forme et taille."""
+
+    def __init__(self, count, width, height):
+        self.count = 0
+        self._rng = numpy.random.default_rng()
+        for name, code in COLUMNS:
+            setattr(self, name, _column(code, 0))
+        self.resize(count, width, height)
+
+    def resize(self, count, width, height):
+        """Ajuste le nombre de particules ; les nouvelles sont réparties sur toute la hauteur."""
+        count = max(0, count)
+        if count == self.count:
+            return
+        for name, code in COLUMNS:
+            old = getattr(self, name)
+            column = _column(code, count)
+            column[:min(count, self.count)] = old[:count]
+            setattr(self, name, column)
+        first, self.count = self.count, count
+        if count <= first:
+            return
+        added = count - first
+        self._spawn(slice(first, count), added, width, height)
+        # Première apparition : déjà à l'écran et partiellement visible
+        self.y[first:] = self._rng.integers(0, max(0, int(height)), added, endpoint=True)
+        self.opacity[first:] = self._rng.integers(0, 100, added, endpoint=True)
+
+    def _spawn(self, indices, n, width, height):
+        """(Ré)initialise `n` particules (`indices`) sous le bord inférieur, invisibles."""
+        rng = self._rng
+        kind = rng.integers(0, len(KINDS), n)
+        is_text = kind == TEXT_KIND
+        self.x[indices] = rng.integers(0, max(0, int(width)), n, endpoint=True)
+        self.y[indices] = height + SPAWN_MARGIN
+        self.speed[indices] = rng.uniform(0.5, 1.5, n)
+        self.opacity[indices] = 0
+        self.fading_in[indices] = True
+        self.rotation[indices] = rng.integers(0, 360, n, endpoint=True)
+        self.rot_speed[indices] = rng.uniform(-1, 1, n)
+        self.kind[indices] = kind
+        self.text[indices] = numpy.where(is_text, rng.integers(0, len(TEXTS), n), -1)
+        self.size[indices] = numpy.where(is_text, rng.integers(10, 18, n, endpoint=True),
+                                         rng.integers(30, 80, n, endpoint=True))
+
+    def step(self, width, height, dt=1.0):
+        """Avance la simulation de `dt` images (fractionnaire quand la cadence baisse)."""
+        if not self.count:
+            return
+        self.y -= self.speed * dt
+        self.rotation += self.rot_speed * dt
+        gone = numpy.flatnonzero(self.y < -EXIT_MARGIN)
+        if gone.size:
+            self._spawn(gone, gone.size, width, height)
+
+        fading = self.fading_in
+        # Une fois la cible atteinte, l'élément s'estompe très lentement, au hasard
+        fading_out = ~fading & (self._rng.random(self.count) < FADE_OUT_CHANCE * dt)
+        self.opacity[fading] += FADE_IN_STEP * dt
+        fading &= self.opacity < FADE_IN_TARGET
+        self.opacity[fading_out] -= dt
+        numpy.clip(self.opacity, 0, 255, out=self.opacity)
+
+    def visible(self):
+        """Particules à dessiner : tuples (x, y, rotation, opacité, forme, taille, texte)."""
+        shown = numpy.flatnonzero(self.opacity > 0)
+        return zip(self.x[shown].tolist(), self.y[shown].tolist(), self.rotation[shown].tolist(),
+                   self.opacity[shown].tolist(), self.kind[shown].tolist(),
+                   self.size[shown].tolist(), self.text[shown].tolist())
@@ -0,0 +1,136 @@
+import time
+from PyQt6.QtWidgets import QLabel
+from PyQt6.QtCore import Qt, QTimer, QEvent
+from ui.doc_format import encode_document
+import tracing
+
+# Rafraîchissement du panneau (ms)
+REFRESH_INTERVAL = 500
+# Nombre de requêtes récentes affichées
+QUERY_ROWS = 8
+
+def percentile(values, q):
+    """Quantile `q` (0 à 1) d'une liste déjà triée."""
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q))]
+
+class PerfOverlay(QLabel):
+    """Panneau de mesures en direct, à joindre aux signalements de lenteur.
+
+    Tant qu'il est affiché, il branche un tracing.RecentTracer et résume ses mesures :
+    cadence et coût des images du fond, dernières requêtes en base, durées des
+    sauvegardes et taille du document ouvert. Caché, il ne mesure plus rien.
+    """
+
+    def __init__(self, parent, document=None, is_dark=False):
+        super().__init__(parent)
+        self.setAttribute(Qt.WidgetAttribute.WA_TransparentForMouseEvents)
+        self.setTextFormat(Qt.TextFormat.PlainText)
+        # `document()` retourne le QTextDocument en cours d'édition, ou None
+        self.document = document
+        self.recorder = tracing.RecentTracer()
+        # Taille du document : recalculée seulement quand il a changé
+        self._doc_size = (None, 0)
+        self.timer = QTimer(self)
+        self.timer.setInterval(REFRESH_INTERVAL)
+        self.timer.timeout.connect(self.refresh)
+        self.set_theme(is_dark)
+        parent.installEventFilter(self)
+        self.hide()
+
+    def set_theme(self, is_dark):
+        bg = "rgba(30, 30, 30, 245)" if is_dark else "rgba(255, 255, 255, 245)"
+        color = "#E3E3E3" if is_dark else "#1F1F1F"
+        self.setStyleSheet(f"""
+            background-color: {bg};
+            color: {color};
+            border-radius: 12px;
+            padding: 10px 14px;
+            font-family: 'Consolas', 'Courier New', monospace;
+            font-size: 12px;
+        """)
+
+    def showEvent(self, event):
+        tracing.attach(self.recorder)
+        self.refresh()
+        self.timer.start()
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        tracing.detach(self.recorder)
+        super().hideEvent(event)
+
+    def eventFilter(self, obj, event):
+        if obj is self.parentWidget() and event.type() == QEvent.Type.Resize:
+            self.place()
+        return False
+
+    def place(self):
+        """En haut à droite, sous l'en-tête."""
+        self.move(self.parentWidget().width() - self.width() - 20, 80)
+        self.raise_()
+
+    # --- Contenu ---
+
+    def durations(self, *names):
+        """Durées récentes des spans `names` en ms, triées."""
+        return sorted(duration / 1e6 for name in names for _, duration in self.recorder.recent(name))
+
+    def span_line(self, label, *names):
+        values = self.durations(*names)
+        if not values:
+            return f"{label:<12}—"
+        last = max(span for name in names for span in self.recorder.recent(name))[1] / 1e6
+        return (f"{label:<12}dernière {last:7.2f} ms  p50 {percentile(values, 0.5):6.2f}  "
+                f"p90 {percentile(values, 0.9):6.2f}  (n={len(values)})")
+
+    def frame_lines(self):
+        frames = self.recorder.recent("AnimatedBackground.frame")
+        now = time.perf_counter_ns()
+        fps = sum(1 for end, _ in frames if now - end <= 1_000_000_000)
+        values = self.durations("AnimatedBackground.frame")
+        lines = [f"{'Fond':<12}{fps:3d} img/s  p50 {percentile(values, 0.5):6.2f}  "
+                 f"p90 {percentile(values, 0.9):6.2f}  p99 {percentile(values, 0.99):6.2f} ms"]
+        rendered = self.durations("BackgroundRenderer.render")
+        if rendered:
+            lines.append(f"{'  thread':<12}rendu p50 {percentile(rendered, 0.5):6.2f}  "
+                         f"p90 {percentile(rendered, 0.9):6.2f} ms")
+        return lines
+
+    def query_lines(self):
+        queries = []
+        for name in list(self.recorder.spans):
+            if name.startswith("db."):
+                queries.extend((end, duration, name[3:]) for end, duration in self.recorder.recent(name))
+        queries.sort()
+        if not queries:
+            return [f"{'Requêtes':<12}—"]
+        lines = []
+        for index, (_, duration, name) in enumerate(queries[-QUERY_ROWS:][::-1]):
+            label = "Requêtes" if index == 0 else ""
+            lines.append(f"{label:<12}{name:<22}{duration / 1e6:8.2f} ms")
+        return lines
+
+    def document_line(self):
+        doc = self.document() if self.document else None
+        if doc is None:
+            return f"{'Document':<12}—"
+        key, size = self._doc_size
+        if key != (id(doc), doc.revision()):
+            size = len(encode_document(doc).encode("utf-8"))
+            self._doc_size = ((id(doc), doc.revision()), size)
+        return f"{'Document':<12}{doc.blockCount()} blocs  {size / 1024:.1f} Ko"
+
+    def refresh(self):
+        lines = [f"NoteBlock — performances  {time.strftime('%H:%M:%S')}", ""]
+        lines += self.frame_lines()
+        lines += self.query_lines()
+        lines.append(self.span_line("Sauvegarde", "MainWindow.save_note"))
+        lines.append(self.span_line("Auto-save", "MainWindow.auto_save"))
+        lines.append(self.span_line("Écriture", "db.add_note", "db.update_note"))
+        lines.append(self.document_line())
+        self.setText("\n".join(lines))
+        self.adjustSize()
+        self.place()
@@ -0,0 +1,157 @@
+import threading
+from collections import OrderedDict
+from PyQt6.QtCore import QThread, pyqtSignal
+import tracing
+
+class SaveWorker(QThread):
+    """Thread d'écriture : toutes les écritures en base passent par ici, hors de la boucle Qt."""
+
+    saved = pyqtSignal(object, int, bool, bool)  # clé, id de la note, créée ?, sauvegarde manuelle ?
+    deleted = pyqtSignal(int)
+    failed = pyqtSignal(object, str)
+    flushed = pyqtSignal()
+    migration_progressed = pyqtSignal(int)   # lignes traitées
+    migrated = pyqtSignal()
+    migration_failed = pyqtSignal(str)
+    maintenance_failed = pyqtSignal(str)
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        # Une seule opération en attente par clé : les sauvegardes successives d'une
+        # même note sont fusionnées, seule la plus récente est écrite.
+        self._pending = OrderedDict()
+        # Clé de session d'une nouvelle note -> id obtenu lors de la première insertion
+        self._ids = {}
+        # Tâches de fond (itérateurs), avancées d'un pas quand aucune écriture n'attend
+        self._maintenance = []
+        # Migration du schéma (NoteManager.migrate()) : passe avant toute écriture
+        self._migration = None
+        self._cond = threading.Condition()
+        self._flush_requested = False
+        self._stopping = False
+
+    def submit_save(self, key, note_id, title, content, status, manual=True):
+        with self._cond:
+            previous = self._pending.pop(key, None)
+            if previous is not None and previous[0] == "save":
+                manual = manual or previous[5]
+                tracing.count("saves.coalesced")
+            self._pending[key] = ("save", note_id, title, content, status, manual)
+            self._cond.notify()
+
+    def submit_delete(self, note_id):
+        with self._cond:
+            self._pending.pop(note_id, None)
+            self._pending[note_id] = ("delete", note_id)
+            self._cond.notify()
+
+    def submit_migration(self, steps):
+        """Applique la migration `steps` (un itérateur) avant toute autre opération.
+
+        `migration_progressed` suit chaque lot, puis `migrated` (ou `migration_failed`)
+        signale la fin. Arrêté en route, le thread abandonne la migration entre deux lots.
+        """
+        with self._cond:
+            self._migration = steps
+            self._cond.notify()
+
+    def submit_maintenance(self, steps):
+        """Planifie une tâche de fond découpée en pas (un itérateur).
+
+        Les sauvegardes restent prioritaires : un seul pas est exécuté entre deux
+        écritures, et les pas restants sont abandonnés à l'arrêt.
+        """
+        with self._cond:
+            self._maintenance.append(steps)
+            self._cond.notify()
+
+    def has_maintenance(self):
+        """Vrai tant qu'une tâche de fond n'est pas terminée."""
+        with self._cond:
+            return bool(self._maintenance)
+
+    def request_flush(self):
+        """Émet `flushed` dès que les écritures en attente sont terminées, sans bloquer."""
+        with self._cond:
+            self._flush_requested = True
+            self._cond.notify()
+
+    def stop(self):
+        """Vide la file puis arrête le thread."""
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                if self._flush_requested and not self._pending:
+                    self._flush_requested = False
+                    self.flushed.emit()
+                while (not self._pending and not self._stopping and not self._maintenance
+                       and not self._flush_requested and self._migration is None):
+                    self._cond.wait()
+                migration, self._migration = self._migration, None
+                if migration is not None:
+                    key, op = None, None
+                elif self._pending:
+                    key, op = self._pending.popitem(last=False)
+                elif self._stopping:
+                    break
+                elif self._flush_requested:
+                    continue
+                else:
+                    key, op = None, None
+            if migration is not None:
+                self._migrate(migration)
+                continue
+            if op is None:
+                self._step_maintenance()
+                continue
+            try:
+                self._execute(key, op)
+            except Exception as e:
+                # Quelle que soit l'erreur (base, codec, données), le thread continue :
+                # les sauvegardes suivantes ne doivent pas rester en attente
+                self.failed.emit(key, str(e))
+
+    def _migrate(self, steps):
+        try:
+            for done in steps:
+                self.migration_progressed.emit(done)
+                if self._stopping:
+                    steps.close()
+                    return
+        except Exception as e:
+            self.migration_failed.emit(str(e))
+            return
+        self.migrated.emit()
+
+    def _step_maintenance(self):
+        steps = self._maintenance[0]
+        try:
+            next(steps)
+        except StopIteration:
+            self._maintenance.remove(steps)
+        except Exception as e:
+            self._maintenance.remove(steps)
+            self.maintenance_failed.emit(str(e))
+
+    def _execute(self, key, op):
+        if op[0] == "delete":
+            self.db.delete_note(op[1])
+            self.deleted.emit(op[1])
+            return
+
+        _, note_id, title, content, status, manual = op
+        if note_id is None:
+            note_id = self._ids.get(key)
+        if note_id is None:
+            note_id = self.db.add_note(title, content, status)
+            self._ids[key] = note_id
+            self.saved.emit(key, note_id, True, manual)
+        else:
+            self.db.update_note(note_id, title, content, status)
+            self.saved.emit(key, note_id, False, manual)
@@ -0,0 +1,44 @@
+import threading
+from PyQt6.QtCore import QThread, pyqtSignal
+
+class SearchWorker(QThread):
+    """Exécute les recherches plein texte hors de la boucle Qt.
+
+    Seule la saisie la plus récente compte : une recherche dépassée avant d'avoir
+    commencé n'est pas lancée. Chaque résultat porte le numéro de sa demande, pour
+    que le modèle ignore ceux qui arrivent trop tard.
+    """
+
+    found = pyqtSignal(int, object)     # numéro de la demande, lignes de db.search
+    failed = pyqtSignal(int, str)
+
+    def __init__(self, db, parent=None):
+        super().__init__(parent)
+        self.db = db
+        self._cond = threading.Condition()
+        self._pending = None
+        self._stopping = False
+
+    def submit(self, number, query, limit):
+        with self._cond:
+            self._pending = (number, query, limit)
+            self._cond.notify()
+
+    def stop(self):
+        with self._cond:
+            self._stopping = True
+            self._cond.notify_all()
+        self.wait()
+
+    def run(self):
+        while True:
+            with self._cond:
+                while self._pending is None and not self._stopping:
+                    self._cond.wait()
+                if self._stopping:
+                    return
+                (number, query, limit), self._pending = self._pending, None
+            try:
+                self.found.emit(number, self.db.search(query, limit=limit))
+            except Exception as e:
+                self.failed.emit(number, str(e))
@@ -0,0 +1,135 @@
+import os
+from PyQt6.QtGui import QColor
+
+# Feuille de base commune aux deux thèmes
+BASE_STYLE_PATH = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+                               "style", "theme.qss")
+
+# Couleurs et icônes de chaque thème (clé : thème sombre ou non)
+THEMES = {
+    True: {
+        "theme_icon": "wht_sun.png",
+        "settings_icon": "wht_setting.png",
+        "text_color": "#E3E3E3",
+        "header_bg": "#121212",
+        "container_bg": "#1E1E1E",
+        "btn_bg": "#2D2D2D",
+        "btn_hover": "#3D3D3D",
+        "btn_checked": "#0D47A1",
+        "toolbar_checked": "#5A5A5A",
+        "menu_bg": "#2D2D2D",
+        "shadow_color": QColor(0, 0, 0, 150),
+    },
+    False: {
+        "theme_icon": "BLK_moon.png",
+        "settings_icon": "blk_setting.png",
+        "text_color": "#1F1F1F",
+        "header_bg": "#F5F7FA",
+        "container_bg": "#E8F0FE",
+        "btn_bg": "#FFFFFF",
+        "btn_hover": "#D2E3FC",
+        "btn_checked": "#AECBFA",
+        "toolbar_checked": "#AECBFA",
+        "menu_bg": "#FFFFFF",
+        "shadow_color": QColor(0, 0, 0, 40),
+    },
+}
+
+# Feuilles de chaque thème. "window" est ajoutée à la feuille de base ; les autres
+# sont posées sur les widgets eux-mêmes, pour passer devant le fond transparent que
+# les pages imposent à leurs enfants.
+TEMPLATES = {}
+
+TEMPLATES["window"] = """
+QWidget {{ color: {text_color}; }}
+QLabel {{ color: {text_color}; }}
+
+#Header {{
+    background-color: {header_bg};
+    border-bottom: none;
+}}
+
+QPushButton {{
+    background-color: {btn_bg};
+    color: {text_color};
+    border: none;
+}}
+QPushButton:hover {{
+    background-color: {btn_hover};
+}}
+
+QPushButton#IconBtn {{
+    background-color: transparent;
+    border: none;
+}}
+QPushButton#IconBtn:hover {{
+    background-color: {btn_hover};
+    border-radius: 22px;
+}}
+
+QPushButton:checked {{
+    background-color: {btn_checked};
+}}
+
+QPushButton#PrimaryBtn {{
+    background-color: {btn_bg};
+    color: {text_color};
+    border: 2px solid {text_color};
+    font-weight: bold;
+}}
+QPushButton#PrimaryBtn:hover {{
+    background-color: {btn_hover};
+    border: 2px solid {text_color};
+}}
+
+#ContentContainer {{
+    background-color: {container_bg};
+    border: none;
+}}
+
+QTextEdit, QLineEdit {{
+    background-color: transparent;
+    color: {text_color};
+    selection-background-color: #1A73E8;
+    selection-color: white;
+}}
+
+QMenu {{
+    background-color: {menu_bg};
+    color: {text_color};
+    border: 1px solid {btn_hover};
+}}
+QMenu::item:selected {{
+    background-color: {btn_hover};
+}}
+
+QPushButton#ToolBtn {{
+    border-radius: 8px;
+    padding: 5px;
+    min-width: 32px;
+    font-weight: bold;
+}}
+"""
+
+TEMPLATES["container"] = "background-color: {container_bg}; border-radius: 24px;"
+
+# Boutons à bascule de la barre d'outils : leur état passe par la pseudo-classe
+# :checked, cocher un bouton ne fait que le repeindre
+TEMPLATES["toggle_button"] = """
+QPushButton {{ background-color: {btn_bg}; }}
+QPushButton:checked {{ background-color: {toolbar_checked}; }}
+"""
+
+_compiled = {}
+
+def stylesheet(name, is_dark):
+    """Feuille `name` d'un thème, construite une seule fois par session."""
+    key = (name, is_dark)
+    sheet = _compiled.get(key)
+    if sheet is None:
+        sheet = TEMPLATES[name].format(**THEMES[is_dark])
+        if name == "window":
+            with open(BASE_STYLE_PATH, encoding="utf-8") as source:
+                sheet = source.read() + sheet
+        _compiled[key] = sheet
+    return sheet
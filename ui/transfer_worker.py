@@ -0,0 +1,39 @@
+from PyQt6.QtCore import QThread, pyqtSignal
+from transfer import TransferCancelled
+
+class TransferWorker(QThread):
+    """Exécute un import ou un export hors de la boucle Qt en signalant sa progression."""
+
+    progressed = pyqtSignal(int)
+    completed = pyqtSignal(int)
+    cancelled = pyqtSignal()
+    failed = pyqtSignal(str)
+
+    # Nombre de notes entre deux signaux de progression
+    PROGRESS_STEP = 200
+
+    def __init__(self, task, parent=None):
+        super().__init__(parent)
+        self.task = task
+        self._cancel_requested = False
+        self._last_reported = 0
+
+    def cancel(self):
+        self._cancel_requested = True
+
+    def _progress(self, count):
+        if self._cancel_requested:
+            raise TransferCancelled()
+        if count - self._last_reported >= self.PROGRESS_STEP:
+            self._last_reported = count
+            self.progressed.emit(count)
+
+    def run(self):
+        try:
+            count = self.task(self._progress)
+        except TransferCancelled:
+            self.cancelled.emit()
+        except Exception as e:
+            self.failed.emit(str(e))
+        else:
+            self.completed.emit(count)